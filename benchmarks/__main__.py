@@ -0,0 +1,70 @@
+import argparse
+import sys
+import tempfile
+
+from benchmarks import suite  # noqa: F401, registers the benchmarks
+from benchmarks.fixtures import SCALES, Fixtures
+from benchmarks.runner import (
+    compare_reports,
+    load_report,
+    print_comparisons,
+    run_benchmarks,
+    save_report,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark kano hot paths on synthetic fixtures.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("-o", "--output", default="benchmark.json")
+    run_parser.add_argument(
+        "-k",
+        "--filter",
+        nargs="*",
+        default=None,
+        help="substrings of the benchmark names to run",
+    )
+    run_parser.add_argument("--scale", choices=SCALES, default="small")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--warmup", type=int, default=1)
+    run_parser.add_argument(
+        "--fixtures-dir",
+        default=None,
+        help="folder to keep the generated fixtures, a temporary one if not set",
+    )
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="compare two benchmark reports"
+    )
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.05)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        with tempfile.TemporaryDirectory() as temp_dir:
+            fixtures = Fixtures(args.fixtures_dir or temp_dir, args.scale)
+            report = run_benchmarks(
+                fixtures, args.filter, args.repeat, args.warmup
+            )
+        save_report(report, args.output)
+        print(f"Saved benchmark report to {args.output}")
+        return 0
+
+    comparisons = compare_reports(
+        load_report(args.base), load_report(args.new), args.threshold
+    )
+    print_comparisons(comparisons)
+    if any(comparison["status"] == "slower" for comparison in comparisons):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,696 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+import yaml
+
+from kano.file_utils import create_folder
+from kano.lab.box_gen import BatchDetectGen, Box, DetectGen, LoopType
+from kano.pack_utils import pack_dataset
+
+SCALES = {
+    "small": {
+        "num_images": 100,
+        "image_size": (480, 640),
+        "boxes_per_image": 10,
+        "num_frames": 150,
+        "num_boxes": 200,
+        "num_candidates": 300,
+        "num_candidate_frames": 8,
+        "num_tracks": 100,
+        "num_track_frames": 100,
+    },
+    "medium": {
+        "num_images": 1000,
+        "image_size": (720, 1280),
+        "boxes_per_image": 30,
+        "num_frames": 600,
+        "num_boxes": 1000,
+        "num_candidates": 1000,
+        "num_candidate_frames": 16,
+        "num_tracks": 300,
+        "num_track_frames": 300,
+    },
+    "large": {
+        "num_images": 5000,
+        "image_size": (1080, 1920),
+        "boxes_per_image": 100,
+        "num_frames": 1800,
+        "num_boxes": 5000,
+        "num_candidates": 3000,
+        "num_candidate_frames": 32,
+        "num_tracks": 1000,
+        "num_track_frames": 300,
+    },
+}
+
+
+def make_random_image(rng, image_size):
+    """
+    Create a smooth random BGR image, cheap to generate but not trivially compressible.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        image_size (tuple(int, int)): (height, width) of the image.
+
+    Returns:
+        image (np.ndarray): uint8 image with shape (height, width, 3).
+    """
+    height, width = image_size
+    small = rng.integers(0, 256, (height // 16 + 1, width // 16 + 1, 3))
+    image = cv2.resize(
+        small.astype(np.uint8), (width, height), interpolation=cv2.INTER_LINEAR
+    )
+    return image
+
+
+def make_random_s_xywh(rng, num_boxes):
+    """
+    Create random scaled xywh boxes which stay inside the image.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        num_boxes (int): Number of boxes.
+
+    Returns:
+        s_xywh (np.ndarray): float array with shape (num_boxes, 4).
+    """
+    wh = rng.uniform(0.02, 0.3, (num_boxes, 2))
+    xy = rng.uniform(wh / 2, 1 - wh / 2)
+    return np.concatenate([xy, wh], axis=1)
+
+
+def make_yolo_dataset(
+    dataset_path,
+    num_images=100,
+    image_size=(480, 640),
+    boxes_per_image=10,
+    num_classes=3,
+    seed=0,
+):
+    """
+    Write a synthetic YOLO detection dataset with a single "train" subset.
+
+    Args:
+        dataset_path (str): Path to the dataset folder.
+        num_images (int): Number of images.
+        image_size (tuple(int, int)): (height, width) of the images.
+        boxes_per_image (int): Number of boxes per label file.
+        num_classes (int): Number of classes.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        dataset_path (str): Path to the dataset folder.
+    """
+    rng = np.random.default_rng(seed)
+    dataset_path = Path(dataset_path)
+    images_folder = dataset_path / "train" / "images"
+    labels_folder = dataset_path / "train" / "labels"
+    create_folder(images_folder)
+    create_folder(labels_folder)
+
+    n_digits = len(str(num_images))
+    for i in range(num_images):
+        stem = f"image_{str(i).zfill(n_digits)}"
+        cv2.imwrite(
+            str(images_folder / f"{stem}.jpg"),
+            make_random_image(rng, image_size),
+        )
+        classes = rng.integers(0, num_classes, boxes_per_image)
+        boxes = make_random_s_xywh(rng, boxes_per_image)
+        with open(labels_folder / f"{stem}.txt", "w") as f:
+            for cls, box in zip(classes, boxes):
+                f.write(f"{cls} {' '.join(f'{x:.6f}' for x in box)}\n")
+
+    data = {
+        "train": "train",
+        "val": "valid",
+        "test": "test",
+        "names": [f"class_{i}" for i in range(num_classes)],
+    }
+    with open(dataset_path / "data.yaml", "w") as f:
+        yaml.dump(data, f)
+
+    return str(dataset_path)
+
+
+def make_video(video_path, num_frames=150, image_size=(480, 640), fps=30):
+    """
+    Write a synthetic video of a random image scrolling horizontally.
+
+    Args:
+        video_path (str): Path to the output video.
+        num_frames (int): Number of frames.
+        image_size (tuple(int, int)): (height, width) of the frames.
+        fps (int): Frames per second of the video.
+
+    Returns:
+        video_path (str): Path to the output video.
+    """
+    height, width = image_size
+    rng = np.random.default_rng(0)
+    background = make_random_image(rng, image_size)
+    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+    writer = cv2.VideoWriter(str(video_path), fourcc, fps, (width, height))
+    for i in range(num_frames):
+        writer.write(np.roll(background, i * 4, axis=1))
+    writer.release()
+    return str(video_path)
+
+
+def make_detect_gens(
+    num_objects=200,
+    image_size=(480, 640),
+    num_keyframes=4,
+    seed=0,
+    box_scale=1.0,
+):
+    """
+    Create DetectGen objects moving randomly inside the image.
+
+    Args:
+        num_objects (int): Number of DetectGen objects.
+        image_size (tuple(int, int)): (height, width) of the scene.
+        num_keyframes (int): Number of boxes of each sequence.
+        seed (int): Seed of the random generator.
+        box_scale (float): Scale of the box sizes, 5-20% of the width and
+            5-30% of the height at 1.
+
+    Returns:
+        detect_gens (list(DetectGen)): The generated sequences.
+    """
+    rng = np.random.default_rng(seed)
+    height, width = image_size
+    loop_types = list(LoopType)
+    detect_gens = list()
+    for i in range(num_objects):
+        boxes = list()
+        for _ in range(num_keyframes):
+            box_width = int(box_scale * rng.uniform(0.05, 0.2) * width)
+            box_height = int(box_scale * rng.uniform(0.05, 0.3) * height)
+            point = [rng.uniform(0, width), rng.uniform(0, height)]
+            boxes.append(Box(box_width, box_height, point))
+        durations = list(rng.uniform(0.5, 3, num_keyframes - 1))
+        detect_gens.append(
+            DetectGen(
+                boxes,
+                durations,
+                start_after=float(rng.uniform(0, 1)),
+                loop_type=loop_types[i % len(loop_types)],
+            )
+        )
+    return detect_gens
+
+
+def make_nms_candidates(
+    rng, num_candidates=1000, num_objects=50, image_size=(480, 640)
+):
+    """
+    Create dense detector-like candidates: jittered boxes around a few objects.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        num_candidates (int): Number of candidate boxes.
+        num_objects (int): Number of objects the candidates are spread around.
+        image_size (tuple(int, int)): (height, width) of the image.
+
+    Returns:
+        xyxy (np.ndarray): (num_candidates, 4) float xyxy boxes.
+        scores (np.ndarray): (num_candidates,) scores.
+        classes (np.ndarray): (num_candidates,) class ids in [0, 3).
+    """
+    height, width = image_size
+    centers = rng.uniform(0, 1, (num_objects, 2)) * [width, height]
+    sizes = rng.uniform(0.05, 0.3, (num_objects, 2)) * [width, height]
+    object_ids = rng.integers(0, num_objects, num_candidates)
+    candidate_sizes = sizes[object_ids] * rng.uniform(
+        0.8, 1.2, (num_candidates, 2)
+    )
+    candidate_centers = (
+        centers[object_ids]
+        + rng.normal(0, 0.05, (num_candidates, 2)) * sizes[object_ids]
+    )
+    xyxy = np.hstack(
+        [
+            candidate_centers - candidate_sizes / 2,
+            candidate_centers + candidate_sizes / 2,
+        ]
+    )
+    scores = rng.uniform(0.05, 1, num_candidates)
+    classes = object_ids % 3
+    return xyxy, scores, classes
+
+
+def make_pose_keypoints(rng, num_persons=10, image_size=(480, 640)):
+    """
+    Create COCO-like keypoints of persons spread over the image.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        num_persons (int): Number of persons.
+        image_size (tuple(int, int)): (height, width) of the image.
+
+    Returns:
+        keypoints (np.ndarray): (num_persons, 17, 3) int keypoints (x, y, state).
+    """
+    height, width = image_size
+    centers = rng.uniform(0.1, 0.9, (num_persons, 1, 2)) * [width, height]
+    sizes = rng.uniform(0.05, 0.2, (num_persons, 1, 1)) * height
+    points = centers + rng.uniform(-0.5, 0.5, (num_persons, 17, 2)) * sizes
+    states = rng.choice(3, (num_persons, 17, 1), p=[0.1, 0.2, 0.7])
+    return np.concatenate([points.astype(np.int64), states], axis=2)
+
+
+def make_pose_predictions(rng, keypoints, num_false=5, noise=0.1):
+    """
+    Create pose predictions: jittered ground truths and a few false persons.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        keypoints (np.ndarray): (P, 17, 3) ground truth keypoints.
+        num_false (int): Number of predictions unrelated to the ground truths.
+        noise (float): Standard deviation of the jitter, relative to the
+            spread of the keypoints of each person.
+
+    Returns:
+        pred_keypoints (np.ndarray): (P + num_false, 17, 2) predicted keypoints.
+        scores (np.ndarray): (P + num_false,) scores.
+    """
+    points = keypoints[:, :, :2].astype(np.float64)
+    spreads = points.std(axis=1, keepdims=True)
+    pred_keypoints = points + rng.normal(0, noise, points.shape) * spreads
+    false_keypoints = rng.permutation(points.reshape(-1, 2))
+    false_keypoints = false_keypoints[: num_false * 17].reshape(-1, 17, 2)
+    pred_keypoints = np.concatenate([pred_keypoints, false_keypoints])
+    scores = rng.uniform(0.05, 1, len(pred_keypoints))
+    return pred_keypoints, scores
+
+
+def make_mask_polygons(
+    rng, num_masks=10, image_size=(480, 640), noise=0.05, max_points=30
+):
+    """
+    Create star-shaped polygons of objects and slightly moved copies of them.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        num_masks (int): Number of polygons.
+        image_size (tuple(int, int)): (height, width) of the image.
+        noise (float): Standard deviation of the moves, relative to the radius.
+        max_points (int): Maximum number of points of a polygon.
+
+    Returns:
+        polygons (list(np.ndarray)): (P, 2) points (x, y) of each polygon.
+        moved_polygons (list(np.ndarray)): The moved copies.
+    """
+    height, width = image_size
+    polygons, moved_polygons = list(), list()
+    for _ in range(num_masks):
+        center = rng.uniform(0.1, 0.9, 2) * [width, height]
+        num_points = rng.integers(6, max_points)
+        angles = np.sort(rng.uniform(0, 2 * np.pi, num_points))
+        radius = rng.uniform(0.02, 0.15) * height
+        radii = radius * rng.uniform(0.5, 1, num_points)
+        polygon = (
+            center + np.c_[np.cos(angles), np.sin(angles)] * radii[:, None]
+        )
+        polygons.append(polygon)
+        moved_polygons.append(
+            polygon + rng.normal(0, noise * radius, polygon.shape)
+        )
+    return polygons, moved_polygons
+
+
+def make_segment_dataset(
+    dataset_path,
+    num_images=100,
+    image_size=(480, 640),
+    polygons_per_image=10,
+    num_classes=3,
+    seed=0,
+):
+    """
+    Write a synthetic YOLO segmentation dataset with a single "train" subset.
+
+    Args:
+        dataset_path (str): Path to the dataset folder.
+        num_images (int): Number of images.
+        image_size (tuple(int, int)): (height, width) of the images.
+        polygons_per_image (int): Number of polygons per label file, with
+            about 200 points each.
+        num_classes (int): Number of classes.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        dataset_path (str): Path to the dataset folder.
+    """
+    rng = np.random.default_rng(seed)
+    height, width = image_size
+    dataset_path = Path(dataset_path)
+    images_folder = dataset_path / "train" / "images"
+    labels_folder = dataset_path / "train" / "labels"
+    create_folder(images_folder)
+    create_folder(labels_folder)
+
+    n_digits = len(str(num_images))
+    for i in range(num_images):
+        stem = f"image_{str(i).zfill(n_digits)}"
+        cv2.imwrite(
+            str(images_folder / f"{stem}.jpg"),
+            make_random_image(rng, image_size),
+        )
+        classes = rng.integers(0, num_classes, polygons_per_image)
+        polygons, _ = make_mask_polygons(
+            rng, polygons_per_image, image_size, max_points=400
+        )
+        with open(labels_folder / f"{stem}.txt", "w") as f:
+            for cls, polygon in zip(classes, polygons):
+                points = np.clip(polygon / [width, height], 0, 1)
+                values = " ".join(f"{x:.6f}" for x in points.reshape(-1))
+                f.write(f"{cls} {values}\n")
+
+    with open(dataset_path / "data.yaml", "w") as f:
+        yaml.dump({"names": [f"class_{i}" for i in range(num_classes)]}, f)
+
+    return str(dataset_path)
+
+
+def make_pose_dataset(
+    dataset_path,
+    num_images=100,
+    image_size=(480, 640),
+    persons_per_image=10,
+    seed=0,
+):
+    """
+    Write a synthetic YOLO pose dataset with a "valid" subset, and predictions of it.
+
+    Args:
+        dataset_path (str): Path to the dataset folder.
+        num_images (int): Number of images.
+        image_size (tuple(int, int)): (height, width) of the images.
+        persons_per_image (int): Number of persons per label file.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        dataset_path (str): Path to the dataset folder.
+        predictions_path (str): Path to the folder of the prediction files.
+    """
+    rng = np.random.default_rng(seed)
+    height, width = image_size
+    scale = np.array([width, height])
+    dataset_path = Path(dataset_path)
+    images_folder = dataset_path / "valid" / "images"
+    labels_folder = dataset_path / "valid" / "labels"
+    predictions_folder = dataset_path / "predictions"
+    for folder in [images_folder, labels_folder, predictions_folder]:
+        create_folder(folder)
+
+    n_digits = len(str(num_images))
+    for i in range(num_images):
+        stem = f"image_{str(i).zfill(n_digits)}"
+        cv2.imwrite(
+            str(images_folder / f"{stem}.jpg"),
+            make_random_image(rng, image_size),
+        )
+        keypoints = make_pose_keypoints(rng, persons_per_image, image_size)
+        pred_keypoints, scores = make_pose_predictions(rng, keypoints)
+        with open(labels_folder / f"{stem}.txt", "w") as f:
+            for person in keypoints:
+                points = person[:, :2] / scale
+                x_min, y_min = points.min(axis=0)
+                x_max, y_max = points.max(axis=0)
+                box = [
+                    (x_min + x_max) / 2,
+                    (y_min + y_max) / 2,
+                    x_max - x_min,
+                    y_max - y_min,
+                ]
+                values = np.concatenate([box, person.reshape(-1)])
+                values[4::3] /= width
+                values[5::3] /= height
+                f.write(f"0 {' '.join(f'{x:.6f}' for x in values)}\n")
+        with open(predictions_folder / f"{stem}.txt", "w") as f:
+            for person, score in zip(pred_keypoints, scores):
+                values = np.concatenate(
+                    [person / scale, np.ones((17, 1))], axis=1
+                )
+                f.write(
+                    "0 0.5 0.5 0.1 0.1 "
+                    f"{' '.join(f'{x:.6f}' for x in values.reshape(-1))} "
+                    f"{score:.6f}\n"
+                )
+
+    with open(dataset_path / "data.yaml", "w") as f:
+        yaml.dump({"val": "valid", "names": ["person"]}, f)
+
+    return str(dataset_path), str(predictions_folder)
+
+
+def make_track_detections(
+    detect_gens, num_frames, time_step=1 / 240, dropout=0.05, noise=1, seed=0
+):
+    """
+    Sample noisy detections of DetectGen objects, shuffled in every frame, with their ground-truth ids.
+
+    Args:
+        detect_gens (list(DetectGen)): Sequences of the tracked objects.
+        num_frames (int): Number of frames.
+        time_step (float): Time between two frames, small enough for the
+            boxes of consecutive frames to overlap.
+        dropout (float): Probability of missing a visible object.
+        noise (float): Standard deviation of the box coordinates noise in pixels.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        frames (list(tuple)): (object_ids, xyxy) of every frame.
+    """
+    rng = np.random.default_rng(seed)
+    batch_detect_gen = BatchDetectGen(detect_gens)
+    batch_detect_gen.start(0)
+    # every generated sequence is visible from t=1 (start_after < 1)
+    frame_times = 1 + np.arange(num_frames) * time_step
+    all_xyxy = batch_detect_gen.gen_xyxy(frame_times)
+    frames = list()
+    for xyxy in all_xyxy:
+        detected = ~np.isnan(xyxy[:, 0]) & (rng.random(len(xyxy)) > dropout)
+        object_ids = rng.permutation(np.flatnonzero(detected))
+        boxes = xyxy[object_ids] + rng.normal(0, noise, (len(object_ids), 4))
+        frames.append((object_ids, boxes))
+    return frames
+
+
+class Fixtures:
+    """
+    Lazily built, cached fixtures shared by the benchmarks of one run.
+
+    Attributes:
+        root (Path): Folder where the fixtures files are written.
+        scale (str): Name of the size preset, one of SCALES.
+        config (dict): Sizes of the fixtures for the chosen scale.
+    """
+
+    def __init__(self, root, scale="small"):
+        """
+        Initialize a Fixtures object.
+
+        Args:
+            root (str): Folder where the fixtures files are written.
+            scale (str): Name of the size preset, one of SCALES.
+        """
+        if scale not in SCALES:
+            raise ValueError(
+                "Unexpected scale. Please provide one of:", SCALES
+            )
+        self.root = Path(root)
+        self.scale = scale
+        self.config = SCALES[scale]
+        self._cache = dict()
+
+    def _get(self, key, build):
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    @property
+    def dataset_path(self):
+        return self._get(
+            "dataset_path",
+            lambda: make_yolo_dataset(
+                self.root / "dataset",
+                self.config["num_images"],
+                self.config["image_size"],
+                self.config["boxes_per_image"],
+            ),
+        )
+
+    @property
+    def packed_dataset_path(self):
+        def build():
+            packed_dataset_path = self.root / "packed_dataset"
+            pack_dataset(self.dataset_path, packed_dataset_path)
+            return str(packed_dataset_path)
+
+        return self._get("packed_dataset_path", build)
+
+    @property
+    def segment_dataset_path(self):
+        return self._get(
+            "segment_dataset_path",
+            lambda: make_segment_dataset(
+                self.root / "segment_dataset",
+                self.config["num_images"],
+                self.config["image_size"],
+                self.config["boxes_per_image"],
+            ),
+        )
+
+    @property
+    def video_path(self):
+        return self._get(
+            "video_path",
+            lambda: make_video(
+                self.root / "video.mp4",
+                self.config["num_frames"],
+                self.config["image_size"],
+            ),
+        )
+
+    @property
+    def image(self):
+        return self._get(
+            "image",
+            lambda: make_random_image(
+                np.random.default_rng(0), self.config["image_size"]
+            ),
+        )
+
+    @property
+    def detect_gens(self):
+        return self._get(
+            "detect_gens",
+            lambda: make_detect_gens(
+                self.config["num_boxes"], self.config["image_size"]
+            ),
+        )
+
+    @property
+    def xyxy_boxes(self):
+        """
+        np.ndarray: (num_boxes, 4) int xyxy boxes sampled from the DetectGen objects.
+        """
+
+        def build():
+            boxes = list()
+            for detect_gen in self.detect_gens:
+                # every generated sequence is visible at t=1 (start_after < 1)
+                detect_gen.start(0)
+                boxes.append(detect_gen.gen_xyxy(1.0))
+            return np.array(boxes)
+
+        return self._get("xyxy_boxes", build)
+
+    @property
+    def nms_candidates(self):
+        """
+        list(tuple): (xyxy, scores, classes) detector candidates of several frames.
+        """
+
+        def build():
+            rng = np.random.default_rng(0)
+            return [
+                make_nms_candidates(
+                    rng,
+                    self.config["num_candidates"],
+                    image_size=self.config["image_size"],
+                )
+                for _ in range(self.config["num_candidate_frames"])
+            ]
+
+        return self._get("nms_candidates", build)
+
+    @property
+    def pose_keypoints(self):
+        return self._get(
+            "pose_keypoints",
+            lambda: make_pose_keypoints(
+                np.random.default_rng(0),
+                self.config["boxes_per_image"],
+                self.config["image_size"],
+            ),
+        )
+
+    @property
+    def pose_predictions(self):
+        """
+        list(tuple): (gt_keypoints, areas, pred_keypoints, scores) of several frames.
+        """
+
+        def build():
+            rng = np.random.default_rng(0)
+            frames = list()
+            for _ in range(self.config["num_candidate_frames"]):
+                keypoints = make_pose_keypoints(
+                    rng,
+                    self.config["boxes_per_image"],
+                    self.config["image_size"],
+                )
+                sizes = np.ptp(keypoints[:, :, :2], axis=1)
+                areas = sizes[:, 0] * sizes[:, 1] * 0.53
+                frames.append(
+                    (keypoints, areas, *make_pose_predictions(rng, keypoints))
+                )
+            return frames
+
+        return self._get("pose_predictions", build)
+
+    @property
+    def mask_polygons(self):
+        """
+        list(tuple): (polygons, moved_polygons) of several frames.
+        """
+
+        def build():
+            rng = np.random.default_rng(0)
+            return [
+                make_mask_polygons(
+                    rng,
+                    self.config["boxes_per_image"],
+                    self.config["image_size"],
+                )
+                for _ in range(self.config["num_candidate_frames"])
+            ]
+
+        return self._get("mask_polygons", build)
+
+    @property
+    def pose_dataset(self):
+        """
+        tuple(str, str): Paths to a pose dataset and to predictions of it.
+        """
+        return self._get(
+            "pose_dataset",
+            lambda: make_pose_dataset(
+                self.root / "pose_dataset",
+                self.config["num_images"],
+                self.config["image_size"],
+                self.config["boxes_per_image"],
+            ),
+        )
+
+    @property
+    def track_detections(self):
+        """
+        list(tuple): (object_ids, xyxy) noisy detections of small moving objects.
+        """
+        return self._get(
+            "track_detections",
+            lambda: make_track_detections(
+                make_detect_gens(
+                    self.config["num_tracks"],
+                    self.config["image_size"],
+                    box_scale=0.25,
+                ),
+                self.config["num_track_frames"],
+            ),
+        )
@@ -0,0 +1,187 @@
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+BENCHMARKS = dict()
+
+
+def benchmark(name):
+    """
+    Register a benchmark.
+
+    The decorated function receives the `Fixtures` of the run and returns a
+    tuple (run, items): `run` is the zero-argument function to time and `items`
+    is the number of items (images, boxes, frames...) it processes per call.
+
+    Args:
+        name (str): Unique name of the benchmark, e.g. "detect_utils.draw_bbox".
+    """
+
+    def decorator(setup):
+        if name in BENCHMARKS:
+            raise ValueError(f"Benchmark {name} is already registered.")
+        BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+def measure(run, items, repeat=5, warmup=1):
+    """
+    Time a function and measure its peak traced memory.
+
+    The peak memory is measured in a separate call because `tracemalloc`
+    slows down the timed calls.
+
+    Args:
+        run (callable): Zero-argument function to measure.
+        items (int): Number of items processed per call.
+        repeat (int): Number of timed calls.
+        warmup (int): Number of untimed calls before timing.
+
+    Returns:
+        result (dict): Timings in seconds, throughput in items per second and
+            peak memory in MiB.
+    """
+    for _ in range(warmup):
+        run()
+
+    times = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(times)
+    return {
+        "times": times,
+        "median": median,
+        "min": min(times),
+        "max": max(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "items": items,
+        "throughput": items / median if median > 0 else float("inf"),
+        "peak_mib": peak / 1024**2,
+    }
+
+
+def run_benchmarks(fixtures, names=None, repeat=5, warmup=1):
+    """
+    Run the registered benchmarks.
+
+    Args:
+        fixtures (Fixtures): Fixtures shared by the benchmarks.
+        names (list(str) or None): Substrings to select benchmarks by name,
+            or None to run all of them.
+        repeat (int): Number of timed calls per benchmark.
+        warmup (int): Number of untimed calls per benchmark.
+
+    Returns:
+        report (dict): The environment under "meta" and one result per
+            benchmark under "results".
+    """
+    results = dict()
+    for name, setup in BENCHMARKS.items():
+        if names and not any(pattern in name for pattern in names):
+            continue
+        run, items = setup(fixtures)
+        result = measure(run, items, repeat, warmup)
+        results[name] = result
+        print(
+            f"{name}: {result['median'] * 1000:.3f} ms"
+            f" - {result['throughput']:.1f} items/s"
+            f" - peak {result['peak_mib']:.2f} MiB"
+        )
+
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "scale": fixtures.scale,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def save_report(report, output_path):
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(report_path):
+    with open(report_path, "r") as f:
+        return json.load(f)
+
+
+def compare_reports(base_report, new_report, threshold=0.05):
+    """
+    Compare the median times of two reports.
+
+    A change is significant when the relative difference of the medians is
+    above `threshold` and the ranges [min, max] of the timed calls do not
+    overlap, so that a single noisy call cannot flag a regression.
+
+    Args:
+        base_report (dict): Report of the reference run.
+        new_report (dict): Report of the run to check.
+        threshold (float): Minimum relative change of the median time.
+
+    Returns:
+        comparisons (list(dict)): One dict per benchmark present in both
+            reports, with keys "name", "base", "new", "ratio", "peak_ratio"
+            and "status" ("faster", "slower" or "same").
+    """
+    comparisons = list()
+    base_results = base_report["results"]
+    new_results = new_report["results"]
+    for name, new in new_results.items():
+        if name not in base_results:
+            continue
+        base = base_results[name]
+        ratio = new["median"] / base["median"]
+        status = "same"
+        if ratio > 1 + threshold and new["min"] > base["max"]:
+            status = "slower"
+        elif ratio < 1 - threshold and new["max"] < base["min"]:
+            status = "faster"
+        peak_ratio = None
+        if base["peak_mib"] > 0:
+            peak_ratio = new["peak_mib"] / base["peak_mib"]
+        comparisons.append(
+            {
+                "name": name,
+                "base": base["median"],
+                "new": new["median"],
+                "ratio": ratio,
+                "peak_ratio": peak_ratio,
+                "status": status,
+            }
+        )
+    return comparisons
+
+
+def print_comparisons(comparisons):
+    for comparison in comparisons:
+        peak = ""
+        if comparison["peak_ratio"] is not None:
+            peak = f" - peak memory x{comparison['peak_ratio']:.2f}"
+        print(
+            f"{comparison['name']}: {comparison['base'] * 1000:.3f} ms"
+            f" -> {comparison['new'] * 1000:.3f} ms"
+            f" (x{comparison['ratio']:.2f}, {comparison['status']}){peak}"
+        )
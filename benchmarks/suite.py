@@ -0,0 +1,925 @@
+import contextlib
+import io
+import itertools
+import shutil
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.runner import benchmark
+from kano.augment_utils import RandomAffine
+from kano.box import BoxArray
+from kano.dataset_utils import YoloDataset, YoloImage, read_label_array
+from kano.detect_utils import (
+    batched_nms,
+    batched_weighted_box_fusion,
+    calculate_iou,
+    draw_bbox,
+    nms,
+    soft_nms,
+    weighted_box_fusion,
+)
+from kano.file_utils import list_files
+from kano.image import (
+    ImageCache,
+    concatenate_images,
+    letterbox_image,
+    read_reduced_image,
+    rotate_image,
+    shift_image,
+)
+from kano.lab.box_gen import BatchDetectGen
+from kano.lab.source_reader import SyntheticSource, VideoStreamer
+from kano.loader_utils import YoloLoader
+from kano.pack_utils import pack_dataset
+from kano.pose_utils import (
+    PoseEvaluator,
+    calculate_oks_matrix,
+    draw_skeleton,
+    draw_skeletons,
+)
+from kano.segment_utils import RLEMasks, calculate_mask_iou_matrix
+from kano.track_utils import IoUTracker
+from kano.video_utils import extract_frames
+
+KANO_MODULES = [
+    "kano.augment_utils",
+    "kano.box",
+    "kano.dataset_utils",
+    "kano.detect_utils",
+    "kano.file_utils",
+    "kano.image",
+    "kano.lab",
+    "kano.loader_utils",
+    "kano.pack_utils",
+    "kano.pose_utils",
+    "kano.segment_utils",
+    "kano.track_utils",
+    "kano.video_utils",
+]
+
+# optional dependencies which must only be imported by the functions using them
+LAZY_MODULES = ["matplotlib", "pandas", "requests"]
+
+# time to import all kano modules in a fresh interpreter, about 0.2s without
+# the lazy modules and 0.7s with them
+IMPORT_BUDGET_SECONDS = 0.5
+
+
+@benchmark("import.kano")
+def bench_import_kano(fixtures):
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        + "".join(f"import {module}\n" for module in KANO_MODULES)
+        + "print(time.perf_counter() - start)\n"
+        + f"print(' '.join(m for m in {LAZY_MODULES} if m in sys.modules))"
+    )
+
+    def run():
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        import_seconds, eager_modules = result.stdout.split("\n")[:2]
+        if eager_modules:
+            raise RuntimeError(
+                f"Importing kano eagerly imports: {eager_modules}"
+            )
+        if float(import_seconds) > IMPORT_BUDGET_SECONDS:
+            raise RuntimeError(
+                f"Importing kano took {float(import_seconds):.2f}s, "
+                f"over the budget of {IMPORT_BUDGET_SECONDS}s."
+            )
+
+    return run, 1
+
+
+@benchmark("dataset_utils.YoloImage.get_labels")
+def bench_get_labels(fixtures):
+    images_paths = list_files(f"{fixtures.dataset_path}/train/images")
+    yolo_images = [YoloImage(path) for path in images_paths]
+
+    def run():
+        for yolo_image in yolo_images:
+            yolo_image.get_labels()
+
+    return run, len(yolo_images)
+
+
+@benchmark("dataset_utils.YoloImage.get_annotated_image")
+def bench_get_annotated_image(fixtures):
+    images_paths = list_files(f"{fixtures.dataset_path}/train/images")[:20]
+    yolo_images = [YoloImage(path) for path in images_paths]
+
+    def run():
+        for yolo_image in yolo_images:
+            yolo_image.get_annotated_image()
+
+    return run, len(yolo_images)
+
+
+@benchmark("dataset_utils.YoloImage.get_labels.segment")
+def bench_get_segment_labels(fixtures):
+    images_paths = list_files(f"{fixtures.segment_dataset_path}/train/images")
+    yolo_images = [YoloImage(path, task="segment") for path in images_paths]
+
+    def run():
+        for yolo_image in yolo_images:
+            yolo_image.get_labels()
+
+    return run, len(yolo_images)
+
+
+@benchmark("dataset_utils.YoloImage.get_masks")
+def bench_get_masks(fixtures):
+    images_paths = list_files(f"{fixtures.segment_dataset_path}/train/images")
+    yolo_images = [YoloImage(path, task="segment") for path in images_paths]
+
+    def run():
+        for yolo_image in yolo_images:
+            yolo_image.get_masks()
+
+    return run, len(yolo_images)
+
+
+@benchmark("dataset_utils.YoloDataset.iter_images")
+def bench_iter_images(fixtures):
+    dataset = YoloDataset(fixtures.dataset_path)
+
+    def run():
+        for _ in dataset.iter_images("train", shuffle=True, seed=0):
+            pass
+
+    return run, fixtures.config["num_images"]
+
+
+@benchmark("dataset_utils.YoloDataset.iter_images.packed")
+def bench_iter_images_packed(fixtures):
+    dataset = YoloDataset(fixtures.packed_dataset_path)
+
+    def run():
+        for _ in dataset.iter_images("train", shuffle=True, seed=0):
+            pass
+
+    return run, fixtures.config["num_images"]
+
+
+@benchmark("dataset_utils.YoloDataset.iter_label_arrays")
+def bench_iter_label_arrays(fixtures):
+    dataset = YoloDataset(fixtures.dataset_path)
+
+    def run():
+        for _ in dataset.iter_label_arrays("train"):
+            pass
+
+    return run, fixtures.config["num_images"]
+
+
+@benchmark("dataset_utils.YoloDataset.iter_label_arrays.packed")
+def bench_iter_label_arrays_packed(fixtures):
+    dataset = YoloDataset(fixtures.packed_dataset_path)
+
+    def run():
+        for _ in dataset.iter_label_arrays("train"):
+            pass
+
+    return run, fixtures.config["num_images"]
+
+
+@benchmark("dataset_utils.YoloDataset.get_label_store")
+def bench_compile_label_store(fixtures):
+    dataset = YoloDataset(fixtures.dataset_path)
+    store_path = fixtures.root / "label_store"
+
+    def run():
+        dataset.get_label_store("train", store_path, rebuild=True)
+
+    return run, fixtures.config["num_images"]
+
+
+@benchmark("pack_utils.LabelStore.get_labels")
+def bench_label_store_get_labels(fixtures):
+    dataset = YoloDataset(fixtures.dataset_path)
+    label_store = dataset.get_label_store(
+        "train", fixtures.root / "label_store"
+    )
+    order = np.random.default_rng(0).permutation(len(label_store))
+
+    def run():
+        for index in order.tolist():
+            label_store.get_labels(index)
+
+    return run, len(order)
+
+
+@benchmark("dataset_utils.read_label_array.random")
+def bench_read_label_array_random(fixtures):
+    images_paths = list_files(f"{fixtures.dataset_path}/train/images")
+    order = np.random.default_rng(0).permutation(len(images_paths))
+    labels_paths = [
+        YoloImage.get_label_path(images_paths[index]) for index in order
+    ]
+
+    def run():
+        for label_path in labels_paths:
+            read_label_array(label_path)
+
+    return run, len(labels_paths)
+
+
+@benchmark("loader_utils.YoloLoader")
+def bench_yolo_loader(fixtures):
+    dataset = YoloDataset(fixtures.dataset_path)
+    loader = YoloLoader(
+        dataset,
+        batch_size=16,
+        image_size=(640, 640),
+        shuffle=True,
+    )
+
+    def run():
+        for _ in loader:
+            pass
+
+    return run, fixtures.config["num_images"]
+
+
+@benchmark("loader_utils.YoloLoader.serial")
+def bench_serial_loader(fixtures):
+    images_paths = list_files(f"{fixtures.dataset_path}/train/images")
+    order = np.random.default_rng(0).permutation(len(images_paths))
+
+    def run():
+        for index in order.tolist():
+            yolo_image = YoloImage(images_paths[index])
+            height, width = yolo_image.image.shape[:2]
+            ratio = min(640 / height, 640 / width)
+            new_size = (round(width * ratio), round(height * ratio))
+            image = np.full((640, 640, 3), 114, dtype=np.uint8)
+            image[: new_size[1], : new_size[0]] = cv2.resize(
+                yolo_image.image, new_size
+            )
+
+    return run, len(images_paths)
+
+
+def load_batches(fixtures, num_batches=4):
+    dataset = YoloDataset(fixtures.dataset_path)
+    loader = YoloLoader(dataset, batch_size=16, image_size=(640, 640))
+    return list(itertools.islice(loader, num_batches))
+
+
+@benchmark("augment_utils.RandomAffine")
+def bench_random_affine(fixtures):
+    batches = load_batches(fixtures)
+    augment = RandomAffine(degrees=10, shear=2, seed=0)
+    out = np.empty_like(batches[0]["images"])
+
+    def run():
+        for batch in batches:
+            if len(batch["images"]) == len(out):
+                augment(batch, out)
+
+    return run, sum(len(batch["images"]) for batch in batches)
+
+
+@benchmark("augment_utils.RandomAffine.chained")
+def bench_chained_augment(fixtures):
+    batches = load_batches(fixtures)
+    rng = np.random.default_rng(0)
+
+    def run():
+        for batch in batches:
+            for image in batch["images"]:
+                image = rotate_image(image, rng.uniform(-10, 10))
+                dx, dy = rng.uniform(-64, 64, 2)
+                image = shift_image(image, dx, dy)
+                if rng.random() < 0.5:
+                    image = cv2.flip(image, 1)
+
+    return run, sum(len(batch["images"]) for batch in batches)
+
+
+@benchmark("pack_utils.pack_dataset")
+def bench_pack_dataset(fixtures):
+    dataset_path = fixtures.dataset_path
+    packed_dataset_path = fixtures.root / "bench_packed_dataset"
+
+    def run():
+        shutil.rmtree(packed_dataset_path, ignore_errors=True)
+        pack_dataset(dataset_path, packed_dataset_path)
+
+    return run, fixtures.config["num_images"]
+
+
+@benchmark("dataset_utils.YoloDataset.split")
+def bench_split(fixtures):
+    dataset = YoloDataset(fixtures.dataset_path)
+    splitted_dataset_path = fixtures.root / "bench_splitted_dataset"
+
+    def run():
+        shutil.rmtree(splitted_dataset_path, ignore_errors=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            dataset.split(splitted_dataset_path, [0.8, 0.1])
+
+    return run, fixtures.config["num_images"]
+
+
+@benchmark("dataset_utils.YoloDataset.split.incremental")
+def bench_incremental_split(fixtures):
+    dataset = YoloDataset(fixtures.dataset_path)
+    splitted_dataset_path = fixtures.root / "bench_incremental_dataset"
+    shutil.rmtree(splitted_dataset_path, ignore_errors=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        dataset.split(splitted_dataset_path, [0.8, 0.1])
+
+    def run():
+        # nothing changed, every image is already copied
+        with contextlib.redirect_stdout(io.StringIO()):
+            dataset.split(splitted_dataset_path, [0.8, 0.1], incremental=True)
+
+    return run, fixtures.config["num_images"]
+
+
+@benchmark("dataset_utils.YoloDataset.merge_datasets")
+def bench_merge_datasets(fixtures):
+    merged_dataset_path = fixtures.root / "bench_merged_dataset"
+
+    def run():
+        shutil.rmtree(merged_dataset_path, ignore_errors=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            YoloDataset.merge_datasets(
+                [fixtures.dataset_path], merged_dataset_path
+            )
+
+    return run, fixtures.config["num_images"]
+
+
+@benchmark("dataset_utils.YoloDataset.merge_datasets.incremental")
+def bench_incremental_merge(fixtures):
+    merged_dataset_path = fixtures.root / "bench_incremental_merged_dataset"
+    shutil.rmtree(merged_dataset_path, ignore_errors=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        YoloDataset.merge_datasets(
+            [fixtures.dataset_path], merged_dataset_path
+        )
+
+    def run():
+        # nothing changed, every image is already merged
+        with contextlib.redirect_stdout(io.StringIO()):
+            YoloDataset.merge_datasets(
+                [fixtures.dataset_path], merged_dataset_path, incremental=True
+            )
+
+    return run, fixtures.config["num_images"]
+
+
+@benchmark("detect_utils.draw_bbox")
+def bench_draw_bbox(fixtures):
+    image = fixtures.image
+    boxes = fixtures.xyxy_boxes
+
+    def run():
+        for box in boxes:
+            draw_bbox(image, box, label="person")
+
+    return run, len(boxes)
+
+
+@benchmark("pose_utils.draw_skeleton")
+def bench_draw_skeleton(fixtures):
+    image = fixtures.image
+    persons = [
+        [{"xy": (x, y), "state": state} for x, y, state in person.tolist()]
+        for person in fixtures.pose_keypoints
+    ]
+
+    def run():
+        annotated_image = image
+        for keypoints in persons:
+            annotated_image = draw_skeleton(annotated_image, keypoints)
+
+    return run, len(persons)
+
+
+@benchmark("pose_utils.draw_skeletons")
+def bench_draw_skeletons(fixtures):
+    image = fixtures.image
+    keypoints = fixtures.pose_keypoints
+
+    def run():
+        draw_skeletons(image, keypoints)
+
+    return run, len(keypoints)
+
+
+@benchmark("pose_utils.calculate_oks_matrix")
+def bench_calculate_oks_matrix(fixtures):
+    frames = fixtures.pose_predictions
+
+    def run():
+        for gt_keypoints, areas, pred_keypoints, _ in frames:
+            calculate_oks_matrix(gt_keypoints, pred_keypoints, areas)
+
+    return run, len(frames)
+
+
+@benchmark("pose_utils.PoseEvaluator")
+def bench_pose_evaluator(fixtures):
+    frames = fixtures.pose_predictions
+
+    def run():
+        evaluator = PoseEvaluator(max_detections=None)
+        for frame in frames:
+            evaluator.update(*frame)
+        evaluator.compute()
+
+    return run, len(frames)
+
+
+@benchmark("dataset_utils.YoloDataset.evaluate_pose")
+def bench_evaluate_pose(fixtures):
+    dataset_path, predictions_path = fixtures.pose_dataset
+    dataset = YoloDataset(dataset_path, task="pose")
+    num_images = len(list_files(str(dataset.valid_folder / "images")))
+
+    def run():
+        results = dataset.evaluate_pose(
+            predictions_path,
+            image_size=fixtures.config["image_size"],
+            max_detections=None,
+        )
+        if not results["AP50"] > 0.5:
+            raise RuntimeError(f"Unexpected pose AP: {results}")
+
+    return run, num_images
+
+
+def draw_masks(polygons, image_size):
+    masks = np.zeros((len(polygons), *image_size), dtype=np.uint8)
+    for mask, polygon in zip(masks, polygons):
+        cv2.fillPoly(mask, [np.round(polygon).astype(np.int32)], 1)
+    return masks
+
+
+def dense_mask_iou_matrix(masks1, masks2):
+    flat1 = masks1.reshape(len(masks1), -1).astype(np.float32)
+    flat2 = masks2.reshape(len(masks2), -1).astype(np.float32)
+    intersections = flat1 @ flat2.T
+    unions = flat1.sum(1)[:, None] + flat2.sum(1)[None] - intersections
+    return intersections / np.maximum(unions, 1)
+
+
+@benchmark("segment_utils.RLEMasks.from_polygons")
+def bench_rle_from_polygons(fixtures):
+    frames = fixtures.mask_polygons
+    image_size = fixtures.config["image_size"]
+
+    def run():
+        for polygons, _ in frames:
+            RLEMasks.from_polygons(polygons, image_size)
+
+    return run, len(frames)
+
+
+@benchmark("segment_utils.RLEMasks.encode")
+def bench_rle_encode(fixtures):
+    image_size = fixtures.config["image_size"]
+    frames = [
+        draw_masks(polygons, image_size)
+        for polygons, _ in fixtures.mask_polygons
+    ]
+
+    def run():
+        for masks in frames:
+            RLEMasks.encode(masks)
+
+    return run, len(frames)
+
+
+@benchmark("segment_utils.calculate_mask_iou_matrix")
+def bench_calculate_mask_iou_matrix(fixtures):
+    image_size = fixtures.config["image_size"]
+    frames = [
+        (
+            RLEMasks.from_polygons(polygons, image_size),
+            RLEMasks.from_polygons(moved_polygons, image_size),
+        )
+        for polygons, moved_polygons in fixtures.mask_polygons
+    ]
+
+    def run():
+        for masks1, masks2 in frames:
+            calculate_mask_iou_matrix(masks1, masks2)
+
+    return run, len(frames)
+
+
+@benchmark("segment_utils.calculate_mask_iou_matrix.dense")
+def bench_dense_mask_iou_matrix(fixtures):
+    image_size = fixtures.config["image_size"]
+    frames = [
+        (draw_masks(polygons, image_size), draw_masks(moved, image_size))
+        for polygons, moved in fixtures.mask_polygons
+    ]
+
+    def run():
+        for masks1, masks2 in frames:
+            dense_mask_iou_matrix(masks1, masks2)
+
+    return run, len(frames)
+
+
+@benchmark("detect_utils.calculate_iou")
+def bench_calculate_iou(fixtures):
+    boxes = fixtures.xyxy_boxes
+
+    def run():
+        for box in boxes:
+            for other_box in boxes:
+                calculate_iou(box, other_box)
+
+    return run, len(boxes) ** 2
+
+
+@benchmark("detect_utils.calculate_iou.BoxArray")
+def bench_calculate_iou_box_array(fixtures):
+    boxes = BoxArray(fixtures.xyxy_boxes)
+
+    def run():
+        calculate_iou(boxes, boxes)
+
+    return run, len(boxes) ** 2
+
+
+def naive_nms(xyxy, scores, classes, iou_threshold=0.5):
+    """
+    Python-loop NMS built on calculate_iou, the baseline of the nms benchmarks.
+    """
+    order = sorted(range(len(scores)), key=lambda i: -scores[i])
+    keep = list()
+    while order:
+        index = order.pop(0)
+        keep.append(index)
+        order = [
+            other
+            for other in order
+            if classes[other] != classes[index]
+            or calculate_iou(xyxy[index], xyxy[other]) <= iou_threshold
+        ]
+    return keep
+
+
+@benchmark("detect_utils.nms")
+def bench_nms(fixtures):
+    candidates = fixtures.nms_candidates
+
+    def run():
+        for xyxy, scores, classes in candidates:
+            nms(xyxy, scores, classes)
+
+    return run, len(candidates)
+
+
+@benchmark("detect_utils.nms.naive")
+def bench_naive_nms(fixtures):
+    candidates = fixtures.nms_candidates
+
+    def run():
+        for xyxy, scores, classes in candidates:
+            naive_nms(xyxy, scores, classes)
+
+    return run, len(candidates)
+
+
+@benchmark("detect_utils.batched_nms")
+def bench_batched_nms(fixtures):
+    boxes_list, scores_list, classes_list = zip(*fixtures.nms_candidates)
+
+    def run():
+        batched_nms(boxes_list, scores_list, classes_list)
+
+    return run, len(boxes_list)
+
+
+@benchmark("detect_utils.soft_nms")
+def bench_soft_nms(fixtures):
+    candidates = fixtures.nms_candidates
+
+    def run():
+        for xyxy, scores, classes in candidates:
+            soft_nms(xyxy, scores, classes)
+
+    return run, len(candidates)
+
+
+def naive_soft_nms(xyxy, scores, classes, sigma=0.5, score_threshold=0.001):
+    """
+    Python-loop gaussian soft-NMS, the baseline of the soft_nms benchmark.
+    """
+    scores = list(scores)
+    remaining = [i for i in range(len(scores)) if scores[i] >= score_threshold]
+    keep, keep_scores = list(), list()
+    while remaining:
+        index = max(remaining, key=lambda i: scores[i])
+        remaining.remove(index)
+        keep.append(index)
+        keep_scores.append(scores[index])
+        for other in remaining:
+            if classes[other] == classes[index]:
+                iou = calculate_iou(xyxy[index], xyxy[other])
+                scores[other] *= np.exp(-(iou**2) / sigma)
+        remaining = [i for i in remaining if scores[i] >= score_threshold]
+    return keep, keep_scores
+
+
+@benchmark("detect_utils.soft_nms.naive")
+def bench_naive_soft_nms(fixtures):
+    candidates = fixtures.nms_candidates
+
+    def run():
+        for xyxy, scores, classes in candidates:
+            naive_soft_nms(xyxy, scores, classes)
+
+    return run, len(candidates)
+
+
+@benchmark("detect_utils.weighted_box_fusion")
+def bench_weighted_box_fusion(fixtures):
+    candidates = fixtures.nms_candidates
+
+    def run():
+        for xyxy, scores, classes in candidates:
+            weighted_box_fusion(xyxy, scores, classes)
+
+    return run, len(candidates)
+
+
+@benchmark("detect_utils.batched_weighted_box_fusion")
+def bench_batched_weighted_box_fusion(fixtures):
+    boxes_list, scores_list, classes_list = zip(*fixtures.nms_candidates)
+
+    def run():
+        batched_weighted_box_fusion(boxes_list, scores_list, classes_list)
+
+    return run, len(boxes_list)
+
+
+def naive_weighted_box_fusion(xyxy, scores, classes, iou_threshold=0.55):
+    """
+    Python-loop weighted box fusion, the baseline of the weighted_box_fusion benchmark.
+
+    Boxes are matched one at a time against the running fused boxes, the
+    algorithm approximated by the NMS seeded clusters of weighted_box_fusion.
+    """
+    clusters = list()
+    for index in sorted(range(len(scores)), key=lambda i: -scores[i]):
+        best, best_iou = None, iou_threshold
+        for cluster in clusters:
+            if cluster["class"] != classes[index]:
+                continue
+            iou = calculate_iou(cluster["box"], xyxy[index])
+            if iou > best_iou:
+                best, best_iou = cluster, iou
+        if best is None:
+            best = {"class": classes[index], "sum": np.zeros(4), "score": 0}
+            clusters.append(best)
+        best["sum"] = best["sum"] + scores[index] * np.asarray(xyxy[index])
+        best["score"] += scores[index]
+        best["box"] = best["sum"] / best["score"]
+    return clusters
+
+
+@benchmark("detect_utils.weighted_box_fusion.naive")
+def bench_naive_weighted_box_fusion(fixtures):
+    candidates = fixtures.nms_candidates
+
+    def run():
+        for xyxy, scores, classes in candidates:
+            naive_weighted_box_fusion(xyxy, scores, classes)
+
+    return run, len(candidates)
+
+
+def count_id_switches(frames, frame_ids):
+    """
+    Count the changes of reported track id of each ground-truth object.
+
+    Args:
+        frames (list(tuple)): (object_ids, xyxy) detections of every frame.
+        frame_ids (list(np.ndarray)): Track ids given to the detections, -1 if not reported.
+
+    Returns:
+        num_switches (int): Number of id changes.
+        num_reported (int): Number of detections with a reported id.
+    """
+    last_ids = dict()
+    num_switches = num_reported = 0
+    for (object_ids, _), ids in zip(frames, frame_ids):
+        for object_id, track_id in zip(object_ids.tolist(), ids.tolist()):
+            if track_id < 0:
+                continue
+            num_reported += 1
+            last_id = last_ids.get(object_id, track_id)
+            num_switches += last_id != track_id
+            last_ids[object_id] = track_id
+    return num_switches, num_reported
+
+
+@benchmark("track_utils.IoUTracker")
+def bench_iou_tracker(fixtures):
+    frames = fixtures.track_detections
+
+    tracker = IoUTracker()
+    frame_ids = [tracker.update(xyxy) for _, xyxy in frames]
+    num_switches, num_reported = count_id_switches(frames, frame_ids)
+    num_detections = sum(len(object_ids) for object_ids, _ in frames)
+    if num_reported < 0.9 * num_detections or num_switches > 0.01 * (
+        num_reported
+    ):
+        raise RuntimeError(
+            f"Poor tracking: {num_reported}/{num_detections} reported "
+            f"detections with {num_switches} id switches"
+        )
+
+    def run():
+        tracker.reset()
+        for _, xyxy in frames:
+            tracker.update(xyxy)
+
+    return run, len(frames)
+
+
+@benchmark("image.concatenate_images")
+def bench_concatenate_images(fixtures):
+    image = fixtures.image
+    images = [[image] * 3 for _ in range(3)]
+
+    def run():
+        concatenate_images(images, padding_size=10)
+
+    return run, 9
+
+
+@benchmark("image.letterbox_image")
+def bench_letterbox_image(fixtures):
+    images = [fixtures.image] * 16
+    out = np.empty((16, 640, 640, 3), dtype=np.uint8)
+
+    def run():
+        letterbox_image(images, out=out)
+
+    return run, len(images)
+
+
+@benchmark("image.letterbox_image.naive")
+def bench_naive_letterbox(fixtures):
+    images = [fixtures.image] * 16
+
+    def run():
+        for image in images:
+            height, width = image.shape[:2]
+            ratio = min(640 / height, 640 / width)
+            new_size = (round(width * ratio), round(height * ratio))
+            left = (640 - new_size[0]) // 2
+            top = (640 - new_size[1]) // 2
+            letterboxed = np.full((640, 640, 3), 114, dtype=np.uint8)
+            letterboxed[top : top + new_size[1], left : left + new_size[0]] = (
+                cv2.resize(image, new_size)
+            )
+
+    return run, len(images)
+
+
+@benchmark("image.ImageCache.read")
+def bench_image_cache(fixtures):
+    images_paths = list_files(f"{fixtures.dataset_path}/train/images")[:10]
+    image_cache = ImageCache()
+
+    def run():
+        # repeated reads of the same images, as in interactive QA
+        for _ in range(5):
+            for image_path in images_paths:
+                image_cache.read(image_path)
+
+    return run, 5 * len(images_paths)
+
+
+@benchmark("image.ImageCache.read.imread")
+def bench_imread(fixtures):
+    images_paths = list_files(f"{fixtures.dataset_path}/train/images")[:10]
+
+    def run():
+        for _ in range(5):
+            for image_path in images_paths:
+                cv2.imread(image_path)
+
+    return run, 5 * len(images_paths)
+
+
+@benchmark("image.read_reduced_image")
+def bench_read_reduced_image(fixtures):
+    images_paths = list_files(f"{fixtures.dataset_path}/train/images")[:10]
+
+    def run():
+        for image_path in images_paths:
+            read_reduced_image(image_path, 160)
+
+    return run, len(images_paths)
+
+
+@benchmark("image.read_reduced_image.full")
+def bench_read_full_image(fixtures):
+    images_paths = list_files(f"{fixtures.dataset_path}/train/images")[:10]
+
+    def run():
+        for image_path in images_paths:
+            image = cv2.imread(image_path)
+            height, width = image.shape[:2]
+            ratio = 160 / max(height, width)
+            cv2.resize(
+                image,
+                (round(width * ratio), round(height * ratio)),
+                interpolation=cv2.INTER_AREA,
+            )
+
+    return run, len(images_paths)
+
+
+@benchmark("video_utils.extract_frames")
+def bench_extract_frames(fixtures):
+    video_path = fixtures.video_path
+    target_folder = str(fixtures.root / "extracted_frames")
+    num_frames = fixtures.config["num_frames"]
+    seconds_interval = 0.1
+
+    def run():
+        extract_frames(video_path, target_folder, seconds_interval)
+        shutil.rmtree(target_folder)
+
+    return run, num_frames // 3
+
+
+@benchmark("lab.VideoStreamer")
+def bench_video_streamer(fixtures):
+    video_path = fixtures.video_path
+    num_frames = fixtures.config["num_frames"] // 2
+
+    def run():
+        streamer = VideoStreamer(video_path, fps=10_000, reconnect_time=0)
+        for _ in range(num_frames):
+            streamer.get_latest_frame()
+        streamer.stop_stream()
+        time.sleep(0.01)
+
+    return run, num_frames
+
+
+@benchmark("lab.VideoStreamer.SyntheticSource")
+def bench_video_streamer_synthetic(fixtures):
+    height, width = fixtures.config["image_size"]
+    detect_gens = fixtures.detect_gens
+    num_frames = fixtures.config["num_frames"]
+
+    def run():
+        source = SyntheticSource(width, height, 10_000, detect_gens)
+        streamer = VideoStreamer(source)
+        for _ in range(num_frames):
+            streamer.get_latest_frame()
+        streamer.stop_stream()
+
+    return run, num_frames
+
+
+@benchmark("lab.DetectGen.gen_xyxy")
+def bench_detect_gen(fixtures):
+    detect_gens = fixtures.detect_gens
+    for detect_gen in detect_gens:
+        detect_gen.start(0)
+    frame_times = [i / 30 for i in range(30)]
+
+    def run():
+        for frame_time in frame_times:
+            for detect_gen in detect_gens:
+                detect_gen.gen_xyxy(frame_time)
+
+    return run, len(detect_gens) * len(frame_times)
+
+
+@benchmark("lab.BatchDetectGen.gen_xyxy")
+def bench_batch_detect_gen(fixtures):
+    batch_detect_gen = BatchDetectGen(fixtures.detect_gens)
+    batch_detect_gen.start(0)
+    frame_times = [i / 30 for i in range(30)]
+
+    def run():
+        for frame_time in frame_times:
+            batch_detect_gen.gen_xyxy(frame_time)
+
+    return run, len(batch_detect_gen) * len(frame_times)
@@ -0,0 +1,502 @@
+from typing import Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+
+def _transform_points(
+    matrices: np.ndarray, points: np.ndarray, point_ids: np.ndarray
+) -> np.ndarray:
+    """
+    Transform points by the affine matrix of their image.
+
+    Args:
+        matrices (np.ndarray): (B, 3, 3) matrices.
+        points (np.ndarray): (N, 2) points (x, y).
+        point_ids (np.ndarray): (N,) index of the matrix of every point.
+
+    Returns:
+        points (np.ndarray): (N, 2) float32 transformed points.
+    """
+    point_matrices = matrices[point_ids]
+    transformed = (
+        np.einsum("nij,nj->ni", point_matrices[:, :2, :2], points)
+        + point_matrices[:, :2, 2]
+    )
+    return transformed.astype(np.float32)
+
+
+def _transform_boxes(
+    matrices: np.ndarray,
+    xyxy: np.ndarray,
+    box_ids: np.ndarray,
+    image_size: Tuple[int, int],
+) -> np.ndarray:
+    """
+    Transform boxes by the affine matrix of their image.
+
+    The new boxes are the bounds of the 4 transformed corners, clipped to the image.
+
+    Returns:
+        xyxy (np.ndarray): (N, 4) float32 transformed boxes.
+    """
+    height, width = image_size
+    corners = xyxy[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 2)
+    corners = _transform_points(matrices, corners, np.repeat(box_ids, 4))
+    corners = corners.reshape(-1, 4, 2)
+    boxes = np.concatenate([corners.min(axis=1), corners.max(axis=1)], axis=1)
+    np.clip(boxes[:, 0::2], 0, width, out=boxes[:, 0::2])
+    np.clip(boxes[:, 1::2], 0, height, out=boxes[:, 1::2])
+    return boxes
+
+
+def _transform_keypoints(
+    matrices: np.ndarray,
+    keypoints: np.ndarray,
+    label_ids: np.ndarray,
+    image_size: Tuple[int, int],
+    flip_indices: Optional[Sequence[int]] = None,
+) -> np.ndarray:
+    """
+    Transform keypoints by the affine matrix of their image.
+
+    Keypoints moved out of the image get the state 0, and the keypoints of
+    flipped labels are reordered by `flip_indices`.
+
+    Returns:
+        keypoints (np.ndarray): (N, K, 3) float32 transformed keypoints.
+    """
+    num_labels, num_keypoints = keypoints.shape[:2]
+    keypoints = keypoints.copy()
+    keypoints[:, :, :2] = _transform_points(
+        matrices,
+        keypoints[:, :, :2].reshape(-1, 2),
+        np.repeat(label_ids, num_keypoints),
+    ).reshape(num_labels, num_keypoints, 2)
+    height, width = image_size
+    outside = (
+        (keypoints[:, :, 0] < 0)
+        | (keypoints[:, :, 0] >= width)
+        | (keypoints[:, :, 1] < 0)
+        | (keypoints[:, :, 1] >= height)
+    )
+    keypoints[:, :, 2][outside] = 0
+    if flip_indices is not None:
+        flipped = np.linalg.det(matrices[label_ids, :2, :2]) < 0
+        keypoints[flipped] = keypoints[flipped][:, flip_indices]
+    return keypoints
+
+
+class AffineTransform:
+    """
+    Geometric operations composed into one affine matrix.
+
+    The image is warped once with `cv2.warpAffine` whatever the number of
+    operations, and boxes, keypoints and points are transformed with the
+    same matrix.
+
+    Attributes:
+        matrix (np.ndarray): (3, 3) matrix from input to output pixel coordinates,
+            pixel i covering [i, i + 1) as for boxes.
+        image_size (tuple(int, int)): (height, width) of the input images.
+        output_size (tuple(int, int)): (height, width) of the output images.
+    """
+
+    def __init__(
+        self,
+        image_size: Tuple[int, int],
+        output_size: Optional[Tuple[int, int]] = None,
+        matrix: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Initialize an AffineTransform object, the identity by default.
+
+        Args:
+            image_size (tuple(int, int)): (height, width) of the input images.
+            output_size (tuple(int, int), optional): (height, width) of the output
+                images. Default is the input size.
+            matrix (np.ndarray, optional): (3, 3) or (2, 3) initial matrix.
+        """
+        self.image_size = tuple(image_size)
+        self.output_size = tuple(output_size or image_size)
+        self.matrix = np.eye(3)
+        if matrix is not None:
+            self.matrix[: len(matrix)] = matrix
+
+    def then(self, matrix: np.ndarray) -> "AffineTransform":
+        """
+        Apply another (3, 3) matrix after the current operations.
+
+        Returns:
+            self (AffineTransform): The transform, for chaining.
+        """
+        self.matrix = matrix @ self.matrix
+        return self
+
+    def rotate(
+        self,
+        degree: float,
+        center: Optional[Tuple[float, float]] = None,
+        scale: float = 1.0,
+    ) -> "AffineTransform":
+        """
+        Rotate counter-clockwise, as `rotate_image` does.
+
+        Args:
+            degree (float): Angle in degrees.
+            center (tuple(float, float), optional): (x, y) center of the rotation.
+                Default is the center of the output image.
+            scale (float): Scale applied with the rotation.
+
+        Returns:
+            self (AffineTransform): The transform, for chaining.
+        """
+        if center is None:
+            center = (self.output_size[1] / 2, self.output_size[0] / 2)
+        matrix = np.eye(3)
+        matrix[:2] = cv2.getRotationMatrix2D(center, degree, scale)
+        return self.then(matrix)
+
+    def scale(
+        self,
+        scale_x: float,
+        scale_y: Optional[float] = None,
+        center: Optional[Tuple[float, float]] = None,
+    ) -> "AffineTransform":
+        """
+        Scale around a center.
+
+        Args:
+            scale_x (float): Horizontal scale factor.
+            scale_y (float, optional): Vertical scale factor. Default is scale_x.
+            center (tuple(float, float), optional): (x, y) fixed point. Default is the
+                top-left corner.
+
+        Returns:
+            self (AffineTransform): The transform, for chaining.
+        """
+        if scale_y is None:
+            scale_y = scale_x
+        center_x, center_y = center or (0, 0)
+        matrix = np.array(
+            [
+                [scale_x, 0, center_x * (1 - scale_x)],
+                [0, scale_y, center_y * (1 - scale_y)],
+                [0, 0, 1],
+            ]
+        )
+        return self.then(matrix)
+
+    def shift(self, dx: float, dy: float) -> "AffineTransform":
+        """
+        Shift by dx and dy pixels, as `shift_image` does.
+
+        Returns:
+            self (AffineTransform): The transform, for chaining.
+        """
+        return self.then(np.array([[1, 0, dx], [0, 1, dy], [0, 0, 1]]))
+
+    def shear(self, degree_x: float, degree_y: float = 0) -> "AffineTransform":
+        """
+        Shear around the center of the output image.
+
+        Args:
+            degree_x (float): Horizontal shear angle in degrees.
+            degree_y (float): Vertical shear angle in degrees.
+
+        Returns:
+            self (AffineTransform): The transform, for chaining.
+        """
+        center_x, center_y = self.output_size[1] / 2, self.output_size[0] / 2
+        shear_x = np.tan(np.radians(degree_x))
+        shear_y = np.tan(np.radians(degree_y))
+        matrix = np.array(
+            [
+                [1, shear_x, -shear_x * center_y],
+                [shear_y, 1, -shear_y * center_x],
+                [0, 0, 1],
+            ]
+        )
+        return self.then(matrix)
+
+    def flip(self) -> "AffineTransform":
+        """
+        Flip horizontally in the output image.
+
+        Returns:
+            self (AffineTransform): The transform, for chaining.
+        """
+        width = self.output_size[1]
+        return self.then(np.array([[-1, 0, width], [0, 1, 0], [0, 0, 1]]))
+
+    def letterbox(self) -> "AffineTransform":
+        """
+        Resize the input image into the output size keeping its aspect ratio, centered.
+
+        Returns:
+            self (AffineTransform): The transform, for chaining.
+        """
+        height, width = self.image_size
+        output_height, output_width = self.output_size
+        ratio = min(output_height / height, output_width / width)
+        self.scale(ratio)
+        return self.shift(
+            (output_width - width * ratio) / 2,
+            (output_height - height * ratio) / 2,
+        )
+
+    @property
+    def is_flipped(self) -> bool:
+        """Whether the transform mirrors the images."""
+        return bool(np.linalg.det(self.matrix[:2, :2]) < 0)
+
+    def apply_to_image(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        border_value: Union[int, Tuple[int, int, int]] = 114,
+    ) -> np.ndarray:
+        """
+        Warp an image with one `cv2.warpAffine`.
+
+        Args:
+            image (np.ndarray): Input image.
+            out (np.ndarray, optional): Contiguous output buffer of the output size,
+                written in place. Default is a new image.
+            border_value (int or tuple): Value of the pixels outside the input image.
+
+        Returns:
+            image (np.ndarray): The warped image, `out` if given.
+        """
+        height, width = self.output_size
+        if isinstance(border_value, (int, float)):
+            border_value = (border_value,) * 3
+        # the matrix maps pixel edges, pixel i covering [i, i + 1) as for boxes,
+        # while warpAffine maps pixel indices: T(-0.5) @ matrix @ T(0.5)
+        matrix = self.matrix[:2].copy()
+        matrix[:, 2] += matrix[:, :2].sum(axis=1) / 2 - 0.5
+        return cv2.warpAffine(
+            image,
+            matrix,
+            (width, height),
+            dst=out,
+            flags=cv2.INTER_LINEAR,
+            borderMode=cv2.BORDER_CONSTANT,
+            borderValue=border_value,
+        )
+
+    def apply_to_points(self, points: np.ndarray) -> np.ndarray:
+        """
+        Transform points.
+
+        Args:
+            points (np.ndarray): (N, 2) points (x, y) in pixels.
+
+        Returns:
+            points (np.ndarray): (N, 2) float32 transformed points.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return _transform_points(
+            self.matrix[None], points, np.zeros(len(points), dtype=np.int64)
+        )
+
+    def apply_to_boxes(self, xyxy: np.ndarray) -> np.ndarray:
+        """
+        Transform boxes, the new boxes bound the transformed corners.
+
+        Args:
+            xyxy (np.ndarray): (N, 4) boxes in pixels.
+
+        Returns:
+            xyxy (np.ndarray): (N, 4) float32 boxes clipped to the output image,
+                empty boxes have no area.
+        """
+        xyxy = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+        return _transform_boxes(
+            self.matrix[None],
+            xyxy,
+            np.zeros(len(xyxy), dtype=np.int64),
+            self.output_size,
+        )
+
+    def apply_to_keypoints(
+        self,
+        keypoints: np.ndarray,
+        flip_indices: Optional[Sequence[int]] = None,
+    ) -> np.ndarray:
+        """
+        Transform keypoints, those moved out of the output image get the state 0.
+
+        Args:
+            keypoints (np.ndarray): (N, K, 3) keypoints (x, y, state) in pixels.
+            flip_indices (list(int), optional): Mirrored keypoint of each keypoint,
+                e.g. `COCO_FLIP_INDICES`, to reorder the keypoints of a flip.
+
+        Returns:
+            keypoints (np.ndarray): (N, K, 3) float32 keypoints.
+        """
+        return _transform_keypoints(
+            self.matrix[None],
+            np.asarray(keypoints, dtype=np.float32),
+            np.zeros(len(keypoints), dtype=np.int64),
+            self.output_size,
+            flip_indices,
+        )
+
+
+class RandomAffine:
+    """
+    Random affine augmentation of batches of images and their labels.
+
+    A random transform is drawn for every image: flip, rotation and
+    scale, shear, then translation, all composed into one matrix. Each
+    image is warped once into the output buffer, and the labels of the
+    whole batch are transformed at once.
+    """
+
+    def __init__(
+        self,
+        degrees: float = 0.0,
+        translate: float = 0.1,
+        scale: Tuple[float, float] = (0.5, 1.5),
+        shear: float = 0.0,
+        flip_probability: float = 0.5,
+        output_size: Optional[Tuple[int, int]] = None,
+        border_value: int = 114,
+        flip_indices: Optional[Sequence[int]] = None,
+        min_box_size: float = 2.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize a RandomAffine object.
+
+        Args:
+            degrees (float): Maximum rotation in degrees, in both directions.
+            translate (float): Maximum translation, relative to the output size.
+            scale (tuple(float, float)): Range of the scale factor.
+            shear (float): Maximum shear in degrees, in both directions.
+            flip_probability (float): Probability of a horizontal flip.
+            output_size (tuple(int, int), optional): (height, width) of the output
+                images. Default is the input size.
+            border_value (int): Value of the pixels outside the input images.
+            flip_indices (list(int), optional): Mirrored keypoint of each keypoint,
+                e.g. `COCO_FLIP_INDICES`, to keep the order of flipped keypoints.
+            min_box_size (float): Labels whose transformed box is narrower or shorter
+                than this, in pixels, are removed.
+            seed (int, optional): Seed of the random generator.
+        """
+        self.degrees = degrees
+        self.translate = translate
+        self.scale = scale
+        self.shear = shear
+        self.flip_probability = flip_probability
+        self.output_size = tuple(output_size) if output_size else None
+        self.border_value = border_value
+        self.flip_indices = flip_indices
+        self.min_box_size = min_box_size
+        self.rng = np.random.default_rng(seed)
+
+    def sample(self, image_size: Tuple[int, int]) -> AffineTransform:
+        """
+        Draw a random transform.
+
+        Args:
+            image_size (tuple(int, int)): (height, width) of the input image.
+
+        Returns:
+            transform (AffineTransform): The transform.
+        """
+        height, width = image_size
+        output_size = self.output_size or (height, width)
+        transform = AffineTransform(image_size, output_size)
+        # from the center of the input to the center of the output
+        transform.shift(
+            (output_size[1] - width) / 2, (output_size[0] - height) / 2
+        )
+        if self.rng.random() < self.flip_probability:
+            transform.flip()
+        transform.rotate(
+            self.rng.uniform(-self.degrees, self.degrees),
+            scale=self.rng.uniform(*self.scale),
+        )
+        if self.shear:
+            transform.shear(
+                self.rng.uniform(-self.shear, self.shear),
+                self.rng.uniform(-self.shear, self.shear),
+            )
+        max_shifts = self.translate * np.array(output_size[::-1])
+        return transform.shift(*self.rng.uniform(-max_shifts, max_shifts))
+
+    def __call__(self, batch: dict, out: Optional[np.ndarray] = None) -> dict:
+        """
+        Augment a batch of `YoloLoader`.
+
+        Args:
+            batch (dict): Batch with "images", "label_batch_ids", "classes" and "xyxy",
+                and "keypoints" or "points" and "point_offsets".
+            out (np.ndarray, optional): (B, H, W, 3) uint8 output buffer reused from
+                batch to batch. Default is a new array.
+
+        Returns:
+            batch (dict): The augmented batch, with the "matrices" (B, 3, 3) of the
+                transforms. Labels with too small boxes are removed.
+        """
+        images = batch["images"]
+        num_images, height, width = images.shape[:3]
+        output_size = self.output_size or (height, width)
+        if out is None:
+            out = np.empty((num_images, *output_size, 3), dtype=np.uint8)
+        if out.shape != (num_images, *output_size, 3):
+            raise ValueError("The output buffer does not match the batch.")
+
+        matrices = np.empty((num_images, 3, 3))
+        for index, image in enumerate(images):
+            transform = self.sample((height, width))
+            transform.apply_to_image(image, out[index], self.border_value)
+            matrices[index] = transform.matrix
+
+        label_ids = batch["label_batch_ids"]
+        augmented = dict(batch, images=out, matrices=matrices)
+        if "points" in batch:
+            # polygons are bounded by their transformed points
+            point_counts = np.diff(batch["point_offsets"])
+            points = _transform_points(
+                matrices, batch["points"], np.repeat(label_ids, point_counts)
+            )
+            np.clip(points[:, 0], 0, output_size[1], out=points[:, 0])
+            np.clip(points[:, 1], 0, output_size[0], out=points[:, 1])
+            xyxy = np.zeros((len(label_ids), 4), dtype=np.float32)
+            if len(label_ids):
+                starts = batch["point_offsets"][:-1]
+                xyxy[:, :2] = np.minimum.reduceat(points, starts)
+                xyxy[:, 2:] = np.maximum.reduceat(points, starts)
+            augmented["points"] = points
+        else:
+            xyxy = _transform_boxes(
+                matrices, batch["xyxy"], label_ids, output_size
+            )
+        if "keypoints" in batch:
+            augmented["keypoints"] = _transform_keypoints(
+                matrices,
+                batch["keypoints"],
+                label_ids,
+                output_size,
+                self.flip_indices,
+            )
+        augmented["xyxy"] = xyxy
+
+        sizes = xyxy[:, 2:] - xyxy[:, :2]
+        keep = np.all(sizes >= self.min_box_size, axis=1)
+        if not keep.all():
+            for key in ["label_batch_ids", "classes", "xyxy", "keypoints"]:
+                if key in augmented:
+                    augmented[key] = augmented[key][keep]
+            if "points" in augmented:
+                point_counts = np.diff(batch["point_offsets"])
+                augmented["points"] = augmented["points"][
+                    np.repeat(keep, point_counts)
+                ]
+                point_offsets = np.zeros(keep.sum() + 1, dtype=np.int64)
+                np.cumsum(point_counts[keep], out=point_offsets[1:])
+                augmented["point_offsets"] = point_offsets
+        return augmented
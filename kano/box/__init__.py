@@ -0,0 +1,8 @@
+from kano.box.array import BoxArray
+from kano.box.convert import (
+    BOX_FORMAT_ALIASES,
+    BOX_FORMATS,
+    clip_boxes,
+    convert_boxes,
+    parse_box_format,
+)
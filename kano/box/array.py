@@ -0,0 +1,215 @@
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from kano.box.convert import clip_boxes, convert_boxes, parse_box_format
+
+
+class BoxArray:
+    """
+    Boxes stored in one contiguous (N, 4) float32 array of pixel xyxy coordinates, with class and score columns.
+
+    Slicing with integers ranges returns views sharing the same memory.
+
+    Attributes:
+        data (np.ndarray): (N, 4) float32 xyxy boxes in pixels.
+        classes (np.ndarray): (N,) int32 class ids, -1 if unknown.
+        scores (np.ndarray): (N,) float32 scores, 1 if unknown.
+        image_size (tuple(int, int) or None): (height, width) of the image.
+    """
+
+    def __init__(
+        self,
+        boxes: Union[np.ndarray, Sequence[Sequence[float]], None] = None,
+        box_format: str = "xyxy",
+        classes: Optional[Union[np.ndarray, Sequence[int]]] = None,
+        scores: Optional[Union[np.ndarray, Sequence[float]]] = None,
+        image_size: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        """
+        Initialize a BoxArray object.
+
+        Pixel xyxy float32 input is used without copy, other formats and
+        dtypes are converted into a new array.
+
+        Args:
+            boxes (np.ndarray or list): (N, 4) boxes in the given format.
+            box_format (str): Format of the boxes: "xyxy", "xywh" (alias "cxcywh"),
+                "ltwh", or the scaled "s_xyxy", "s_xywh", "s_ltwh".
+            classes (np.ndarray or list, optional): (N,) class ids.
+            scores (np.ndarray or list, optional): (N,) confidence scores.
+            image_size (tuple(int, int), optional): (height, width) of the image,
+                required for scaled formats.
+        """
+        if boxes is None:
+            boxes = np.empty((0, 4), dtype=np.float32)
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+
+        if parse_box_format(box_format) != ("xyxy", False):
+            boxes = convert_boxes(
+                boxes,
+                box_format,
+                image_size=image_size,
+                out=np.empty_like(boxes),
+            )
+
+        self.data = boxes
+        self.image_size = image_size
+
+        if classes is None:
+            self.classes = np.full(len(boxes), -1, dtype=np.int32)
+        else:
+            self.classes = np.asarray(classes, dtype=np.int32).reshape(-1)
+        if scores is None:
+            self.scores = np.ones(len(boxes), dtype=np.float32)
+        else:
+            self.scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+
+        if not len(self.classes) == len(self.scores) == len(self.data):
+            raise ValueError(
+                "Boxes, classes and scores must have the same length."
+            )
+
+    def to_format(self, box_format: str = "xyxy") -> np.ndarray:
+        """
+        Get the boxes in another format.
+
+        Pixel "xyxy" returns the underlying array without copy, other formats
+        allocate a new array.
+
+        Args:
+            box_format (str): Target format, see `BoxArray.__init__`.
+
+        Returns:
+            boxes (np.ndarray): (N, 4) float32 boxes.
+        """
+        if parse_box_format(box_format) == ("xyxy", False):
+            return self.data
+        return convert_boxes(
+            self.data,
+            "xyxy",
+            box_format,
+            image_size=self.image_size,
+            out=np.empty_like(self.data),
+        )
+
+    @property
+    def xyxy(self) -> np.ndarray:
+        return self.data
+
+    @property
+    def xywh(self) -> np.ndarray:
+        return self.to_format("xywh")
+
+    @property
+    def ltwh(self) -> np.ndarray:
+        return self.to_format("ltwh")
+
+    @property
+    def widths(self) -> np.ndarray:
+        return self.data[:, 2] - self.data[:, 0]
+
+    @property
+    def heights(self) -> np.ndarray:
+        return self.data[:, 3] - self.data[:, 1]
+
+    def area(self) -> np.ndarray:
+        """
+        Get the area of every box.
+
+        Returns:
+            areas (np.ndarray): (N,) float32 areas, 0 for degenerated boxes.
+        """
+        return np.clip(self.widths, 0, None) * np.clip(self.heights, 0, None)
+
+    def clip(self, image_size: Optional[Tuple[int, int]] = None) -> "BoxArray":
+        """
+        Clip the boxes to the image bounds in place.
+
+        Args:
+            image_size (tuple(int, int), optional): (height, width) to clip to.
+                Default is the image size of the array.
+
+        Returns:
+            self (BoxArray): The clipped array, for chaining.
+        """
+        if image_size is None:
+            image_size = self.image_size
+        if image_size is None:
+            raise ValueError("image_size is required to clip boxes.")
+        clip_boxes(self.data, image_size, out=self.data)
+        return self
+
+    def scale(
+        self, scale_x: float, scale_y: Optional[float] = None
+    ) -> "BoxArray":
+        """
+        Scale the boxes and the image size in place, e.g. after resizing the image.
+
+        Args:
+            scale_x (float): Horizontal scale factor.
+            scale_y (float, optional): Vertical scale factor. Default is scale_x.
+
+        Returns:
+            self (BoxArray): The scaled array, for chaining.
+        """
+        if scale_y is None:
+            scale_y = scale_x
+        self.data *= np.array([scale_x, scale_y, scale_x, scale_y], np.float32)
+        if self.image_size is not None:
+            height, width = self.image_size
+            self.image_size = (
+                int(round(height * scale_y)),
+                int(round(width * scale_x)),
+            )
+        return self
+
+    @classmethod
+    def concatenate(cls, box_arrays: List["BoxArray"]) -> "BoxArray":
+        """
+        Concatenate several arrays of boxes from the same image.
+
+        Args:
+            box_arrays (list(BoxArray)): Arrays to concatenate.
+
+        Returns:
+            box_array (BoxArray): The concatenated array.
+        """
+        image_size = box_arrays[0].image_size if box_arrays else None
+        return cls(
+            np.concatenate([array.data for array in box_arrays]),
+            classes=np.concatenate([array.classes for array in box_arrays]),
+            scores=np.concatenate([array.scores for array in box_arrays]),
+            image_size=image_size,
+        )
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, index) -> "BoxArray":
+        if isinstance(index, (int, np.integer)):
+            # a one-box view, out of range indices raise as for sequences
+            if not -len(self) <= index < len(self):
+                raise IndexError(
+                    f"Index {index} is out of range for {len(self)} boxes."
+                )
+            index = int(index) % len(self)
+            index = slice(index, index + 1)
+        return BoxArray(
+            self.data[index],
+            classes=self.classes[index],
+            scores=self.scores[index],
+            image_size=self.image_size,
+        )
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        if dtype is None or np.dtype(dtype) == self.data.dtype:
+            return self.data.copy() if copy else self.data
+        if copy is False:
+            raise ValueError(
+                f"Boxes cannot be converted to {np.dtype(dtype)} without copy."
+            )
+        return self.data.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"BoxArray(num_boxes={len(self)}, image_size={self.image_size})"
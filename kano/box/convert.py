@@ -0,0 +1,130 @@
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+# "xywh" is (x_center, y_center, width, height) as in YOLO labels and
+# xywh2xyxy, "ltwh" is (left, top, width, height) as in COCO annotations.
+# A "s_" prefix means coordinates scaled by the image size to [0, 1].
+BOX_FORMATS = ["xyxy", "xywh", "ltwh"]
+BOX_FORMAT_ALIASES = {"cxcywh": "xywh"}
+
+
+@lru_cache(maxsize=None)
+def parse_box_format(box_format: str) -> Tuple[str, bool]:
+    """
+    Split a box format into its coordinates layout and whether it is scaled.
+
+    Args:
+        box_format (str): One of BOX_FORMATS or BOX_FORMAT_ALIASES, optionally prefixed with "s_".
+
+    Returns:
+        tuple: (layout, scaled), e.g. ("xywh", True) for "s_xywh".
+    """
+    scaled = box_format.startswith("s_")
+    layout = box_format[2:] if scaled else box_format
+    layout = BOX_FORMAT_ALIASES.get(layout, layout)
+    if layout not in BOX_FORMATS:
+        raise ValueError(
+            f"Invalid bounding box type {box_format}. Please provide one of:",
+            BOX_FORMATS,
+        )
+    return layout, scaled
+
+
+def _get_scale(image_size: Optional[Tuple[int, int]]) -> np.ndarray:
+    if image_size is None:
+        raise ValueError("image_size is required for scaled boxes.")
+    height, width = image_size
+    return np.array([width, height, width, height], dtype=np.float64)
+
+
+def clip_boxes(
+    boxes: np.ndarray,
+    image_size: Tuple[int, int],
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Clip pixel xyxy boxes to the image bounds.
+
+    Args:
+        boxes (np.ndarray): (N, 4) xyxy boxes in pixels.
+        image_size (tuple(int, int)): (height, width) of the image.
+        out (np.ndarray, optional): (N, 4) output array, can be `boxes` itself.
+
+    Returns:
+        boxes (np.ndarray): The clipped boxes.
+    """
+    height, width = image_size
+    if out is None:
+        out = np.array(boxes, dtype=np.float64)
+    elif out is not boxes:
+        out[...] = boxes
+    np.clip(out[:, 0::2], 0, width, out=out[:, 0::2])
+    np.clip(out[:, 1::2], 0, height, out=out[:, 1::2])
+    return out
+
+
+def convert_boxes(
+    boxes: np.ndarray,
+    src_format: str,
+    dst_format: str = "xyxy",
+    image_size: Optional[Tuple[int, int]] = None,
+    out: Optional[np.ndarray] = None,
+    clip: bool = False,
+) -> np.ndarray:
+    """
+    Convert boxes between formats in one vectorized pass.
+
+    Formats are "xyxy", "xywh" (center, alias "cxcywh"), "ltwh" (top-left),
+    and their scaled versions "s_xyxy", "s_xywh", "s_ltwh".
+
+    Args:
+        boxes (np.ndarray or list): (N, 4) boxes in `src_format`.
+        src_format (str): Format of the input boxes.
+        dst_format (str): Format of the output boxes. Default is "xyxy".
+        image_size (tuple(int, int), optional): (height, width) of the image,
+            required for scaled formats and clipping.
+        out (np.ndarray, optional): (N, 4) float output array, can be `boxes`
+            itself to convert in place. Default is a new float64 array.
+        clip (bool): Whether to clip the boxes to the image bounds.
+
+    Returns:
+        boxes (np.ndarray): (N, 4) boxes in `dst_format`.
+    """
+    src_layout, src_scaled = parse_box_format(src_format)
+    dst_layout, dst_scaled = parse_box_format(dst_format)
+
+    if out is None:
+        out = np.array(boxes, dtype=np.float64).reshape(-1, 4)
+    elif out is not boxes:
+        out[...] = boxes
+
+    if src_layout == dst_layout and src_scaled == dst_scaled and not clip:
+        return out
+
+    if src_scaled:
+        out *= _get_scale(image_size)
+    if src_layout == "xywh":
+        half_sizes = out[:, 2:] / 2
+        out[:, 2:] = out[:, :2] + half_sizes
+        out[:, :2] -= half_sizes
+    elif src_layout == "ltwh":
+        out[:, 2:] += out[:, :2]
+
+    if clip:
+        if image_size is None:
+            raise ValueError("image_size is required to clip boxes.")
+        clip_boxes(out, image_size, out=out)
+
+    if dst_layout == "xywh":
+        sizes = out[:, 2:] - out[:, :2]
+        out[:, :2] += out[:, 2:]
+        out[:, :2] /= 2
+        out[:, 2:] = sizes
+    elif dst_layout == "ltwh":
+        out[:, 2:] -= out[:, :2]
+    if dst_scaled:
+        out /= _get_scale(image_size)
+
+    return out
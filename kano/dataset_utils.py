@@ -1,50 +1,234 @@
+import hashlib
+import json
+import math
+import os
 import random
 import shutil
+import tempfile
 from pathlib import Path
 
 import cv2
 import numpy as np
 import yaml
 
-from kano.detect_utils import draw_bbox, xywh2xyxy
+from kano.box import BoxArray, convert_boxes
+from kano.detect_utils import draw_bbox
 from kano.file_utils import create_folder, list_files
-from kano.image import concatenate_images, show_image
-from kano.pose_utils import draw_skeleton
+from kano.image import (
+    concatenate_images,
+    read_image,
+    read_thumbnail,
+    show_image,
+)
+from kano.pack_utils import (
+    LabelStore,
+    PackedSubset,
+    is_packed_dataset,
+    read_label_rows,
+    split_polygon_rows,
+)
+from kano.pose_utils import (
+    BOX_AREA_RATIO,
+    PoseEvaluator,
+    draw_skeletons,
+    keypoints_to_array,
+)
+from kano.segment_utils import RLEMasks, draw_polygons
+
+TASKS = ["detect", "pose", "segment"]
+SPLIT_SUBSETS = ["train", "valid", "test"]
+MERGE_JOURNAL_NAME = "merge_journal.jsonl"
+
+
+def read_label_array(label_path):
+    """
+    Read a YOLO label file into one array, without parsing each line in Python.
+
+    Args:
+        label_path (str): Path to the label file.
+
+    Returns:
+        labels (np.ndarray): (N, C) float array with one row per label, (0, 0) for
+            an empty or missing file.
+    """
+    if not Path(label_path).exists():
+        return np.zeros((0, 0))
+    with open(label_path, "r") as file:
+        lines = [line for line in file.read().splitlines() if line.strip()]
+    if not lines:
+        return np.zeros((0, 0))
+    values = np.array(" ".join(lines).split(), dtype=np.float64)
+    if len(values) % len(lines):
+        raise ValueError(f"Labels of {label_path} have different lengths.")
+    return values.reshape(len(lines), -1)
+
+
+def read_polygon_labels(label_path):
+    """
+    Read a YOLO segmentation label file into flat arrays.
+
+    The points of all the polygons are kept in one float32 buffer, the
+    polygon i being `points[offsets[i]:offsets[i + 1]]`.
+
+    Args:
+        label_path (str): Path to the label file, one "class x1 y1 x2 y2 ..." line per polygon.
+
+    Returns:
+        classes (np.ndarray): (N,) class ids.
+        points (np.ndarray): (V, 2) float32 scaled points (x, y) of all the polygons.
+        offsets (np.ndarray): (N + 1,) offsets of the points of each polygon.
+    """
+    try:
+        return split_polygon_rows(*read_label_rows(label_path))
+    except ValueError:
+        raise ValueError(
+            f"Labels of {label_path} must be a class and (x, y) points."
+        )
+
+
+def copy_label_file(source_label_path, target_label_path, reindex_dict=None):
+    """
+    Copy a label file, changing its class ids.
+
+    Args:
+        source_label_path (str): Path to the label file.
+        target_label_path (str): Path to the copy.
+        reindex_dict (dict, optional): Dictionary mapping original class IDs to new
+            class IDs, labels of the other classes or mapped to None are removed.
+            Default copies the file as is.
+    """
+    if not reindex_dict:
+        shutil.copyfile(str(source_label_path), str(target_label_path))
+        return
+
+    with open(str(source_label_path), "r") as f:
+        lines = f.readlines()
+
+    new_lines = list()
+    for line in lines:
+        # only the class id is parsed, long polygons are kept as is
+        parts = line.split(maxsplit=1)
+        if not parts:
+            continue
+        class_id = int(parts[0])
+        if class_id in reindex_dict:
+            new_class_id = reindex_dict[class_id]
+            if new_class_id is not None:
+                values = parts[1].strip() if len(parts) > 1 else ""
+                new_lines.append(f"{new_class_id} {values}\n")
+
+    with open(str(target_label_path), "w") as f:
+        f.writelines(new_lines)
+
+
+def get_split_bounds(ratios):
+    """
+    Get the upper bounds of the train and validation subsets in [0, 1].
 
-TASKS = ["detect", "pose"]
+    Args:
+        ratios (list[float]): Ratios of the train subset, or of the train and
+            validation subsets, the rest going to the last subset.
+
+    Returns:
+        bounds (np.ndarray): (2,) upper bounds of the train and validation subsets.
+    """
+    if len(ratios) not in [1, 2]:
+        raise ValueError("Please provide 1 or 2 ratios.")
+    if min(ratios) < 0 or sum(ratios) > 1:
+        raise ValueError("Ratios must be positive and sum to at most 1.")
+    if len(ratios) == 1:
+        return np.array([ratios[0], 1.0])
+    return np.cumsum(ratios)
+
+
+def get_split_position(key, seed=0):
+    """
+    Get the position of an image in [0, 1) from a hash of its key.
+
+    The position only depends on the key and the seed, so an image stays in
+    its subset whatever the other images of the dataset.
+
+    Args:
+        key (str): Stable key of the image, e.g. its file name.
+        seed (int or str): Seed of the split.
+
+    Returns:
+        position (float): Position in [0, 1).
+    """
+    digest = hashlib.blake2b(f"{seed}:{key}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64
+
+
+def get_split_subset(key, ratios=[0.9], seed=0):
+    """
+    Get the subset of an image from a hash of its key, in O(1).
+
+    Args:
+        key (str): Stable key of the image, e.g. its file name.
+        ratios (list[float]): Ratios for train, validation, and test subsets.
+        seed (int or str): Seed of the split.
+
+    Returns:
+        subset (str): "train", "valid" or "test".
+    """
+    bounds = get_split_bounds(ratios)
+    position = get_split_position(key, seed)
+    return SPLIT_SUBSETS[int(np.searchsorted(bounds, position, side="right"))]
 
 
 class YoloImage:
     """
-    Represents an image annotated in YOLO format, which includes bounding boxes or skeletons.
+    Represents an image annotated in YOLO format, which includes bounding boxes, skeletons or polygons.
 
     Attributes:
-        image (numpy.ndarray): The original image.
+        image (numpy.ndarray): The original image, or its reduced version if a
+            max_size is given. Labels in pixels are in the coordinates of this image.
         image_path (str): Path to the image file.
         label_path (str): Path to the label file corresponding to the image.
-        task (str): Task type, either "detect" or "pose".
+        task (str): Task type, either "detect", "pose" or "segment".
         labels (list): List of dictionaries containing label information.
         labels_dict (dict): Dictionary mapping class IDs to class names.
+        polygon_points (np.ndarray): (V, 2) float32 scaled points of all the polygons
+            for segmentation tasks, None otherwise.
+        polygon_offsets (np.ndarray): (N + 1,) offsets of the points of each polygon
+            for segmentation tasks, None otherwise.
     """
 
-    def __init__(self, image_path, labels_dict=None, task="detect"):
+    def __init__(
+        self,
+        image_path,
+        labels_dict=None,
+        task="detect",
+        max_size=None,
+        thumbnail_dir=None,
+    ):
         """
         Initialize a YoloImage object.
 
         Args:
             image_path (str): Path to the image file.
             labels_dict (dict): Dictionary mapping class IDs to class names.
-            task (str): Task type. Possible values: "detect", "pose".
+            task (str): Task type. Possible values: "detect", "pose", "segment".
+            max_size (int, optional): Decode the image at a reduced resolution with its
+                longer side at most max_size pixels, e.g. for previews.
+            thumbnail_dir (str, optional): Folder caching the reduced images, see
+                `read_thumbnail`. Only used with a max_size.
         """
-        self.image = cv2.imread(image_path)
+        if max_size is None:
+            self.image = read_image(image_path)
+        else:
+            self.image = read_thumbnail(image_path, max_size, thumbnail_dir)
         self.image_path = image_path
         if task not in TASKS:
             raise ValueError("Unexpected task. Please provide one of:", TASKS)
         self.task = task
+        self.polygon_points = None
+        self.polygon_offsets = None
         self.labels = self.get_labels()
         self.labels_dict = labels_dict
 
-    def get_label_path(self, image_path):
+    @staticmethod
+    def get_label_path(image_path):
         """
         Get the path to the label file corresponding to the given image.
 
@@ -71,46 +255,139 @@ class YoloImage:
             - s_xywh: scaled xywh box
             - xyxy: xyxy box
             - keypoints: list of dict(xy, state) for pose estimation tasks
+            - polygon: (P, 2) scaled points (x, y) for segmentation tasks, a view
+              of `polygon_points`
 
         Returns:
             labels (list): List of dictionaries, each containing label information.
         """
         self.label_path = self.get_label_path(self.image_path)
+        if self.task == "segment":
+            return self._get_segment_labels()
+
         labels = list()
         image_height, image_width = self.image.shape[:2]
         with open(self.label_path, "r") as file:
-            for line in file:
-                line = line.strip().split()
-                label = {
-                    "class": int(line[0]),
-                    "s_xywh": np.array([float(x) for x in line[1:5]]),
-                }
-                xywh = label["s_xywh"].copy() * np.array(
-                    [image_width, image_height, image_width, image_height]
-                )
-                label["xyxy"] = xywh2xyxy(xywh)
-
-                if self.task == "pose":
-                    keypoints = list()
-                    for start_id in range(5, len(line), 3):
-                        # "state" in [0, 1, 2] with:
-                        # - 0: deleted
-                        # - 1: occluded
-                        # - 2: visible
-                        x = int(float(line[start_id]) * image_width)
-                        y = int(float(line[start_id + 1]) * image_height)
-                        state = int(float(line[start_id + 2]))
-                        keypoints.append(
-                            {
-                                "xy": (x, y),
-                                "state": state,
-                            }
-                        )
-                    label["keypoints"] = keypoints
+            lines = [line.strip().split() for line in file]
+        lines = [line for line in lines if line]
+
+        # convert the boxes of all labels at once
+        s_xywh = np.array(
+            [[float(x) for x in line[1:5]] for line in lines]
+        ).reshape(-1, 4)
+        xyxy = convert_boxes(
+            s_xywh, "s_xywh", "xyxy", image_size=(image_height, image_width)
+        ).astype(np.int64)
+
+        for line, box_s_xywh, box_xyxy in zip(lines, s_xywh, xyxy):
+            label = {
+                "class": int(line[0]),
+                "s_xywh": box_s_xywh,
+                "xyxy": tuple(box_xyxy.tolist()),
+            }
+
+            if self.task == "pose":
+                keypoints = list()
+                for start_id in range(5, len(line), 3):
+                    # "state" in [0, 1, 2] with:
+                    # - 0: deleted
+                    # - 1: occluded
+                    # - 2: visible
+                    x = int(float(line[start_id]) * image_width)
+                    y = int(float(line[start_id + 1]) * image_height)
+                    state = int(float(line[start_id + 2]))
+                    keypoints.append(
+                        {
+                            "xy": (x, y),
+                            "state": state,
+                        }
+                    )
+                label["keypoints"] = keypoints
 
-                labels.append(label)
+            labels.append(label)
         return labels
 
+    def _get_segment_labels(self):
+        image_size = self.image.shape[:2]
+        classes, points, offsets = read_polygon_labels(self.label_path)
+        self.polygon_points = points
+        self.polygon_offsets = offsets
+
+        # the boxes are the bounds of the polygons
+        s_xyxy = np.zeros((len(classes), 4))
+        if len(classes):
+            s_xyxy[:, :2] = np.minimum.reduceat(points, offsets[:-1])
+            s_xyxy[:, 2:] = np.maximum.reduceat(points, offsets[:-1])
+        s_xywh = convert_boxes(s_xyxy, "xyxy", "xywh")
+        xyxy = convert_boxes(
+            s_xyxy, "s_xyxy", "xyxy", image_size=image_size
+        ).astype(np.int64)
+
+        return [
+            {
+                "class": int(class_id),
+                "s_xywh": box_s_xywh,
+                "xyxy": tuple(box_xyxy.tolist()),
+                "polygon": points[start:end],
+            }
+            for class_id, box_s_xywh, box_xyxy, start, end in zip(
+                classes, s_xywh, xyxy, offsets[:-1], offsets[1:]
+            )
+        ]
+
+    def get_box_array(self):
+        """
+        Get the bounding boxes of the labels as one BoxArray.
+
+        Returns:
+            box_array (BoxArray): Boxes in pixels with the classes of the labels.
+        """
+        s_xywh = np.array([label["s_xywh"] for label in self.labels])
+        classes = [label["class"] for label in self.labels]
+        return BoxArray(
+            s_xywh, "s_xywh", classes, image_size=self.image.shape[:2]
+        )
+
+    def get_keypoints(self):
+        """
+        Get the keypoints of all the labels as one array.
+
+        Returns:
+            keypoints (np.ndarray): (P, K, 3) keypoints (x, y, state) in pixels of the P labels.
+        """
+        keypoints = [
+            keypoints_to_array(label["keypoints"]) for label in self.labels
+        ]
+        if not keypoints:
+            return np.zeros((0, 0, 3), dtype=np.int64)
+        return np.stack(keypoints)
+
+    def get_polygons(self):
+        """
+        Get the polygons of the labels in pixels.
+
+        Returns:
+            polygons (list(np.ndarray)): (P, 2) float32 points (x, y) of each label.
+        """
+        if self.polygon_points is None:
+            raise ValueError("Polygons need a YoloImage of task 'segment'.")
+        image_height, image_width = self.image.shape[:2]
+        points = self.polygon_points * np.array(
+            [image_width, image_height], dtype=np.float32
+        )
+        return np.split(points, self.polygon_offsets[1:-1])
+
+    def get_masks(self):
+        """
+        Rasterize the polygons of the labels into run-length encoded masks.
+
+        Returns:
+            masks (RLEMasks): One mask per label.
+        """
+        return RLEMasks.from_polygons(
+            self.get_polygons(), self.image.shape[:2]
+        )
+
     def show_image(self, figsize=(10, 10)):
         """
         Display the original image.
@@ -122,33 +399,54 @@ class YoloImage:
 
     def get_annotated_image(self):
         """
-        Get the annotated image with bounding boxes or skeletons drawn.
+        Get the annotated image with bounding boxes, skeletons or polygons drawn.
 
         Returns:
             annotated_image (np.ndarray): Annotated image.
         """
-        annotated_image = self.image.copy()
-        for label in self.labels:
-
-            if self.task == "pose":
-                annotated_image = draw_skeleton(
-                    annotated_image, label["keypoints"]
+        annotated_image = self.image
+        s_xywh = np.array([label["s_xywh"] for label in self.labels])
+        classes = [label["class"] for label in self.labels]
+        if self.labels_dict is not None:
+            classes = [self.labels_dict[cls] for cls in classes]
+
+        if self.task == "pose":
+            # one copy for all the persons, the box of each person is drawn
+            # over its own skeleton only
+            annotated_image = annotated_image.copy()
+            keypoints = self.get_keypoints()
+            for i, cls in enumerate(classes):
+                draw_skeletons(
+                    annotated_image, keypoints[i : i + 1], copy=False
                 )
+                draw_bbox(
+                    annotated_image,
+                    s_xywh[i],
+                    "s_xywh",
+                    (0, 255, 0),
+                    str(cls),
+                    copy=False,
+                )
+            return annotated_image
 
-            cls = label["class"]
-            if self.labels_dict is not None:
-                cls = self.labels_dict[cls]
-            bbox = label["s_xywh"]
-
-            annotated_image = draw_bbox(
-                annotated_image, bbox, "s_xywh", (0, 255, 0), str(cls)
+        is_copied = False
+        if self.task == "segment" and self.labels:
+            annotated_image = draw_polygons(
+                annotated_image, self.get_polygons()
             )
-
-        return annotated_image
+            is_copied = True
+        return draw_bbox(
+            annotated_image,
+            s_xywh,
+            "s_xywh",
+            (0, 255, 0),
+            [str(cls) for cls in classes],
+            copy=not is_copied,
+        )
 
     def show_annotated_image(self, figsize=(10, 10)):
         """
-        Display the annotated image with bounding boxes or skeletons drawn.
+        Display the annotated image with bounding boxes, skeletons or polygons drawn.
 
         Returns:
             figsize (tuple(int, int)): Size of the figure (width, height) in inches.
@@ -196,36 +494,23 @@ class YoloImage:
             )
 
         shutil.copyfile(self.image_path, str(target_image_path))
-        shutil.copyfile(self.label_path, str(target_label_path))
-
-        if reindex_dict:
-            with open(str(source_label_path), "r") as f:
-                lines = f.readlines()
-
-            new_lines = list()
-            for line in lines:
-                class_id = int(line.split()[0])
-                if class_id in reindex_dict:
-                    new_class_id = reindex_dict[class_id]
-                    if new_class_id is not None:
-                        new_line = (
-                            f"{new_class_id} {' '.join(line.split()[1:])}\n"
-                        )
-                        new_lines.append(new_line)
-
-            with open(str(target_label_path), "w") as f:
-                f.writelines(new_lines)
+        copy_label_file(source_label_path, target_label_path, reindex_dict)
 
 
 class YoloDataset:
     """
     Dataset class with Yolo format.
 
+    A dataset packed by `kano.pack_utils.pack_dataset` is opened the same way:
+    summaries, label iteration, image iteration and evaluation read its shards,
+    the methods writing new datasets need the folder layout.
+
     Attributes:
         dataset_path (Path): path to the dataset folder
         name (str): name of the dataset (folder name)
         classes (list(str)): names of classes in the dataset
-        task (str): dataset usecase, must be a task in ["detect", "pose"]
+        task (str): dataset usecase, must be a task in ["detect", "pose", "segment"]
+        packed (bool): whether the dataset is packed into shards
     """
 
     def __init__(self, dataset_path, task="detect"):
@@ -235,7 +520,7 @@ class YoloDataset:
         Returns:
             dataset_path (str): Path to the dataset folder.
             task (str): . Dataset use case. Default is "detect".
-                        Possible values: "detect", "pose".
+                        Possible values: "detect", "pose", "segment".
         """
         self.dataset_path = Path(dataset_path)
         self.name = self.dataset_path.name
@@ -246,6 +531,8 @@ class YoloDataset:
         if task not in TASKS:
             raise ValueError("Unexpected task. Please provide one of:", TASKS)
         self.task = task
+        self.packed = is_packed_dataset(self.dataset_path)
+        self._packed_subsets = dict()
 
     @classmethod
     def get_classes(cls, yaml_path):
@@ -273,24 +560,15 @@ class YoloDataset:
             print(
                 "  *Note: the box counting can take a long time depend on dataset size, please wait..."
             )
-            images_paths = list()
-            for folder_path in [
-                self.train_folder,
-                self.valid_folder,
-                self.test_folder,
-            ]:
-                if folder_path.exists():
-                    images_paths += list_files(str(folder_path / "images"))
-
+            # only the class ids are read, whatever the task of the labels
             box_counts = {cls_name: 0 for cls_name in self.classes}
-            for img_path in images_paths:
-                labels = YoloImage(image_path=img_path).get_labels()
-                for label in labels:
-                    cls_name = self.classes[label["class"]]
-                    box_counts[cls_name] += 1
+            for subset in self._get_subsets():
+                for class_id in self._iter_class_ids(subset):
+                    box_counts[self.classes[class_id]] += 1
 
+            object_name = "polygons" if self.task == "segment" else "boxes"
             for cls_name, box_count in box_counts.items():
-                print(f"  + {cls_name}: {box_count} boxes")
+                print(f"  + {cls_name}: {box_count} {object_name}")
 
         print("- Subsets:")
         total_file_count = 0
@@ -300,11 +578,238 @@ class YoloDataset:
             self.test_folder,
         ]:
             if folder_path.exists():
-                file_count = len(list_files(str(folder_path / "images")))
+                file_count = len(self.list_images(folder_path.name))
                 print(f"  + {folder_path.name}: {file_count} images")
                 total_file_count += file_count
         print("- Total images:", total_file_count)
 
+    def _get_subsets(self):
+        return [
+            folder_path.name
+            for folder_path in [
+                self.train_folder,
+                self.valid_folder,
+                self.test_folder,
+            ]
+            if folder_path.exists()
+        ]
+
+    def get_packed_subset(self, subset):
+        """
+        Get the reader of a subset of a packed dataset.
+
+        Args:
+            subset (str): Subset folder name: "train", "valid" or "test".
+
+        Returns:
+            packed_subset (PackedSubset): Reader of the shards of the subset.
+        """
+        if not self.packed:
+            raise ValueError(f"Dataset {self.name} is not packed.")
+        if subset not in self._packed_subsets:
+            self._packed_subsets[subset] = PackedSubset(
+                self.dataset_path / subset
+            )
+        return self._packed_subsets[subset]
+
+    def _check_unpacked(self):
+        if self.packed:
+            raise ValueError(
+                f"Dataset {self.name} is packed, unpack it first with "
+                "kano.pack_utils.unpack_dataset."
+            )
+
+    def list_images(self, subset="train"):
+        """
+        List the image paths of a subset, in the order of the label stores.
+
+        Args:
+            subset (str): Subset folder name: "train", "valid" or "test".
+
+        Returns:
+            images_paths (list(str)): Sorted paths, virtual for a packed dataset.
+        """
+        images_folder = self.dataset_path / subset / "images"
+        if self.packed:
+            return [
+                str(images_folder / file_name)
+                for file_name in self.get_packed_subset(subset).file_names
+            ]
+        return list_files(str(images_folder))
+
+    def _iter_class_ids(self, subset):
+        if self.packed:
+            packed_subset = self.get_packed_subset(subset)
+            row_starts = packed_subset.row_offsets[:-1]
+            class_ids = packed_subset.label_values[row_starts]
+            yield from class_ids.astype(np.int64).tolist()
+            return
+        for image_path in self.list_images(subset):
+            label_path = YoloImage.get_label_path(image_path)
+            if not Path(label_path).exists():
+                continue
+            with open(label_path, "r") as file:
+                lines = [line.split(maxsplit=1) for line in file]
+            yield from (int(line[0]) for line in lines if line)
+
+    def iter_label_arrays(self, subset="train"):
+        """
+        Iterate over the labels of a subset as arrays, without loading the images.
+
+        Args:
+            subset (str): Subset folder name: "train", "valid" or "test".
+
+        Yields:
+            image_path (str): Path to the image, virtual for a packed dataset.
+            labels (np.ndarray): (N, C) labels, see `read_label_array`.
+        """
+        images_paths = self.list_images(subset)
+        if self.packed:
+            packed_subset = self.get_packed_subset(subset)
+            for index, image_path in enumerate(images_paths):
+                yield image_path, packed_subset.get_label_array(index)
+            return
+        for image_path in images_paths:
+            yield image_path, read_label_array(
+                YoloImage.get_label_path(image_path)
+            )
+
+    def _open_label_store(self, store_path, file_names):
+        """
+        Open a compiled label store if it matches the task and the images.
+
+        Args:
+            store_path (str): Folder of the store.
+            file_names (list(str)): File names of the images, in order.
+
+        Returns:
+            label_store (LabelStore): The store, None if it does not exist or was
+                compiled for another task or other images.
+        """
+        if not (Path(store_path) / "store.yaml").exists():
+            return None
+        label_store = LabelStore(store_path)
+        if label_store.task != self.task:
+            return None
+        if list(label_store.file_names) != list(file_names):
+            return None
+        return label_store
+
+    def get_label_store(self, subset="train", store_path=None, rebuild=False):
+        """
+        Get the labels of a subset compiled into memory-mapped arrays.
+
+        The store is compiled once, then opened from its folder. It is
+        compiled again when it was compiled for another task, or when the
+        file names of the images changed.
+
+        Args:
+            subset (str): Subset folder name: "train", "valid" or "test".
+            store_path (str, optional): Folder of the store. Default is a
+                "label_store" folder in the subset folder.
+            rebuild (bool): Whether to compile the store again, e.g. after
+                editing the label files.
+
+        Returns:
+            label_store (LabelStore): Labels of all the images of the subset.
+        """
+        if store_path is None:
+            store_path = self.dataset_path / subset / "label_store"
+        store_path = Path(store_path)
+        if self.packed:
+            file_names = list(self.get_packed_subset(subset).file_names)
+        else:
+            images_paths = self.list_images(subset)
+            file_names = [Path(path).name for path in images_paths]
+        if not rebuild:
+            label_store = self._open_label_store(store_path, file_names)
+            if label_store is not None:
+                return label_store
+
+        if self.packed:
+            packed_subset = self.get_packed_subset(subset)
+            return LabelStore.compile(
+                store_path,
+                self.task,
+                packed_subset.file_names,
+                packed_subset.label_offsets,
+                packed_subset.label_values,
+                packed_subset.row_offsets,
+            )
+
+        return self._compile_label_store(store_path, images_paths)
+
+    def _compile_label_store(self, store_path, images_paths):
+        """
+        Compile the label files of the given images into a label store.
+
+        Args:
+            store_path (str): Folder of the store.
+            images_paths (list(str)): Paths to the images, in the order of the store.
+
+        Returns:
+            label_store (LabelStore): Labels of the images.
+        """
+        all_values, all_row_lengths = list(), list()
+        for image_path in images_paths:
+            values, row_offsets = read_label_rows(
+                YoloImage.get_label_path(image_path)
+            )
+            all_values.append(values)
+            all_row_lengths.append(np.diff(row_offsets))
+        row_lengths = np.concatenate(
+            [np.zeros(0, dtype=np.int64)] + all_row_lengths
+        )
+        label_offsets = np.zeros(len(images_paths) + 1, dtype=np.int64)
+        np.cumsum(
+            [len(lengths) for lengths in all_row_lengths],
+            out=label_offsets[1:],
+        )
+        row_offsets = np.zeros(len(row_lengths) + 1, dtype=np.int64)
+        np.cumsum(row_lengths, out=row_offsets[1:])
+        return LabelStore.compile(
+            store_path,
+            self.task,
+            [Path(image_path).name for image_path in images_paths],
+            label_offsets,
+            np.concatenate([np.zeros(0, dtype=np.float32)] + all_values),
+            row_offsets,
+        )
+
+    def iter_images(
+        self, subset="train", shuffle=False, seed=None, flags=cv2.IMREAD_COLOR
+    ):
+        """
+        Iterate over the decoded images of a subset.
+
+        The images of a packed dataset are read shard after shard, and
+        shuffled by shard then inside each shard.
+
+        Args:
+            subset (str): Subset folder name: "train", "valid" or "test".
+            shuffle (bool): Whether to shuffle the images.
+            seed (int, optional): Seed of the shuffling.
+            flags (int): Flags of `cv2.imread` / `cv2.imdecode`.
+
+        Yields:
+            image_path (str): Path to the image, virtual for a packed dataset.
+            image (np.ndarray): The decoded image.
+        """
+        images_paths = self.list_images(subset)
+        if self.packed:
+            packed_subset = self.get_packed_subset(subset)
+            for index, image_bytes in packed_subset.iter_samples(
+                shuffle, seed
+            ):
+                image = cv2.imdecode(np.asarray(image_bytes), flags)
+                yield images_paths[index], image
+            return
+        if shuffle:
+            order = np.random.default_rng(seed).permutation(len(images_paths))
+            images_paths = [images_paths[i] for i in order]
+        for image_path in images_paths:
+            yield image_path, read_image(image_path, flags)
+
     @classmethod
     def _combine_classes(cls, datasets_paths):
         """
@@ -347,13 +852,14 @@ class YoloDataset:
         return reindex_dict
 
     @classmethod
-    def _create_simple_yaml_file(cls, dataset_path, classes):
+    def _create_simple_yaml_file(cls, dataset_path, classes, **entries):
         """
         Create a simple YAML file containing dataset information.
 
         Returns:
             dataset_path (str): Path to the dataset folder.
             classes (list[str]): List of class names.
+            **entries: Additional entries, e.g. the parameters of a split.
         """
         data = {
             "train": "train",
@@ -361,107 +867,430 @@ class YoloDataset:
             "test": "test",
             "names": classes,
         }
+        data.update(entries)
 
         yaml_path = Path(dataset_path) / "data.yaml"
         with open(str(yaml_path), "w") as f:
             yaml.dump(data, f)
 
+    @staticmethod
+    def _read_merge_journal(journal_path):
+        """
+        Read the journal of a merge, the last record of an item wins.
+
+        A line left incomplete by an interrupted merge is ignored.
+
+        Returns:
+            datasets (dict): Mapping from source dataset path to its class mapping.
+            items (dict): Mapping from source image path to its merged record.
+        """
+        datasets, items = dict(), dict()
+        if not Path(journal_path).exists():
+            return datasets, items
+        with open(str(journal_path), "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "source" in record:
+                    items[record["source"]] = record
+                else:
+                    datasets[record["dataset"]] = record["reindex"]
+        return datasets, items
+
+    @staticmethod
+    def _get_file_version(file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
     @classmethod
-    def merge_datasets(cls, datasets_paths, merged_dataset_path):
+    def merge_datasets(
+        cls,
+        datasets_paths,
+        merged_dataset_path,
+        task="detect",
+        incremental=False,
+    ):
         """
         Merge multiple datasets into one.
 
-        Returns:
+        Every merged image is recorded in a journal file of the merged
+        dataset with the size and modification time of its image and label
+        files. An incremental merge reads the journal to skip the images
+        that did not change since they were merged, so it resumes an
+        interrupted merge and merges only the new images of the sources.
+
+        Args:
             datasets_paths (list[str]): Paths to the dataset folders to be merged.
             merged_dataset_path (str): Path to the merged dataset folder.
+            task (str): Use case of the datasets. Default is "detect".
+            incremental (bool): Whether to merge into the existing merged dataset only
+                the new or changed images. New classes are appended to the existing
+                classes to keep the merged labels valid. Images removed from the
+                sources are not removed from the merged dataset.
         """
         merged_dataset_path = Path(merged_dataset_path)
+        create_folder(merged_dataset_path)
+        journal_path = merged_dataset_path / MERGE_JOURNAL_NAME
         merged_classes = cls._combine_classes(datasets_paths)
+        journal_datasets, journal_items = dict(), dict()
+        yaml_path = merged_dataset_path / "data.yaml"
+        if incremental:
+            journal_datasets, journal_items = cls._read_merge_journal(
+                journal_path
+            )
+            if yaml_path.exists():
+                classes = cls.get_classes(str(yaml_path))
+                merged_classes = classes + [
+                    class_name
+                    for class_name in merged_classes
+                    if class_name not in classes
+                ]
+        # the classes are written first, they are needed by the merged labels
+        cls._create_simple_yaml_file(str(merged_dataset_path), merged_classes)
+
+        num_merged, num_skipped = 0, 0
         print("Input datasets:")
-        for path in datasets_paths:
-            dataset = cls(path)
-            dataset.summary()
-            classes = dataset.classes
-            reindex_dict = cls._get_reindex_dict(classes, merged_classes)
-
-            for subset_path in [
-                dataset.train_folder,
-                dataset.valid_folder,
-                dataset.test_folder,
-            ]:
-                if subset_path.exists():
-                    target_subset_path = merged_dataset_path / subset_path.name
+        with open(str(journal_path), "a" if incremental else "w") as journal:
+            for path in datasets_paths:
+                dataset = cls(path, task)
+                dataset._check_unpacked()
+                dataset.summary()
+                dataset_key = str(dataset.dataset_path.resolve())
+                reindex_dict = cls._get_reindex_dict(
+                    dataset.classes, merged_classes
+                )
+                reindex = sorted(reindex_dict.items())
+                reindex = [list(pair) for pair in reindex]
+                # a new class mapping invalidates the merged labels
+                is_journaled = journal_datasets.get(dataset_key) == reindex
+                if not is_journaled:
+                    journal.write(
+                        json.dumps(
+                            {"dataset": dataset_key, "reindex": reindex}
+                        )
+                        + "\n"
+                    )
+                    journal_datasets[dataset_key] = reindex
+
+                for subset, image_path in dataset._iter_images_paths():
+                    # paths are built from the resolved dataset path, resolving
+                    # every image would cost more than checking it
+                    image_name = os.path.basename(image_path)
+                    source_image_path = Path(
+                        dataset_key, subset, "images", image_name
+                    )
+                    source_label_path = Path(
+                        dataset_key,
+                        subset,
+                        "labels",
+                        os.path.splitext(image_name)[0] + ".txt",
+                    )
+                    record = {
+                        "source": str(source_image_path),
+                        "dataset": dataset_key,
+                        "image": cls._get_file_version(source_image_path),
+                        "label": cls._get_file_version(source_label_path),
+                    }
+                    journal_record = journal_items.get(record["source"])
+                    if is_journaled and journal_record == record:
+                        num_skipped += 1
+                        continue
+
+                    target_subset_path = merged_dataset_path / subset
                     create_folder(target_subset_path / "images")
                     create_folder(target_subset_path / "labels")
-                    images_paths = list_files(str(subset_path / "images"))
-                    for image_path in images_paths:
-                        yolo_image = YoloImage(image_path)
-                        yolo_image.copy_to(
-                            target_subset_path,
-                            dataset.name + "_",
+                    prefix = dataset.name + "_"
+                    shutil.copyfile(
+                        str(source_image_path),
+                        str(
+                            target_subset_path
+                            / "images"
+                            / (prefix + source_image_path.name)
+                        ),
+                    )
+                    if record["label"] is not None:
+                        copy_label_file(
+                            source_label_path,
+                            target_subset_path
+                            / "labels"
+                            / (prefix + source_label_path.name),
                             reindex_dict,
                         )
+                    # recorded once its files are written, an interrupted copy is
+                    # done again by the next merge
+                    journal.write(json.dumps(record) + "\n")
+                    journal.flush()
+                    journal_items[record["source"]] = record
+                    num_merged += 1
+
+        # keep only the last record of every item
+        compacted_path = journal_path.with_suffix(".tmp")
+        with open(str(compacted_path), "w") as f:
+            for dataset_key, reindex in journal_datasets.items():
+                f.write(
+                    json.dumps({"dataset": dataset_key, "reindex": reindex})
+                    + "\n"
+                )
+            for record in journal_items.values():
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(compacted_path, journal_path)
 
-        cls._create_simple_yaml_file(str(merged_dataset_path), merged_classes)
-
+        print(f"Merged {num_merged} images, {num_skipped} already merged.")
         print("Merged dataset:")
-        dataset = cls(str(merged_dataset_path))
+        dataset = cls(str(merged_dataset_path), task)
         dataset.summary()
 
-    def split(self, splitted_dataset_path, ratios=[0.9]):
+    def _iter_images_paths(self, subsets=SPLIT_SUBSETS):
         """
-        Split the dataset into train, validation, and test subsets.
+        Iterate over the images of the subsets without listing them first.
 
-        Returns:
-            splitted_dataset_path (str): Path to the folder where the splitted dataset will be saved.
-            ratios (list[float]): Ratios for train, validation, and test subsets. Default is [0.9].
+        Args:
+            subsets (list(str)): Subset folder names.
+
+        Yields:
+            subset (str): Subset folder name of the image.
+            image_path (str): Path to the image.
         """
-        self.summary()
+        for subset in subsets:
+            images_folder = self.dataset_path / subset / "images"
+            if not images_folder.exists():
+                continue
+            with os.scandir(images_folder) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        yield subset, entry.path
+
+    def _get_stratified_subsets(self, ratios, seed):
+        """
+        Assign the images to the subsets class by class, from label stores.
 
-        images_paths = list()
-        for folder_path in [
-            self.train_folder,
-            self.valid_folder,
-            self.test_folder,
-        ]:
-            if folder_path.exists():
-                images_paths += list_files(str(folder_path / "images"))
+        Each image goes with its rarest class. Inside a class, the images are
+        ordered by their hash position and cut at the ratios, so each class
+        is split with the ratios.
 
-        random.shuffle(images_paths)
+        The label store of a subset is used if it matches its images,
+        otherwise the labels are compiled in a temporary folder, so the
+        dataset is never written.
 
-        total_paths = len(images_paths)
+        Returns:
+            subsets (dict): Mapping from the (subset, file name) of the images, as
+                listed by `_iter_images_paths`, to their new subset.
+        """
+        images_keys, classes, label_offsets = list(), list(), [np.zeros(1)]
+        with tempfile.TemporaryDirectory() as temp_folder:
+            for subset in SPLIT_SUBSETS:
+                images_paths = sorted(
+                    path for _, path in self._iter_images_paths([subset])
+                )
+                if not images_paths:
+                    continue
+                file_names = [os.path.basename(path) for path in images_paths]
+                label_store = self._open_label_store(
+                    self.dataset_path / subset / "label_store", file_names
+                )
+                if label_store is None:
+                    label_store = self._compile_label_store(
+                        Path(temp_folder) / subset, images_paths
+                    )
+                images_keys += [
+                    (subset, file_name) for file_name in file_names
+                ]
+                # copied out of the memory-mapped files of the store
+                classes.append(np.array(label_store.classes))
+                label_offsets.append(
+                    label_store.label_offsets[1:] + label_offsets[-1][-1]
+                )
+                del label_store
+        if not images_keys:
+            return dict()
+        classes = np.concatenate(classes).astype(np.int64)
+        label_offsets = np.concatenate(label_offsets).astype(np.int64)
+
+        # rarest class of every image, -1 for images without labels
+        label_counts = np.diff(label_offsets)
+        image_ids = np.repeat(np.arange(len(images_keys)), label_counts)
+        class_counts = np.bincount(classes, minlength=1)
+        order = np.lexsort((class_counts[classes], image_ids))
+        groups = np.full(len(images_keys), -1, dtype=np.int64)
+        labelled = label_counts > 0
+        groups[labelled] = classes[order][label_offsets[:-1][labelled]]
+
+        positions = np.array(
+            [
+                get_split_position(file_name, seed)
+                for _, file_name in images_keys
+            ]
+        )
+        bounds = get_split_bounds(ratios)
+        subset_ids = np.empty(len(images_keys), dtype=np.int64)
+        for group in np.unique(groups):
+            members = np.flatnonzero(groups == group)
+            members = members[np.argsort(positions[members], kind="stable")]
+            quantiles = (np.arange(len(members)) + 0.5) / len(members)
+            subset_ids[members] = np.searchsorted(
+                bounds, quantiles, side="right"
+            )
+        return {
+            key: SPLIT_SUBSETS[subset_id]
+            for key, subset_id in zip(images_keys, subset_ids.tolist())
+        }
 
-        train_count = int(total_paths * ratios[0])
-        train_paths = images_paths[:train_count]
+    @staticmethod
+    def _is_copied(source_path, target_path):
+        """
+        Check whether a file was already copied and did not change since.
+        """
+        try:
+            target_stat = os.stat(target_path)
+        except OSError:
+            return False
+        source_stat = os.stat(source_path)
+        return (
+            target_stat.st_size == source_stat.st_size
+            and target_stat.st_mtime_ns == source_stat.st_mtime_ns
+        )
 
-        if len(ratios) == 1:
-            valid_paths = images_paths[train_count:]
-            test_paths = list()
-        else:
-            valid_count = int(total_paths * ratios[1])
-            valid_paths = images_paths[train_count : train_count + valid_count]
-            test_paths = images_paths[train_count + valid_count :]
+    def split(
+        self,
+        splitted_dataset_path,
+        ratios=[0.9],
+        seed=0,
+        incremental=False,
+        stratify=False,
+    ):
+        """
+        Split the dataset into train, validation, and test subsets.
+
+        The subset of each image comes from a hash of its file name and the
+        seed, so the split is deterministic and images added later do not
+        move the others between subsets. Files are copied with their
+        modification time, which lets an incremental split copy only the
+        new or changed images.
+
+        Args:
+            splitted_dataset_path (str): Path to the folder where the splitted dataset will be saved.
+            ratios (list[float]): Ratios for train, validation, and test subsets. Default is [0.9].
+            seed (int or str): Seed of the split.
+            incremental (bool): Whether to keep the files already copied by a previous
+                split with the same ratios and seed, and copy only new or changed images.
+                Images removed from the dataset are not removed from the split.
+            stratify (bool): Whether to split each class with the ratios, using the label
+                stores of the subsets when they match their images, or labels compiled
+                in a temporary folder. Adding images can then move images close to the
+                ratios between subsets, an incremental split removes their previous copy.
+        """
+        self._check_unpacked()
+        bounds = get_split_bounds(ratios)
+        self.summary()
 
         splitted_dataset_path = Path(splitted_dataset_path)
+        split_params = {
+            "ratios": [float(ratio) for ratio in ratios],
+            "seed": seed,
+            "stratify": stratify,
+        }
+        yaml_path = splitted_dataset_path / "data.yaml"
+        if incremental and yaml_path.exists():
+            with open(str(yaml_path), "r") as f:
+                data = yaml.safe_load(f)
+            if data.get("split") != split_params:
+                raise ValueError(
+                    "Incremental split needs the ratios, seed and stratify "
+                    f"of the previous split: {data.get('split')}."
+                )
+            if data.get("names") != self.classes:
+                raise ValueError(
+                    "Incremental split needs the classes of the previous split."
+                )
 
-        subsets = [
-            ("train", train_paths),
-            ("valid", valid_paths),
-            ("test", test_paths),
-        ]
-        for subset_name, paths in subsets:
-            for path in paths:
-                yolo_image = YoloImage(path)
-                old_subset_name = Path(path).parent.parent.name
-                target_folder_path = splitted_dataset_path / subset_name
-                create_folder(target_folder_path / "images")
-                create_folder(target_folder_path / "labels")
-                yolo_image.copy_to(
-                    target_folder_path, f"{self.name}_{old_subset_name}_"
+        stratified_subsets = None
+        if stratify:
+            stratified_subsets = self._get_stratified_subsets(ratios, seed)
+        for subset_name in SPLIT_SUBSETS:
+            create_folder(splitted_dataset_path / subset_name / "images")
+            create_folder(splitted_dataset_path / subset_name / "labels")
+
+        num_copied, num_skipped, num_moved = 0, 0, 0
+        for old_subset_name, image_path in self._iter_images_paths():
+            source_image_path = Path(image_path)
+            if stratified_subsets is None:
+                position = get_split_position(source_image_path.name, seed)
+                subset_name = SPLIT_SUBSETS[
+                    int(np.searchsorted(bounds, position, side="right"))
+                ]
+            else:
+                subset_name = stratified_subsets[
+                    (old_subset_name, source_image_path.name)
+                ]
+
+            prefix = f"{self.name}_{old_subset_name}_"
+            source_label_path = Path(YoloImage.get_label_path(image_path))
+            target_folder_path = splitted_dataset_path / subset_name
+            copies = [
+                (
+                    source_image_path,
+                    target_folder_path
+                    / "images"
+                    / (prefix + source_image_path.name),
+                ),
+            ]
+            if source_label_path.exists():
+                copies.append(
+                    (
+                        source_label_path,
+                        target_folder_path
+                        / "labels"
+                        / (prefix + source_label_path.name),
+                    )
                 )
+            if incremental and stratified_subsets is not None:
+                # adding images can move an image to another subset, its
+                # previous copy would leak it into two subsets
+                for other_subset_name in SPLIT_SUBSETS:
+                    if other_subset_name == subset_name:
+                        continue
+                    other_folder_path = (
+                        splitted_dataset_path / other_subset_name
+                    )
+                    stale_image_path = (
+                        other_folder_path
+                        / "images"
+                        / (prefix + source_image_path.name)
+                    )
+                    stale_label_path = (
+                        other_folder_path
+                        / "labels"
+                        / (prefix + source_label_path.name)
+                    )
+                    if stale_image_path.exists():
+                        stale_image_path.unlink()
+                        num_moved += 1
+                    if stale_label_path.exists():
+                        stale_label_path.unlink()
+            if incremental and all(
+                self._is_copied(source, target) for source, target in copies
+            ):
+                num_skipped += 1
+                continue
+            for source, target in copies:
+                shutil.copy2(str(source), str(target))
+            num_copied += 1
 
-        self._create_simple_yaml_file(str(splitted_dataset_path), self.classes)
-        YoloDataset(str(splitted_dataset_path)).summary()
+        self._create_simple_yaml_file(
+            str(splitted_dataset_path), self.classes, split=split_params
+        )
+        print(
+            f"Copied {num_copied} images, {num_skipped} already copied, "
+            f"{num_moved} moved to another subset."
+        )
+        YoloDataset(str(splitted_dataset_path), self.task).summary()
 
     def rename_classes(self, renamed_dataset_path, renaming_dict):
         """
@@ -472,6 +1301,7 @@ class YoloDataset:
             renaming_dict (dict): Dictionary mapping original class names to new class names.
                 To remove classes, set the classes' values to None.
         """
+        self._check_unpacked()
 
         self.summary()
 
@@ -511,7 +1341,7 @@ class YoloDataset:
             if folder_path.exists():
                 images_paths = list_files(folder_path / "images")
                 for path in images_paths:
-                    yolo_image = YoloImage(path)
+                    yolo_image = YoloImage(path, task=self.task)
                     target_folder_path = renamed_dataset_path / subset_name
                     create_folder(target_folder_path / "images")
                     create_folder(target_folder_path / "labels")
@@ -522,15 +1352,108 @@ class YoloDataset:
         self._create_simple_yaml_file(
             str(renamed_dataset_path), target_classes
         )
-        YoloDataset(str(renamed_dataset_path)).summary()
+        YoloDataset(str(renamed_dataset_path), self.task).summary()
 
-    def show_sample(self, figsize=(10, 10)):
+    def iter_pose_labels(self, subset="valid", image_size=None):
         """
-        Show a sample of annotated images from the dataset.
+        Iterate over the pose labels of a subset as arrays, without loading the images.
+
+        Args:
+            subset (str): Subset folder name: "train", "valid" or "test".
+            image_size (tuple(int, int), optional): (height, width) of the images to
+                get coordinates in pixels. Default keeps the scaled coordinates.
+
+        Yields:
+            image_path (str): Path to the image.
+            classes (np.ndarray): (N,) class ids.
+            xywh (np.ndarray): (N, 4) xywh boxes.
+            keypoints (np.ndarray): (N, K, 3) keypoints (x, y, state).
+        """
+        scale = np.ones(2)
+        if image_size is not None:
+            scale = np.array([image_size[1], image_size[0]], dtype=np.float64)
+
+        for image_path, labels in self.iter_label_arrays(subset):
+            if not len(labels):
+                labels = np.zeros((0, 5))
+            num_keypoints = max(labels.shape[1] - 5, 0) // 3
+            keypoints = labels[:, 5 : 5 + 3 * num_keypoints].reshape(
+                len(labels), num_keypoints, 3
+            )
+            keypoints[:, :, :2] *= scale
+            xywh = labels[:, 1:5].reshape(len(labels), 4) * np.tile(scale, 2)
+            yield image_path, labels[:, 0].astype(np.int64), xywh, keypoints
+
+    def evaluate_pose(
+        self,
+        predictions_path,
+        subset="valid",
+        image_size=None,
+        sigmas=None,
+        max_detections=20,
+    ):
+        """
+        Calculate the keypoint AP of predictions saved as YOLO label files.
+
+        Each prediction file has the name of its image and one line per person:
+        class, scaled xywh box, scaled keypoints (x, y, visibility) and the score last.
+        The area of a ground truth is `BOX_AREA_RATIO` times its box area.
+
+        Args:
+            predictions_path (str): Folder of the prediction files.
+            subset (str): Subset folder name: "train", "valid" or "test".
+            image_size (tuple(int, int), optional): (height, width) of the images. OKS is
+                calculated on scaled coordinates if not given, exact for square images.
+            sigmas (np.ndarray, optional): Per-keypoint standard deviations of OKS.
+            max_detections (int, optional): Number of best scored predictions kept per
+                image, 20 as in COCO. None keeps all of them.
 
         Returns:
+            results (dict): AP of the predictions, see `PoseEvaluator.compute`.
+        """
+        if self.task != "pose":
+            raise ValueError("Pose evaluation needs a dataset of task 'pose'.")
+        predictions_path = Path(predictions_path)
+        scale = np.ones(2)
+        if image_size is not None:
+            scale = np.array([image_size[1], image_size[0]], dtype=np.float64)
+
+        evaluator = PoseEvaluator(sigmas=sigmas, max_detections=max_detections)
+        for image_path, _, xywh, keypoints in self.iter_pose_labels(
+            subset, image_size
+        ):
+            predictions = read_label_array(
+                predictions_path / Path(image_path).with_suffix(".txt").name
+            )
+            num_keypoints = max(predictions.shape[1] - 6, 0) // 3
+            pred_keypoints = predictions[:, 5 : 5 + 3 * num_keypoints]
+            pred_keypoints = pred_keypoints.reshape(
+                len(predictions), num_keypoints, 3
+            )
+            scores = predictions[:, -1] if len(predictions) else np.zeros(0)
+            evaluator.update(
+                keypoints,
+                xywh[:, 2] * xywh[:, 3] * BOX_AREA_RATIO,
+                pred_keypoints[:, :, :2] * scale,
+                scores,
+            )
+        return evaluator.compute()
+
+    def show_sample(self, figsize=(10, 10), thumbnail_dir=None):
+        """
+        Show a sample of annotated images from the dataset.
+
+        The images are decoded at the resolution of the figure, not at
+        their full resolution.
+
+        Args:
             figsize (tuple(int, int)): Size of the figure (width, height) in inches.
+            thumbnail_dir (str, optional): Folder caching the reduced images, to browse
+                large datasets faster, see `read_thumbnail`.
         """
+        import matplotlib
+
+        self._check_unpacked()
 
         images_paths = list()
         for folder_path in [
@@ -546,13 +1469,21 @@ class YoloDataset:
         labels_dict = {
             i: class_name for i, class_name in enumerate(self.classes)
         }
+        # the images are shown on a grid of at most 3 x 3 images
+        max_size = math.ceil(
+            max(figsize) * matplotlib.rcParams["figure.dpi"] / 3
+        )
         annotated_images = list()
         if len(images_paths) > 9:
             for i in range(3):
                 annotated_images.append(list())
                 for j in range(3):
                     yolo_image = YoloImage(
-                        images_paths[i * 3 + j], labels_dict, self.task
+                        images_paths[i * 3 + j],
+                        labels_dict,
+                        self.task,
+                        max_size,
+                        thumbnail_dir,
                     )
                     annotated_images[i].append(
                         yolo_image.get_annotated_image()
@@ -560,7 +1491,13 @@ class YoloDataset:
         else:
             total_images = min(3, len(images_paths))
             for i in range(total_images):
-                yolo_image = YoloImage(images_paths[i], labels_dict, self.task)
+                yolo_image = YoloImage(
+                    images_paths[i],
+                    labels_dict,
+                    self.task,
+                    max_size,
+                    thumbnail_dir,
+                )
                 annotated_images.append(yolo_image.get_annotated_image())
 
         concatenated_images = concatenate_images(annotated_images)
@@ -574,6 +1511,7 @@ class YoloDataset:
         Returns:
             numbered_dataset_path (str): Path to the folder where the numbered dataset will be saved.
         """
+        self._check_unpacked()
         self.summary()
 
         total_images = 0
@@ -599,7 +1537,7 @@ class YoloDataset:
             if folder_path.exists():
                 images_paths = list_files(str(folder_path / "images"))
                 for path in images_paths:
-                    yolo_image = YoloImage(path)
+                    yolo_image = YoloImage(path, task=self.task)
                     target_folder_path = numbered_dataset_path / subset_name
                     create_folder(target_folder_path / "images")
                     create_folder(target_folder_path / "labels")
@@ -609,4 +1547,4 @@ class YoloDataset:
                     i += 1
 
         self._create_simple_yaml_file(str(numbered_dataset_path), self.classes)
-        YoloDataset(str(numbered_dataset_path)).summary()
+        YoloDataset(str(numbered_dataset_path), self.task).summary()
@@ -3,6 +3,9 @@ from typing import List, Optional, Tuple, Union
 import cv2
 import numpy as np
 
+from kano.box import BoxArray, convert_boxes, parse_box_format
+from kano.image.cache import read_image
+
 
 def extract_bbox_area(image, bbox):
     """
@@ -25,12 +28,15 @@ def xywh2xyxy(xywh):
     Converts bounding box coordinates from (x_center, y_center, width, height) format to (x_min, y_min, x_max, y_max) format.
 
     Args:
-        xywh (np.array) with shape (4,): A tuple containing (x_center, y_center, width, height) of the bounding box.
+        xywh (np.array) with shape (4,) or (N, 4): (x_center, y_center, width, height) of the bounding box, or of N boxes.
 
     Returns:
-        xyxy (tuple(int)): xyxy location of the bounding box.
+        xyxy (tuple(int) or np.array): xyxy location of the bounding box, or (N, 4) int array for N boxes.
     """
 
+    if np.ndim(xywh) == 2:
+        return convert_boxes(xywh, "xywh", "xyxy").astype(np.int64)
+
     x_center, y_center, bbox_width, bbox_height = xywh
     x_min = int(x_center - bbox_width / 2)
     y_min = int(y_center - bbox_height / 2)
@@ -58,56 +64,27 @@ def get_font_config(image_height: int) -> Tuple[float, int]:
         return (0.75, 2, 5)
 
 
-def draw_bbox(
-    image: Union[np.ndarray, str],
-    bbox: Union[List[float], Tuple[float, ...], np.ndarray],
-    bbox_type: str = "xyxy",
-    bbox_color: Tuple[int, int, int] = (0, 0, 255),
-    label: Optional[str] = None,
-) -> np.ndarray:
+def _draw_xyxy(
+    image: np.ndarray,
+    xyxy: Tuple[int, int, int, int],
+    bbox_color: Tuple[int, int, int],
+    label: Optional[str],
+) -> None:
     """
-    Draws a bounding box on the image and optionally draws a multi-line label.
+    Draws one bounding box and its multi-line label in place.
 
     Args:
-        image (np.ndarray or str): The image on which the bounding box will be drawn.
-        bbox (list or tuple or np.ndarray): The bounding box coordinates. If it's a list, it should be in the format specified by bbox_type.
-        bbox_type (str): Type of bounding box coordinates. Should be either "xyxy" or "xywh" or "s_xywh".
+        image (np.ndarray): The image to draw on.
+        xyxy (tuple(int)): xyxy location of the bounding box in pixels.
         bbox_color (tuple): Color of the bounding box in BGR format.
-        label (str, optional): Label to be displayed alongside the bounding box. Supports multiple lines with '/n' separating lines.
-
-    Returns:
-        np.ndarray: Image with the bounding box and label drawn.
+        label (str, optional): Label to be displayed alongside the bounding box.
     """
-    if isinstance(image, str):
-        temp_image = cv2.imread(image)
-    else:
-        temp_image = image.copy()
-
-    image_height, image_width = temp_image.shape[:2]
-
-    if isinstance(bbox, (list, tuple)):
-        temp_bbox = np.array(bbox)
-    else:
-        temp_bbox = bbox.copy()
-    if "s_" in bbox_type:
-        temp_bbox *= np.array(
-            [image_width, image_height, image_width, image_height]
-        )
-
-    temp_bbox = temp_bbox.astype(np.int64)
-
-    if "xyxy" in bbox_type:
-        x_min, y_min, x_max, y_max = temp_bbox
-    elif "xywh" in bbox_type:
-        x_min, y_min, x_max, y_max = xywh2xyxy(temp_bbox)
-    else:
-        raise ValueError("Invalid bounding box type")
-
-    cv2.rectangle(temp_image, (x_min, y_min), (x_max, y_max), bbox_color, 2)
+    x_min, y_min, x_max, y_max = xyxy
+    cv2.rectangle(image, (x_min, y_min), (x_max, y_max), bbox_color, 2)
 
     if label is not None:
         font = cv2.FONT_HERSHEY_SIMPLEX
-        font_scale, thickness, pad = get_font_config(image_height)
+        font_scale, thickness, pad = get_font_config(image.shape[0])
 
         label_lines = label.split("\n")
         (text_width, text_height), _ = cv2.getTextSize(
@@ -126,14 +103,14 @@ def draw_bbox(
                 y_offset - text_height - pad,
             )
             cv2.rectangle(
-                temp_image,
+                image,
                 background_position,
                 background_end_position,
                 bbox_color,
                 -1,
             )
             cv2.putText(
-                temp_image,
+                image,
                 line,
                 (x_min, y_offset - pad // 2),
                 font,
@@ -144,10 +121,102 @@ def draw_bbox(
 
             y_offset += text_height + pad
 
+
+def draw_bbox(
+    image: Union[np.ndarray, str],
+    bbox: Union[List[float], Tuple[float, ...], np.ndarray, BoxArray],
+    bbox_type: str = "xyxy",
+    bbox_color: Tuple[int, int, int] = (0, 0, 255),
+    label: Optional[Union[str, List[str]]] = None,
+    copy: bool = True,
+) -> np.ndarray:
+    """
+    Draws a bounding box on the image and optionally draws a multi-line label.
+
+    Args:
+        image (np.ndarray or str): The image on which the bounding box will be drawn.
+        bbox (list or tuple or np.ndarray or BoxArray): The bounding box coordinates. If it's a list, it should be in the format specified by bbox_type.
+            (N, 4) arrays and BoxArray draw all of their boxes, bbox_type is ignored for a BoxArray.
+        bbox_type (str): Type of bounding box coordinates, e.g. "xyxy", "xywh", "ltwh" or the scaled "s_xywh" (see `convert_boxes`).
+        bbox_color (tuple): Color of the bounding box in BGR format.
+        label (str or list(str), optional): Label to be displayed alongside the bounding box. Supports multiple lines with '/n' separating lines.
+            A list gives one label per box.
+        copy (bool): Whether to draw on a copy of the image array, otherwise on the image itself.
+
+    Returns:
+        np.ndarray: Image with the bounding box and label drawn.
+    """
+    if isinstance(image, str):
+        temp_image = read_image(image, copy=True)
+    elif copy:
+        temp_image = image.copy()
+    else:
+        temp_image = image
+
+    if isinstance(bbox, BoxArray):
+        xyxy = bbox.xyxy.astype(np.int64)
+    else:
+        layout, scaled = parse_box_format(bbox_type)
+        boxes = np.array(bbox, dtype=np.float64).reshape(-1, 4)
+        if scaled:
+            image_height, image_width = temp_image.shape[:2]
+            boxes *= np.array(
+                [image_width, image_height, image_width, image_height]
+            )
+        # truncated to pixels before the conversion, as boxes were always drawn
+        xyxy = convert_boxes(boxes.astype(np.int64), layout).astype(np.int64)
+
+    labels = label
+    if labels is None or isinstance(labels, str):
+        labels = [labels] * len(xyxy)
+    for box_xyxy, box_label in zip(xyxy, labels):
+        _draw_xyxy(temp_image, box_xyxy, bbox_color, box_label)
+
     return temp_image
 
 
+def calculate_iou_matrix(
+    xyxy1: Union[np.ndarray, BoxArray], xyxy2: Union[np.ndarray, BoxArray]
+) -> np.ndarray:
+    """
+    Calculates the IoU between every pair of boxes of two sets.
+
+    Uses the same inclusive pixel convention as `calculate_iou`.
+
+    Args:
+        xyxy1 (np.ndarray or BoxArray): (N, 4) xyxy boxes.
+        xyxy2 (np.ndarray or BoxArray): (M, 4) xyxy boxes.
+
+    Returns:
+        iou (np.ndarray): (N, M) IoU matrix.
+    """
+    # coordinate planes keep every operation on contiguous rows
+    coords1 = np.ascontiguousarray(
+        np.asarray(xyxy1, dtype=np.float64).reshape(-1, 4).T
+    )
+    coords2 = np.ascontiguousarray(
+        np.asarray(xyxy2, dtype=np.float64).reshape(-1, 4).T
+    )
+    return _pairwise_iou(
+        coords1, _get_areas(coords1), coords2, _get_areas(coords2)
+    )
+
+
 def calculate_iou(xyxy1, xyxy2):
+    """
+    Calculates the IoU between two boxes.
+
+    Args:
+        xyxy1 (list or tuple or np.ndarray or BoxArray): xyxy box, or (N, 4) boxes.
+        xyxy2 (list or tuple or np.ndarray or BoxArray): xyxy box, or (M, 4) boxes.
+
+    Returns:
+        iou (float or np.ndarray): IoU of the two boxes, or the (N, M) IoU matrix
+            if a BoxArray or an array of boxes is given.
+    """
+    if np.ndim(xyxy1) == 2 or np.ndim(xyxy2) == 2:
+        return calculate_iou_matrix(xyxy1, xyxy2)
+
     x1 = max(xyxy1[0], xyxy2[0])
     y1 = max(xyxy1[1], xyxy2[1])
     x2 = min(xyxy1[2], xyxy2[2])
@@ -165,6 +234,628 @@ def calculate_iou(xyxy1, xyxy2):
     return iou
 
 
+def _get_areas(coords: np.ndarray) -> np.ndarray:
+    return (coords[2] - coords[0] + 1) * (coords[3] - coords[1] + 1)
+
+
+def _pairwise_iou(
+    boxes: np.ndarray,
+    box_areas: np.ndarray,
+    coords: np.ndarray,
+    areas: np.ndarray,
+) -> np.ndarray:
+    """
+    Calculates the IoU between boxes and other boxes of the same frames.
+
+    Boxes are given as coordinate planes (x_min, y_min, x_max, y_max) so that
+    every operation runs on contiguous rows. Uses the same inclusive pixel
+    convention as `calculate_iou`.
+
+    Args:
+        boxes (np.ndarray): (4, ..., M) coordinates of M boxes per frame.
+        box_areas (np.ndarray): (..., M) areas of the boxes.
+        coords (np.ndarray): (4, ..., K) coordinates of K boxes per frame.
+        areas (np.ndarray): (..., K) areas of the other boxes.
+
+    Returns:
+        iou (np.ndarray): (..., M, K) IoU.
+    """
+    boxes = boxes[..., None]
+    coords = coords[..., None, :]
+    widths = np.minimum(coords[2], boxes[2])
+    widths -= np.maximum(coords[0], boxes[0]) - 1
+    heights = np.minimum(coords[3], boxes[3])
+    heights -= np.maximum(coords[1], boxes[1]) - 1
+    np.clip(widths, 0, None, out=widths)
+    np.clip(heights, 0, None, out=heights)
+    intersection_area = widths * heights
+    return intersection_area / (
+        box_areas[..., None] + areas[..., None, :] - intersection_area
+    )
+
+
+def _pad_batch(boxes_list, scores_list, classes_list, class_agnostic):
+    """
+    Stack the boxes of several frames into padded arrays.
+
+    Args:
+        boxes_list (list(np.ndarray or BoxArray)): (N_i, 4) xyxy boxes of each frame.
+        scores_list (list(np.ndarray), optional): (N_i,) scores of each frame.
+        classes_list (list(np.ndarray), optional): (N_i,) class ids of each frame.
+        class_agnostic (bool): Whether to ignore the classes.
+
+    Returns:
+        coords (np.ndarray): (4, B, N) coordinate planes x_min, y_min, x_max, y_max.
+        scores (np.ndarray): (B, N) scores.
+        classes (np.ndarray): (B, N) class ids.
+        valid (np.ndarray): (B, N) mask of the real boxes.
+    """
+    num_frames = len(boxes_list)
+    lengths = [len(boxes) for boxes in boxes_list]
+    num_boxes = max(lengths, default=0)
+    coords = np.zeros((4, num_frames, num_boxes))
+    scores = np.zeros((num_frames, num_boxes))
+    classes = np.zeros((num_frames, num_boxes), dtype=np.int64)
+    valid = np.arange(num_boxes)[None, :] < np.array(lengths)[:, None]
+
+    for frame_index, boxes in enumerate(boxes_list):
+        frame_scores = (
+            None if scores_list is None else scores_list[frame_index]
+        )
+        frame_classes = (
+            None if classes_list is None else classes_list[frame_index]
+        )
+        if isinstance(boxes, BoxArray):
+            if frame_scores is None:
+                frame_scores = boxes.scores
+            if frame_classes is None:
+                frame_classes = boxes.classes
+        if frame_scores is None:
+            raise ValueError("Scores are required to suppress boxes.")
+
+        length = lengths[frame_index]
+        coords[:, frame_index, :length] = np.asarray(boxes).reshape(-1, 4).T
+        scores[frame_index, :length] = frame_scores
+        if frame_classes is not None and not class_agnostic:
+            classes[frame_index, :length] = frame_classes
+
+    return coords, scores, classes, valid
+
+
+def _sort_batch(coords, scores, classes, active):
+    """
+    Sort the boxes of each frame by decreasing score, inactive boxes last.
+
+    Returns:
+        tuple: The sorted coords, scores, classes and active arrays, and the sorting order.
+    """
+    order = np.argsort(
+        -np.where(active, scores, -np.inf), axis=1, kind="stable"
+    )
+    return (
+        np.take_along_axis(coords, order[None], axis=2),
+        np.take_along_axis(scores, order, axis=1),
+        np.take_along_axis(classes, order, axis=1),
+        np.take_along_axis(active, order, axis=1),
+        order,
+    )
+
+
+def _nms_batch(
+    coords,
+    scores,
+    classes,
+    valid,
+    iou_threshold,
+    score_threshold,
+    max_detections,
+    max_block_elements=2**15,
+    max_chunk_boxes=2**11,
+):
+    """
+    Greedy NMS of all frames at once, see `batched_nms`.
+
+    Boxes are sorted by score once. The suppression matrix between a block of
+    boxes and the following boxes is computed in one vectorized pass, then the
+    greedy selection only combines boolean rows, for all frames together.
+
+    Frames are processed in chunks of at most max_chunk_boxes boxes: a box
+    still active in any frame of a chunk is compared in all of them, so
+    large chunks of crowded frames compute mostly useless IoUs.
+    """
+    num_frames, num_boxes = scores.shape
+    chunk_size = max(1, max_chunk_boxes // max(1, num_boxes))
+    if num_frames > chunk_size:
+        return [
+            indices
+            for start in range(0, num_frames, chunk_size)
+            for indices in _nms_batch(
+                coords[:, start : start + chunk_size],
+                scores[start : start + chunk_size],
+                classes[start : start + chunk_size],
+                valid[start : start + chunk_size],
+                iou_threshold,
+                score_threshold,
+                max_detections,
+                max_block_elements,
+                max_chunk_boxes,
+            )
+        ]
+
+    active = valid & (scores >= score_threshold)
+    coords, scores, classes, active, order = _sort_batch(
+        coords, scores, classes, active
+    )
+    areas = _get_areas(coords)
+    keep = np.zeros((num_frames, num_boxes), dtype=bool)
+    counts = np.zeros(num_frames, dtype=np.int64)
+    # small blocks keep the suppression matrix of a block in the CPU cache,
+    # and skip the rows suppressed by the previous blocks. With chunks of at
+    # most max_chunk_boxes boxes, blocks have at least 16 rows
+    block_size = max(1, max_block_elements // max(1, num_frames * num_boxes))
+
+    for start in range(0, num_boxes, block_size):
+        end = min(start + block_size, num_boxes)
+        remaining = active[:, start:]
+        if not remaining.any():
+            break
+        positions = np.flatnonzero(remaining[:, : end - start].any(axis=0))
+        if not len(positions):
+            continue
+
+        # only the boxes still active in a frame can suppress other boxes
+        rows = start + positions
+        ious = _pairwise_iou(
+            coords[:, :, rows],
+            areas[:, rows],
+            coords[:, :, start:],
+            areas[:, start:],
+        )
+        suppressed = (ious > iou_threshold) & (
+            classes[:, rows, None] == classes[:, None, start:]
+        )
+
+        for row_index, position in enumerate(positions):
+            kept = remaining[:, position]
+            if not kept.any():
+                continue
+            kept = kept.copy()
+            keep[:, start + position] = kept
+            # a kept box suppresses itself, its IoU being 1
+            remaining &= ~(suppressed[:, row_index] & kept[:, None])
+            if max_detections is not None:
+                counts += kept
+                remaining[counts >= max_detections] = False
+
+    return [order[row][keep[row]] for row in range(num_frames)]
+
+
+def batched_nms(
+    boxes_list: List[Union[np.ndarray, BoxArray]],
+    scores_list: Optional[List[np.ndarray]] = None,
+    classes_list: Optional[List[np.ndarray]] = None,
+    iou_threshold: float = 0.5,
+    class_agnostic: bool = False,
+    score_threshold: float = 0,
+    max_detections: Optional[int] = None,
+) -> List[np.ndarray]:
+    """
+    Non-maximum suppression of several frames at once, see `nms`.
+
+    Args:
+        boxes_list (list(np.ndarray or BoxArray)): (N_i, 4) xyxy boxes of each frame.
+        scores_list (list(np.ndarray), optional): (N_i,) scores of each frame.
+        classes_list (list(np.ndarray), optional): (N_i,) class ids of each frame.
+        iou_threshold (float): Boxes with a higher IoU than a kept box are suppressed.
+        class_agnostic (bool): Whether boxes of different classes suppress each other.
+        score_threshold (float): Boxes with a lower score are dropped first.
+        max_detections (int, optional): Maximum number of kept boxes per frame.
+
+    Returns:
+        list(np.ndarray): Indices of the kept boxes of each frame, by decreasing score.
+    """
+    coords, scores, classes, valid = _pad_batch(
+        boxes_list, scores_list, classes_list, class_agnostic
+    )
+    return _nms_batch(
+        coords,
+        scores,
+        classes,
+        valid,
+        iou_threshold,
+        score_threshold,
+        max_detections,
+    )
+
+
+def nms(
+    boxes: Union[np.ndarray, BoxArray],
+    scores: Optional[np.ndarray] = None,
+    classes: Optional[np.ndarray] = None,
+    iou_threshold: float = 0.5,
+    class_agnostic: bool = False,
+    score_threshold: float = 0,
+    max_detections: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Non-maximum suppression: keeps the best boxes and removes the boxes overlapping them.
+
+    Boxes are sorted by score once, and their IoUs are computed in blocks of
+    vectorized operations instead of one box pair at a time.
+
+    Args:
+        boxes (np.ndarray or BoxArray): (N, 4) xyxy boxes. The scores and classes
+            of a BoxArray are used when not given.
+        scores (np.ndarray, optional): (N,) scores of the boxes.
+        classes (np.ndarray, optional): (N,) class ids. Boxes of different classes
+            do not suppress each other.
+        iou_threshold (float): Boxes with a higher IoU than a kept box are suppressed.
+        class_agnostic (bool): Whether boxes of different classes suppress each other.
+        score_threshold (float): Boxes with a lower score are dropped first.
+        max_detections (int, optional): Maximum number of kept boxes. NMS stops early when reached.
+
+    Returns:
+        indices (np.ndarray): Indices of the kept boxes, by decreasing score.
+    """
+    return batched_nms(
+        [boxes],
+        None if scores is None else [scores],
+        None if classes is None else [classes],
+        iou_threshold,
+        class_agnostic,
+        score_threshold,
+        max_detections,
+    )[0]
+
+
+def _soft_nms_batch(
+    coords,
+    scores,
+    classes,
+    valid,
+    iou_threshold,
+    sigma,
+    method,
+    score_threshold,
+):
+    """
+    Soft-NMS of all frames at once, see `batched_soft_nms`.
+    """
+    if method not in ["gaussian", "linear"]:
+        raise ValueError(
+            "Invalid soft-NMS method. Use 'gaussian' or 'linear'."
+        )
+
+    scores = scores.copy()
+    active = valid & (scores >= score_threshold)
+    areas = _get_areas(coords)
+    num_frames = len(scores)
+    rows = np.arange(num_frames)
+    kept_rows, kept_indices, kept_scores = list(), list(), list()
+
+    while True:
+        rows_with_boxes = rows[active.any(axis=1)]
+        if not len(rows_with_boxes):
+            break
+
+        indices = np.argmax(
+            np.where(
+                active[rows_with_boxes], scores[rows_with_boxes], -np.inf
+            ),
+            axis=1,
+        )
+        kept_rows.append(rows_with_boxes)
+        kept_indices.append(indices)
+        kept_scores.append(scores[rows_with_boxes, indices])
+        active[rows_with_boxes, indices] = False
+
+        ious = _pairwise_iou(
+            coords[:, rows_with_boxes, indices, None],
+            areas[rows_with_boxes, indices, None],
+            coords[:, rows_with_boxes],
+            areas[rows_with_boxes],
+        )[:, 0]
+        if method == "linear":
+            decays = np.where(ious > iou_threshold, 1 - ious, 1)
+        else:
+            decays = np.exp(-(ious**2) / sigma)
+        same_class = (
+            classes[rows_with_boxes]
+            == classes[rows_with_boxes, indices][:, None]
+        )
+        scores[rows_with_boxes] *= np.where(same_class, decays, 1)
+        active[rows_with_boxes] &= scores[rows_with_boxes] >= score_threshold
+
+    if not kept_rows:
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0))
+        return [empty] * num_frames
+
+    kept_rows = np.concatenate(kept_rows)
+    kept_indices = np.concatenate(kept_indices)
+    kept_scores = np.concatenate(kept_scores)
+    # split by frame, keeping the order in which the boxes were kept
+    order = np.argsort(kept_rows, kind="stable")
+    splits = np.cumsum(np.bincount(kept_rows, minlength=num_frames))[:-1]
+    return list(
+        zip(
+            np.split(kept_indices[order], splits),
+            np.split(kept_scores[order], splits),
+        )
+    )
+
+
+def batched_soft_nms(
+    boxes_list: List[Union[np.ndarray, BoxArray]],
+    scores_list: Optional[List[np.ndarray]] = None,
+    classes_list: Optional[List[np.ndarray]] = None,
+    iou_threshold: float = 0.3,
+    sigma: float = 0.5,
+    method: str = "gaussian",
+    class_agnostic: bool = False,
+    score_threshold: float = 0.001,
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Soft-NMS of several frames at once, see `soft_nms`.
+
+    Args:
+        boxes_list (list(np.ndarray or BoxArray)): (N_i, 4) xyxy boxes of each frame.
+        scores_list (list(np.ndarray), optional): (N_i,) scores of each frame.
+        classes_list (list(np.ndarray), optional): (N_i,) class ids of each frame.
+        iou_threshold (float): IoU above which scores decay with the "linear" method.
+        sigma (float): Spread of the "gaussian" decay exp(-iou^2 / sigma).
+        method (str): Decay method, "gaussian" or "linear".
+        class_agnostic (bool): Whether boxes of different classes decay each other.
+        score_threshold (float): Boxes are dropped when their score falls below it.
+
+    Returns:
+        list(tuple): (indices, decayed scores) of the kept boxes of each frame.
+    """
+    coords, scores, classes, valid = _pad_batch(
+        boxes_list, scores_list, classes_list, class_agnostic
+    )
+    return _soft_nms_batch(
+        coords,
+        scores,
+        classes,
+        valid,
+        iou_threshold,
+        sigma,
+        method,
+        score_threshold,
+    )
+
+
+def soft_nms(
+    boxes: Union[np.ndarray, BoxArray],
+    scores: Optional[np.ndarray] = None,
+    classes: Optional[np.ndarray] = None,
+    iou_threshold: float = 0.3,
+    sigma: float = 0.5,
+    method: str = "gaussian",
+    class_agnostic: bool = False,
+    score_threshold: float = 0.001,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Soft-NMS: decays the scores of the boxes overlapping a kept box instead of removing them.
+
+    Args:
+        boxes (np.ndarray or BoxArray): (N, 4) xyxy boxes. The scores and classes
+            of a BoxArray are used when not given.
+        scores (np.ndarray, optional): (N,) scores of the boxes.
+        classes (np.ndarray, optional): (N,) class ids. Boxes of different classes
+            do not decay each other.
+        iou_threshold (float): IoU above which scores decay with the "linear" method.
+        sigma (float): Spread of the "gaussian" decay exp(-iou^2 / sigma).
+        method (str): Decay method, "gaussian" or "linear".
+        class_agnostic (bool): Whether boxes of different classes decay each other.
+        score_threshold (float): Boxes are dropped when their score falls below it.
+
+    Returns:
+        indices (np.ndarray): Indices of the kept boxes, by decreasing decayed score.
+        scores (np.ndarray): Decayed scores of the kept boxes.
+    """
+    return batched_soft_nms(
+        [boxes],
+        None if scores is None else [scores],
+        None if classes is None else [classes],
+        iou_threshold,
+        sigma,
+        method,
+        class_agnostic,
+        score_threshold,
+    )[0]
+
+
+def _weighted_box_fusion_batch(
+    coords, scores, classes, valid, iou_threshold, score_threshold, num_models
+):
+    """
+    Weighted box fusion of all frames at once, see `batched_weighted_box_fusion`.
+
+    The clusters are seeded by the boxes kept by NMS, computed with the
+    blocked kernel of `batched_nms`. Every box joins the cluster it overlaps
+    the most among the clusters of its class seeded by a box with a higher
+    or equal score, from one IoU matrix per frame, and the fused boxes are
+    built with scatter-adds. Seeds overlapping the fused box of a better
+    cluster are then merged into it and the boxes matched again against the
+    fused boxes, as the one box at a time algorithm would, which takes one
+    or two passes.
+    """
+    seeds_list = _nms_batch(
+        coords,
+        scores,
+        classes,
+        valid,
+        iou_threshold,
+        score_threshold,
+        None,
+    )
+    active = valid & (scores >= score_threshold)
+
+    results = list()
+    for row, seeds in enumerate(seeds_list):
+        members = np.flatnonzero(active[row])
+        if not len(members):
+            results.append(
+                (np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=np.int64))
+            )
+            continue
+        member_coords = coords[:, row, members]
+        member_areas = _get_areas(member_coords)
+        member_scores = scores[row, members]
+        member_classes = classes[row, members]
+        # position of every box in the order of NMS
+        ranks = np.empty(len(members), dtype=np.int64)
+        ranks[np.argsort(-member_scores, kind="stable")] = np.arange(
+            len(members)
+        )
+        seeds = np.searchsorted(members, seeds)
+        cluster_coords = member_coords[:, seeds]
+
+        while True:
+            ious = _pairwise_iou(
+                member_coords,
+                member_areas,
+                cluster_coords,
+                _get_areas(cluster_coords),
+            )
+            candidates = (
+                member_classes[:, None] == member_classes[seeds][None, :]
+            ) & (ranks[:, None] >= ranks[seeds][None, :])
+            ious[~candidates] = -1
+            # a seed stays in its own cluster
+            ious[seeds, np.arange(len(seeds))] = np.inf
+            clusters = np.argmax(ious, axis=1)
+
+            weighted_sums = np.zeros((len(seeds), 4))
+            np.add.at(
+                weighted_sums,
+                clusters,
+                member_scores[:, None] * member_coords.T,
+            )
+            score_sums = np.bincount(
+                clusters, member_scores, minlength=len(seeds)
+            )
+            fused_coords = (weighted_sums / score_sums[:, None]).T
+
+            absorbed = _pairwise_iou(
+                member_coords[:, seeds],
+                member_areas[seeds],
+                fused_coords,
+                _get_areas(fused_coords),
+            )
+            absorbed[
+                (member_classes[seeds][:, None] != member_classes[seeds])
+                | (ranks[seeds][:, None] <= ranks[seeds])
+            ] = -1
+            is_absorbed = (absorbed > iou_threshold).any(axis=1)
+            if not is_absorbed.any():
+                break
+            seeds = seeds[~is_absorbed]
+            cluster_coords = fused_coords[:, ~is_absorbed]
+
+        counts = np.bincount(clusters, minlength=len(seeds))
+        fused_scores = (
+            score_sums / counts * np.minimum(counts, num_models) / num_models
+        )
+        results.append((fused_coords.T, fused_scores, member_classes[seeds]))
+    return results
+
+
+def batched_weighted_box_fusion(
+    boxes_list: List[Union[np.ndarray, BoxArray]],
+    scores_list: Optional[List[np.ndarray]] = None,
+    classes_list: Optional[List[np.ndarray]] = None,
+    iou_threshold: float = 0.55,
+    class_agnostic: bool = False,
+    score_threshold: float = 0,
+    num_models: int = 1,
+) -> List[BoxArray]:
+    """
+    Weighted box fusion of several frames at once, see `weighted_box_fusion`.
+
+    Args:
+        boxes_list (list(np.ndarray or BoxArray)): (N_i, 4) xyxy boxes of each frame.
+        scores_list (list(np.ndarray), optional): (N_i,) scores of each frame.
+        classes_list (list(np.ndarray), optional): (N_i,) class ids of each frame.
+        iou_threshold (float): Boxes with a higher IoU than a fused box are merged into it.
+        class_agnostic (bool): Whether boxes of different classes are fused together.
+        score_threshold (float): Boxes with a lower score are ignored.
+        num_models (int): Number of models the boxes come from.
+
+    Returns:
+        list(BoxArray): The fused boxes of each frame with their scores and classes.
+    """
+    coords, scores, classes, valid = _pad_batch(
+        boxes_list, scores_list, classes_list, class_agnostic
+    )
+    results = _weighted_box_fusion_batch(
+        coords,
+        scores,
+        classes,
+        valid,
+        iou_threshold,
+        score_threshold,
+        num_models,
+    )
+    return [
+        BoxArray(
+            fused_xyxy,
+            classes=None if class_agnostic else fused_classes,
+            scores=fused_scores,
+            image_size=getattr(boxes, "image_size", None),
+        )
+        for boxes, (fused_xyxy, fused_scores, fused_classes) in zip(
+            boxes_list, results
+        )
+    ]
+
+
+def weighted_box_fusion(
+    boxes: Union[np.ndarray, BoxArray],
+    scores: Optional[np.ndarray] = None,
+    classes: Optional[np.ndarray] = None,
+    iou_threshold: float = 0.55,
+    class_agnostic: bool = False,
+    score_threshold: float = 0,
+    num_models: int = 1,
+) -> BoxArray:
+    """
+    Weighted box fusion: merges overlapping boxes into their score-weighted average instead of removing them.
+
+    Clusters are seeded by NMS, and each box joins the overlapping cluster of
+    its class with the best seed, with vectorized passes over all the boxes.
+    This follows the original algorithm matching the boxes one at a time
+    against the running fused boxes, which can give slightly different
+    clusters when boxes overlap several of them.
+
+    To fuse the outputs of several models, concatenate their boxes and set `num_models`.
+
+    Args:
+        boxes (np.ndarray or BoxArray): (N, 4) xyxy boxes. The scores and classes
+            of a BoxArray are used when not given.
+        scores (np.ndarray, optional): (N,) scores of the boxes.
+        classes (np.ndarray, optional): (N,) class ids. Boxes of different classes are not fused.
+        iou_threshold (float): Boxes with a higher IoU than a fused box are merged into it.
+        class_agnostic (bool): Whether boxes of different classes are fused together.
+        score_threshold (float): Boxes with a lower score are ignored.
+        num_models (int): Number of models the boxes come from. Scores of boxes
+            fused from fewer boxes than models are lowered.
+
+    Returns:
+        BoxArray: The fused boxes with their scores and classes.
+    """
+    return batched_weighted_box_fusion(
+        [boxes],
+        None if scores is None else [scores],
+        None if classes is None else [classes],
+        iou_threshold,
+        class_agnostic,
+        score_threshold,
+        num_models,
+    )[0]
+
+
 class FailedDetectionTypes:
     UnmatchedLabels = 0
     Nothing = 1
@@ -181,30 +872,53 @@ class FailedDetectionTypes:
         print(cls.message_dict[id])
 
 
+def _get_classes_and_xyxy(boxes):
+    """
+    Get the classes and xyxy boxes of a BoxArray or of a list of label dicts.
+    """
+    if isinstance(boxes, BoxArray):
+        return boxes.classes, boxes.xyxy
+    classes = np.array([box["class"] for box in boxes], dtype=np.int64)
+    xyxy = np.array([box["xyxy"] for box in boxes], dtype=np.float64)
+    return classes, xyxy.reshape(-1, 4)
+
+
 def get_failed_detected_results(labels, predictions, iou_threshold=0.5):
+    """
+    Checks whether predictions match the ground truth labels of an image.
+
+    Each label is greedily matched with the unmatched prediction of the same
+    class with the highest IoU.
+
+    Args:
+        labels (list(dict) or BoxArray): Ground truth boxes, dicts need "class" and "xyxy".
+        predictions (list(dict) or BoxArray): Predicted boxes, dicts need "class" and "xyxy".
+        iou_threshold (float): Minimum IoU of a match.
+
+    Returns:
+        int: One of the FailedDetectionTypes values.
+    """
     if len(labels) != len(predictions):
         return FailedDetectionTypes.UnmatchedLabels
 
-    checked_prediction_indicies = list()
-
-    for label in labels:
-        index = 0
-        max_iou = 0
-        for i, pred in enumerate(predictions):
-            if (
-                pred["class"] == label["class"]
-                and i not in checked_prediction_indicies
-            ):
-                iou = calculate_iou(label["xyxy"], pred["xyxy"])
-                if iou > max_iou:
-                    max_iou = iou
-                    index = i
-
-        if index in checked_prediction_indicies:
+    label_classes, label_xyxy = _get_classes_and_xyxy(labels)
+    pred_classes, pred_xyxy = _get_classes_and_xyxy(predictions)
+    iou_matrix = np.nan_to_num(calculate_iou_matrix(label_xyxy, pred_xyxy))
+    iou_matrix[label_classes[:, None] != pred_classes[None, :]] = 0
+
+    checked = np.zeros(len(predictions), dtype=bool)
+
+    for ious in iou_matrix:
+        ious = np.where(checked, 0, ious)
+        index = int(np.argmax(ious))
+        max_iou = ious[index]
+        if max_iou <= 0:
+            index, max_iou = 0, 0
+        if checked[index]:
             return FailedDetectionTypes.UnmatchedLabels
         if max_iou < iou_threshold:
             return FailedDetectionTypes.BelowIoUThreshold
 
-        checked_prediction_indicies.append(index)
+        checked[index] = True
 
     return FailedDetectionTypes.Nothing
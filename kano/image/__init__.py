@@ -1,10 +1,21 @@
+from kano.image.cache import (
+    ImageCache,
+    disable_image_cache,
+    enable_image_cache,
+    get_image_cache,
+    read_image,
+    read_reduced_image,
+    read_thumbnail,
+)
 from kano.image.draw import Location, add_text, calculate_text_coordinates
 from kano.image.process import (
     concatenate_images,
+    letterbox_image,
     pad_image,
     resize_with_black_padding,
     rotate_image,
     shift_image,
+    unletterbox_boxes,
 )
 from kano.image.utils import (
     download_image,
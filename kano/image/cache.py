@@ -0,0 +1,327 @@
+import hashlib
+import os
+import struct
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class ImageCache:
+    """
+    Least recently used cache of decoded images bounded by their total size.
+
+    Images are keyed by their path and decoding flags, and decoded again
+    when the modification time or the size of their file changed. Cached
+    images are returned read-only so that callers cannot alter them.
+
+    Attributes:
+        max_bytes (int): Maximum total size of the cached images.
+        num_bytes (int): Current total size of the cached images.
+        hits (int): Number of reads served from the cache.
+        misses (int): Number of reads decoding the file.
+        evictions (int): Number of images evicted to respect max_bytes.
+        invalidations (int): Number of cached images decoded again because
+            their file changed.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 2**20) -> None:
+        """
+        Initialize an ImageCache object.
+
+        Args:
+            max_bytes (int): Maximum total size of the cached images in bytes,
+                larger images are never cached.
+        """
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive.")
+        self.max_bytes = max_bytes
+        self.num_bytes = 0
+        self._entries = OrderedDict()
+        # the decoding threads of YoloLoader share the cache
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def reset_stats(self) -> None:
+        """
+        Reset the hit, miss, eviction and invalidation counters.
+        """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def clear(self) -> None:
+        """
+        Remove all the cached images.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.num_bytes = 0
+
+    def read(
+        self, image_path: str, flags: int = cv2.IMREAD_COLOR
+    ) -> Optional[np.ndarray]:
+        """
+        Read an image from the cache, or decode and cache it.
+
+        Args:
+            image_path (str): Path to the image file.
+            flags (int): Flags of `cv2.imread`.
+
+        Returns:
+            image (np.ndarray): Read-only decoded image, None if the file cannot
+                be read.
+        """
+        key = (os.fspath(image_path), flags)
+        try:
+            stat = os.stat(key[0])
+        except OSError:
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == version:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self.invalidations += 1
+                self._remove(key)
+            self.misses += 1
+
+        # decoding releases the GIL, other threads keep using the cache
+        image = cv2.imread(key[0], flags)
+        if image is None or image.nbytes > self.max_bytes:
+            return image
+        image.flags.writeable = False
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (version, image)
+            self.num_bytes += image.nbytes
+            while self.num_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return image
+
+    def _remove(self, key: tuple) -> None:
+        _, image = self._entries.pop(key)
+        self.num_bytes -= image.nbytes
+
+    def get_stats(self) -> dict:
+        """
+        Get the statistics of the cache.
+
+        Returns:
+            stats (dict): Dict with keys "hits", "misses", "hit_rate", "evictions",
+                "invalidations", "entries" and "mib".
+        """
+        num_reads = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / num_reads if num_reads else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+            "mib": self.num_bytes / 1024**2,
+        }
+
+
+_image_cache = None
+
+
+def enable_image_cache(max_bytes: int = 512 * 2**20) -> ImageCache:
+    """
+    Enable the cache shared by the functions reading images from a path, e.g.
+    `YoloImage`, `draw_bbox`, `draw_skeletons` and `show_image`.
+
+    Args:
+        max_bytes (int): Maximum total size of the cached images in bytes.
+
+    Returns:
+        image_cache (ImageCache): The new shared cache.
+    """
+    global _image_cache
+    _image_cache = ImageCache(max_bytes)
+    return _image_cache
+
+
+def disable_image_cache() -> None:
+    """
+    Disable the shared image cache and free its images.
+    """
+    global _image_cache
+    _image_cache = None
+
+
+def get_image_cache() -> Optional[ImageCache]:
+    """
+    Get the shared image cache.
+
+    Returns:
+        image_cache (ImageCache): The shared cache, None if it is disabled.
+    """
+    return _image_cache
+
+
+def read_image(
+    image_path: str, flags: int = cv2.IMREAD_COLOR, copy: bool = False
+) -> Optional[np.ndarray]:
+    """
+    Read an image through the shared cache if it is enabled.
+
+    Args:
+        image_path (str): Path to the image file.
+        flags (int): Flags of `cv2.imread`.
+        copy (bool): Return a writable copy of a cached image if True,
+            otherwise the read-only cached image.
+
+    Returns:
+        image (np.ndarray): The decoded image, None if the file cannot be read.
+    """
+    image_cache = _image_cache
+    if image_cache is None:
+        return cv2.imread(os.fspath(image_path), flags)
+    image = image_cache.read(image_path, flags)
+    if copy and image is not None and not image.flags.writeable:
+        image = image.copy()
+    return image
+
+
+# decoding flags of every reduction factor, JPEG images are decoded directly
+# at the reduced resolution
+REDUCED_COLOR_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# start of frame markers holding the size of a JPEG image
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _get_jpeg_size(image_bytes: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Get the (height, width) of a JPEG image from its headers, without decoding it.
+
+    Returns:
+        size (tuple(int, int)): (height, width), None if it is not a JPEG image.
+    """
+    if image_bytes[:2] != b"\xff\xd8":
+        return None
+    position = 2
+    while position + 9 <= len(image_bytes):
+        if image_bytes[position] != 0xFF:
+            return None
+        marker = image_bytes[position + 1]
+        if marker == 0xFF:
+            # fill byte before a marker
+            position += 1
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            return struct.unpack(
+                ">HH", image_bytes[position + 5 : position + 9]
+            )
+        (length,) = struct.unpack(
+            ">H", image_bytes[position + 2 : position + 4]
+        )
+        position += 2 + length
+    return None
+
+
+def _decode_reduced(image_bytes: bytes, max_size: int) -> Optional[np.ndarray]:
+    # only JPEG images are faster to decode at a reduced resolution
+    reduction = 1
+    size = _get_jpeg_size(image_bytes)
+    if size is not None:
+        while reduction < 8 and max(size) / (reduction * 2) >= max_size:
+            reduction *= 2
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    image = cv2.imdecode(buffer, REDUCED_COLOR_FLAGS[reduction])
+    if image is None:
+        return None
+
+    height, width = image.shape[:2]
+    ratio = max_size / max(height, width)
+    if ratio < 1:
+        new_size = (
+            max(round(width * ratio), 1),
+            max(round(height * ratio), 1),
+        )
+        image = cv2.resize(image, new_size, interpolation=cv2.INTER_AREA)
+    return image
+
+
+def read_reduced_image(image_path: str, max_size: int) -> Optional[np.ndarray]:
+    """
+    Read a color image with its longer side reduced to at most max_size pixels.
+
+    JPEG images are decoded at the smallest of 1/2, 1/4 or 1/8 resolution
+    still larger than max_size, read from their headers. The decoded image
+    is then resized to fit max_size.
+
+    Args:
+        image_path (str): Path to the image file.
+        max_size (int): Maximum width and height of the image.
+
+    Returns:
+        image (np.ndarray): The reduced image, None if the file cannot be read.
+    """
+    try:
+        image_bytes = Path(image_path).read_bytes()
+    except OSError:
+        return None
+    return _decode_reduced(image_bytes, max_size)
+
+
+def read_thumbnail(
+    image_path: str, max_size: int = 512, cache_dir: Optional[str] = None
+) -> Optional[np.ndarray]:
+    """
+    Read a reduced image through an on-disk cache of thumbnails.
+
+    Thumbnails are JPEG files named by the hash of the content of the
+    image and max_size, so they stay valid when images are moved or
+    renamed, and are not used when an image changes.
+
+    Args:
+        image_path (str): Path to the image file.
+        max_size (int): Maximum width and height of the thumbnail.
+        cache_dir (str, optional): Folder of the thumbnails. Default reads the
+            reduced image without caching it.
+
+    Returns:
+        image (np.ndarray): The thumbnail, None if the file cannot be read.
+    """
+    if cache_dir is None:
+        return read_reduced_image(image_path, max_size)
+    try:
+        image_bytes = Path(image_path).read_bytes()
+    except OSError:
+        return None
+    key = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+    thumbnail_path = Path(cache_dir) / f"{key}_{max_size}.jpg"
+    if thumbnail_path.exists():
+        thumbnail = cv2.imread(str(thumbnail_path))
+        if thumbnail is not None:
+            return thumbnail
+
+    thumbnail = _decode_reduced(image_bytes, max_size)
+    if thumbnail is not None:
+        # written under a temporary name so readers never see partial files
+        thumbnail_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = thumbnail_path.with_name(f".{os.getpid()}_{key}.jpg")
+        if cv2.imwrite(str(temp_path), thumbnail):
+            os.replace(temp_path, thumbnail_path)
+    return thumbnail
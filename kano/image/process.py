@@ -1,5 +1,5 @@
 import copy
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple, Union
 
 import cv2
 import numpy as np
@@ -46,7 +46,10 @@ def rotate_image(
 def resize_with_black_padding(
     image: np.ndarray, new_height: int, new_width: int
 ) -> np.ndarray:
-    """Resize the image with black padding to fit new dimensions."""
+    """
+    Pad the image with black at the bottom and the right to fit new dimensions,
+    without resizing it. Use `letterbox_image` to resize and pad images.
+    """
     original_height, original_width = image.shape[:2]
 
     if len(image.shape) == 3:
@@ -61,6 +64,116 @@ def resize_with_black_padding(
     return padded_image
 
 
+def _letterbox_into(
+    image: np.ndarray,
+    out: np.ndarray,
+    pad_value: int,
+    center: bool,
+    interpolation: int,
+) -> Tuple[float, float, int, int]:
+    height, width = image.shape[:2]
+    out_height, out_width = out.shape[:2]
+    ratio = min(out_height / height, out_width / width)
+    new_width = min(int(round(width * ratio)), out_width)
+    new_height = min(int(round(height * ratio)), out_height)
+    left, top = 0, 0
+    if center:
+        left = (out_width - new_width) // 2
+        top = (out_height - new_height) // 2
+
+    if (new_height, new_width) != (height, width):
+        image = cv2.resize(
+            image, (new_width, new_height), interpolation=interpolation
+        )
+    # only the padding is filled, the resized image is written once
+    out[:top] = pad_value
+    out[top + new_height :] = pad_value
+    out[top : top + new_height, :left] = pad_value
+    out[top : top + new_height, left + new_width :] = pad_value
+    out[top : top + new_height, left : left + new_width] = image
+    return new_width / width, new_height / height, left, top
+
+
+def letterbox_image(
+    image: Union[np.ndarray, Sequence[np.ndarray]],
+    size: Optional[Tuple[int, int]] = None,
+    out: Optional[np.ndarray] = None,
+    pad_value: int = 114,
+    center: bool = True,
+    interpolation: int = cv2.INTER_LINEAR,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Resize images keeping their aspect ratio and pad them to a fixed size.
+
+    Args:
+        image (np.ndarray or list(np.ndarray)): An image, or a batch of images
+            as a list or a (B, h, w, C) array, which can have different sizes.
+        size (tuple(int, int), optional): (height, width) of the output images,
+            required if `out` is not given.
+        out (np.ndarray, optional): Output buffer of shape (H, W, C), or
+            (B, H, W, C) for a batch, reused from call to call.
+        pad_value (int): Value of the padding pixels.
+        center (bool): Center the resized images between the padding if True,
+            otherwise put them in the top-left corner.
+        interpolation (int): OpenCV interpolation of the resizing.
+
+    Returns:
+        letterboxed (np.ndarray): The letterboxed image or batch, `out` if given.
+        params (np.ndarray): (4,) float32 (scale_x, scale_y, left, top) of the
+            image, or (B, 4) for a batch, see `unletterbox_boxes`.
+    """
+    is_batch = not isinstance(image, np.ndarray) or image.ndim == 4
+    images = image if is_batch else [image]
+    if out is None:
+        if size is None:
+            raise ValueError("Either size or out must be given.")
+        out = np.empty(
+            (len(images), *size, *images[0].shape[2:]), dtype=images[0].dtype
+        )
+    elif not is_batch:
+        out = out[None]
+    if len(out) != len(images):
+        raise ValueError("The output buffer does not match the batch size.")
+
+    params = np.array(
+        [
+            _letterbox_into(image, out_image, pad_value, center, interpolation)
+            for image, out_image in zip(images, out)
+        ],
+        dtype=np.float32,
+    ).reshape(-1, 4)
+    if not is_batch:
+        return out[0], params[0]
+    return out, params
+
+
+def unletterbox_boxes(
+    xyxy: np.ndarray,
+    params: np.ndarray,
+    batch_ids: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Map boxes of letterboxed images back to the original images.
+
+    Args:
+        xyxy (np.ndarray): (N, 4) boxes in pixels of the letterboxed images.
+        params (np.ndarray): (4,) or (B, 4) params returned by `letterbox_image`.
+        batch_ids (np.ndarray, optional): (N,) index in the batch of the image of
+            every box, required for the params of a batch.
+
+    Returns:
+        xyxy (np.ndarray): (N, 4) float32 boxes in pixels of the original images.
+    """
+    params = np.asarray(params, dtype=np.float32)
+    if params.ndim == 2:
+        if batch_ids is None:
+            raise ValueError("batch_ids is required for a batch.")
+        params = params[batch_ids]
+    scales = np.tile(params[..., :2], 2)
+    pads = np.tile(params[..., 2:], 2)
+    return (np.asarray(xyxy, dtype=np.float32) - pads) / scales
+
+
 def shift_image(
     image: np.ndarray,
     dx: int,
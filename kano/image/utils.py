@@ -2,9 +2,9 @@ from io import BytesIO
 from typing import Optional
 
 import cv2
-import matplotlib.pyplot as plt
 import numpy as np
-import requests
+
+from kano.image.cache import read_image
 
 
 def show_image(image, figsize=(10, 10)):
@@ -16,8 +16,11 @@ def show_image(image, figsize=(10, 10)):
         image (Union[np.ndarray, str]): a numpy array or a file path
         figsize (Tuple[int, int]): (width, height) for image to show
     """
+    # matplotlib is slow to import and only needed for display
+    import matplotlib.pyplot as plt
+
     if isinstance(image, str):
-        temp_image = cv2.imread(image)
+        temp_image = read_image(image)
     else:
         temp_image = image.copy()
 
@@ -44,6 +47,8 @@ def download_image(url, save_path=None):
         image (Union[np.ndarray, NoneType]): return numpy array of the image if
             it's downloaded successfullly. Otherwise return None
     """
+    import requests
+
     response = requests.get(url)
     if response.status_code == 200:
         image_stream = BytesIO(response.content)
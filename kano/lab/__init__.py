@@ -1,3 +1,21 @@
-from kano.lab.box_gen import Box, DetectGen, FakeDetect, LoopType
-from kano.lab.profiler import FPSCounter, FPSProfiler, ResourceProfiler
-from kano.lab.source_reader import VideoStreamer
+from kano.lab.box_gen import (
+    BatchDetectGen,
+    Box,
+    DetectGen,
+    FakeDetect,
+    LoopType,
+    SyntheticDataGen,
+)
+from kano.lab.profiler import (
+    FPSCounter,
+    FPSProfiler,
+    MemoryTracker,
+    ResourceProfiler,
+    SamplingProfiler,
+)
+from kano.lab.source_reader import (
+    CaptureSource,
+    FrameSource,
+    SyntheticSource,
+    VideoStreamer,
+)
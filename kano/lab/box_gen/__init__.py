@@ -1,3 +1,5 @@
+from kano.lab.box_gen.batch_gen import BatchDetectGen
 from kano.lab.box_gen.box import Box
+from kano.lab.box_gen.data_gen import SyntheticDataGen
 from kano.lab.box_gen.detect_gen import DetectGen, LoopType
 from kano.lab.box_gen.fake_detect import FakeDetect
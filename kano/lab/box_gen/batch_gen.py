@@ -0,0 +1,240 @@
+from typing import List, Optional, Union
+
+import numpy as np
+
+from kano.box import BoxArray
+from kano.lab.box_gen.detect_gen import DetectGen, LoopType
+
+
+def _wrap_time(elapsed_time: np.ndarray, period: np.ndarray) -> np.ndarray:
+    """
+    Wraps elapsed times into the interval (0, period], keeping 0 at 0.
+
+    A time equal to a multiple of the period maps to the period itself, so the
+    last box of a loop is shown at the exact end of the loop as in DetectGen.
+
+    Args:
+        elapsed_time (np.ndarray): Non-negative elapsed times.
+        period (np.ndarray): Loop periods, broadcastable to elapsed_time.
+
+    Returns:
+        np.ndarray: The wrapped times.
+    """
+    loops = np.maximum(np.ceil(elapsed_time / period) - 1, 0)
+    return elapsed_time - loops * period
+
+
+class BatchDetectGen:
+    """
+    Evaluates many DetectGen sequences at once with NumPy.
+
+    Every sequence is compiled into piecewise-linear keyframes (width, height,
+    center point) stored in flat arrays, so the boxes of all objects at a given
+    time are computed with one `np.searchsorted` and one interpolation instead
+    of stepping a state machine per object.
+    """
+
+    def __init__(self, detect_gens: List[DetectGen]) -> None:
+        """
+        Initializes the BatchDetectGen object from DetectGen objects.
+
+        Only the configuration of the DetectGen objects is used (boxes,
+        durations, start_after, from_bottom and loop_type), not their state.
+
+        Args:
+            detect_gens (List[DetectGen]): The sequences to evaluate together.
+
+        Raises:
+            ValueError: If no sequence is given or a duration is not positive.
+        """
+        if len(detect_gens) == 0:
+            raise ValueError("Need at least 1 DetectGen")
+
+        keyframes = list()
+        keyframe_times = list()
+        counts = list()
+        for detect_gen in detect_gens:
+            durations = np.asarray(detect_gen.durations, dtype=np.float64)
+            if np.any(durations <= 0):
+                raise ValueError("Durations must be positive.")
+            keyframes.append(
+                [
+                    [box.width, box.height, box.point[0], box.point[1]]
+                    for box in detect_gen.boxes
+                ]
+            )
+            keyframe_times.append(np.concatenate([[0], np.cumsum(durations)]))
+            counts.append(len(detect_gen.boxes))
+
+        self.num_objects = len(detect_gens)
+        self.keyframes = np.concatenate(keyframes).astype(np.float64)
+        self.keyframe_times = np.concatenate(keyframe_times)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.total_durations = self.keyframe_times[self.offsets[1:] - 1]
+        self.start_afters = np.array(
+            [detect_gen.start_after for detect_gen in detect_gens],
+            dtype=np.float64,
+        )
+        self.from_bottom = np.array(
+            [detect_gen.from_bottom for detect_gen in detect_gens]
+        )
+        self.loop_types = np.array(
+            [detect_gen.loop_type.value for detect_gen in detect_gens]
+        )
+        self.start_times = np.full(self.num_objects, np.nan)
+
+        # shift the keyframe times of each object so that all of them can be
+        # searched in one sorted array
+        self._row_shifts = np.concatenate(
+            [[0], np.cumsum(self.total_durations + 1)[:-1]]
+        )
+        self._shifted_times = self.keyframe_times + np.repeat(
+            self._row_shifts, counts
+        )
+
+    def __len__(self) -> int:
+        return self.num_objects
+
+    def start(
+        self,
+        current_time: Union[float, np.ndarray],
+        indices: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Starts the sequences at the specified time.
+
+        Args:
+            current_time (float or np.ndarray): Start time, or one start time per selected object.
+            indices (np.ndarray, optional): Indices or mask of the objects to start. Default is all objects.
+        """
+        if indices is None:
+            indices = slice(None)
+        self.start_times[indices] = current_time
+
+    def _get_sequence_times(self, elapsed_time: np.ndarray) -> np.ndarray:
+        """
+        Maps the elapsed times after the delay to times inside each sequence.
+
+        Args:
+            elapsed_time (np.ndarray): Elapsed times with shape (T, N), NaN if hidden.
+
+        Returns:
+            np.ndarray: Times in [0, total duration] with shape (T, N), NaN if hidden.
+        """
+        total_durations = np.broadcast_to(
+            self.total_durations, elapsed_time.shape
+        )
+        loop_types = np.broadcast_to(self.loop_types, elapsed_time.shape)
+        sequence_time = elapsed_time.copy()
+
+        no_loop = loop_types == LoopType.NoLoop.value
+        sequence_time[no_loop & (elapsed_time > total_durations)] = np.nan
+
+        replay = loop_types == LoopType.Replay.value
+        sequence_time[replay] = _wrap_time(
+            elapsed_time[replay], total_durations[replay]
+        )
+
+        reverse = loop_types == LoopType.Reversed.value
+        cycle_time = _wrap_time(
+            elapsed_time[reverse], 2 * total_durations[reverse]
+        )
+        sequence_time[reverse] = np.where(
+            cycle_time > total_durations[reverse],
+            2 * total_durations[reverse] - cycle_time,
+            cycle_time,
+        )
+        return sequence_time
+
+    def gen_xyxy(self, current_time: Union[float, np.ndarray]) -> np.ndarray:
+        """
+        Generates the (xmin, ymin, xmax, ymax) coordinates of every object.
+
+        Coordinates are truncated to integers like DetectGen.gen_xyxy. Objects
+        which are not started, still waiting for `start_after`, or finished
+        without loop get a row of NaN.
+
+        Args:
+            current_time (float or np.ndarray): A timestamp, or a vector of T timestamps.
+
+        Returns:
+            np.ndarray: Float array with shape (N, 4), or (T, N, 4) for a vector of timestamps.
+        """
+        times = np.atleast_1d(np.asarray(current_time, dtype=np.float64))
+        elapsed_time = (
+            times[:, None] - self.start_times[None, :] - self.start_afters
+        )
+        elapsed_time[elapsed_time < 0] = np.nan
+        sequence_time = self._get_sequence_times(elapsed_time)
+
+        visible = ~np.isnan(sequence_time)
+        object_ids = np.broadcast_to(
+            np.arange(self.num_objects), sequence_time.shape
+        )[visible]
+        local_time = sequence_time[visible]
+
+        # index of the first keyframe of the current segment
+        keyframe_ids = (
+            np.searchsorted(
+                self._shifted_times,
+                local_time + self._row_shifts[object_ids],
+                side="right",
+            )
+            - 1
+        )
+        keyframe_ids = np.clip(
+            keyframe_ids,
+            self.offsets[object_ids],
+            self.offsets[object_ids + 1] - 2,
+        )
+        begin_times = self.keyframe_times[keyframe_ids]
+        end_times = self.keyframe_times[keyframe_ids + 1]
+        ratios = (local_time - begin_times) / (end_times - begin_times)
+
+        begin_values = self.keyframes[keyframe_ids]
+        end_values = self.keyframes[keyframe_ids + 1]
+        values = ratios[:, None] * (end_values - begin_values) + begin_values
+
+        widths = np.trunc(values[:, 0])
+        heights = np.trunc(values[:, 1])
+        center_x = values[:, 2]
+        center_y = values[:, 3]
+        from_bottom = self.from_bottom[object_ids]
+        top = np.where(from_bottom, center_y, center_y - heights / 2)
+        bottom = np.where(
+            from_bottom, center_y + heights, center_y + heights / 2
+        )
+
+        xyxy = np.full(sequence_time.shape + (4,), np.nan)
+        xyxy[visible] = np.trunc(
+            np.stack(
+                [center_x - widths / 2, top, center_x + widths / 2, bottom],
+                axis=1,
+            )
+        )
+
+        if np.ndim(current_time) == 0:
+            return xyxy[0]
+        return xyxy
+
+    def gen_box_array(
+        self,
+        current_time: float,
+        class_ids: Optional[np.ndarray] = None,
+    ) -> BoxArray:
+        """
+        Generates the boxes of the visible objects as a BoxArray.
+
+        Args:
+            current_time (float): A timestamp.
+            class_ids (np.ndarray, optional): (N,) class id of each object.
+
+        Returns:
+            BoxArray: Boxes of the visible objects, in object order.
+        """
+        xyxy = self.gen_xyxy(current_time)
+        visible = ~np.isnan(xyxy[:, 0])
+        classes = None
+        if class_ids is not None:
+            classes = np.asarray(class_ids)[visible]
+        return BoxArray(xyxy[visible], classes=classes)
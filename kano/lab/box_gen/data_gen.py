@@ -0,0 +1,350 @@
+import multiprocessing
+from collections import deque
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+import tqdm
+
+from kano.box import clip_boxes, convert_boxes
+from kano.dataset_utils import YoloDataset
+from kano.file_utils import create_folder
+from kano.lab.box_gen.batch_gen import BatchDetectGen
+from kano.lab.box_gen.detect_gen import DetectGen
+
+# generator used by the worker processes, set once by the pool initializer
+_worker_data_gen = None
+
+
+def _init_worker(data_gen: "SyntheticDataGen") -> None:
+    global _worker_data_gen
+    _worker_data_gen = data_gen
+
+
+def _write_chunk(args: Tuple[int, int, str, str]) -> int:
+    """
+    Renders frames in a worker process and writes images and labels.
+
+    Args:
+        args (tuple): (start_frame, end_frame, subset_path, image_extension).
+
+    Returns:
+        int: Number of written frames.
+    """
+    start_frame, end_frame, subset_path, image_extension = args
+    return _worker_data_gen._write_frames(
+        start_frame, end_frame, Path(subset_path), image_extension
+    )
+
+
+def _render_chunk(args: Tuple[int, int, str]) -> List[np.ndarray]:
+    """
+    Renders frames in a worker process, writes their labels and returns the frames.
+
+    Args:
+        args (tuple): (start_frame, end_frame, labels_path).
+
+    Returns:
+        List[np.ndarray]: The rendered frames.
+    """
+    start_frame, end_frame, labels_path = args
+    return _worker_data_gen._render_frames(
+        start_frame, end_frame, Path(labels_path)
+    )
+
+
+class SyntheticDataGen:
+    """
+    Renders synthetic frames from DetectGen sequences and writes them as a YOLO dataset or a video.
+
+    Every frame is rendered from its own seed, so the output does not depend
+    on the number of worker processes or on the order of rendering.
+    """
+
+    def __init__(
+        self,
+        detect_gens: List[DetectGen],
+        classes: List[str],
+        class_ids: Optional[List[int]] = None,
+        image_size: Tuple[int, int] = (720, 1280),
+        fps: float = 30,
+        seed: int = 0,
+    ) -> None:
+        """
+        Initializes the SyntheticDataGen object.
+
+        Args:
+            detect_gens (List[DetectGen]): Sequences of the objects to draw, all started at time 0.
+            classes (List[str]): Names of the classes.
+            class_ids (List[int], optional): Class id of each object. Default is 0 for every object.
+            image_size (Tuple[int, int]): (height, width) of the frames.
+            fps (float): Frames per second, frame i is rendered at time i / fps.
+            seed (int): Seed of the backgrounds and object colors.
+        """
+        self.batch_detect_gen = BatchDetectGen(detect_gens)
+        self.batch_detect_gen.start(0)
+        self.classes = classes
+        if class_ids is None:
+            class_ids = [0] * len(detect_gens)
+        if len(class_ids) != len(detect_gens):
+            raise ValueError("Need exactly one class id per DetectGen.")
+        self.class_ids = np.asarray(class_ids, dtype=np.int64)
+        self.image_size = image_size
+        self.fps = fps
+        self.seed = seed
+
+        rng = np.random.default_rng(seed)
+        self.class_colors = rng.integers(40, 256, (len(classes), 3))
+        # small per-object shade so overlapping objects stay distinguishable
+        self.object_shades = rng.uniform(0.7, 1.0, len(detect_gens))
+
+    def render_frame(
+        self, frame_index: int, xyxy: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Renders one frame and its YOLO labels.
+
+        Args:
+            frame_index (int): Index of the frame.
+            xyxy (np.ndarray, optional): (N, 4) boxes of the objects at this frame. Computed if not given.
+
+        Returns:
+            image (np.ndarray): BGR frame with shape (height, width, 3).
+            labels (np.ndarray): (M, 5) array of visible objects (class, scaled xywh).
+        """
+        height, width = self.image_size
+        if xyxy is None:
+            xyxy = self.batch_detect_gen.gen_xyxy(frame_index / self.fps)
+
+        rng = np.random.default_rng([self.seed, frame_index])
+        small = rng.integers(0, 96, (height // 32 + 1, width // 32 + 1, 3))
+        image = cv2.resize(
+            small.astype(np.uint8),
+            (width, height),
+            interpolation=cv2.INTER_LINEAR,
+        )
+
+        visible = ~np.isnan(xyxy[:, 0])
+        object_ids = np.flatnonzero(visible)
+        boxes = clip_boxes(xyxy[visible], self.image_size)
+        inside = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+        object_ids = object_ids[inside]
+        boxes = boxes[inside]
+
+        labels = np.empty((len(boxes), 5))
+        labels[:, 0] = self.class_ids[object_ids]
+        convert_boxes(
+            boxes, "xyxy", "s_xywh", self.image_size, out=labels[:, 1:]
+        )
+
+        boxes = boxes.astype(np.int64)
+
+        for object_id, (x_min, y_min, x_max, y_max) in zip(object_ids, boxes):
+            color = self.class_colors[self.class_ids[object_id]]
+            color = (color * self.object_shades[object_id]).astype(int)
+            cv2.rectangle(
+                image, (x_min, y_min), (x_max, y_max), color.tolist(), -1
+            )
+            cv2.rectangle(
+                image,
+                (x_min, y_min),
+                (x_max, y_max),
+                (color // 2).tolist(),
+                2,
+            )
+
+        return image, labels
+
+    @staticmethod
+    def _write_labels(label_path: Path, labels: np.ndarray) -> None:
+        with open(label_path, "w") as f:
+            for label in labels:
+                f.write(
+                    f"{int(label[0])} {label[1]:.6f} {label[2]:.6f} "
+                    f"{label[3]:.6f} {label[4]:.6f}\n"
+                )
+
+    def _get_chunk_boxes(self, start_frame: int, end_frame: int) -> np.ndarray:
+        frame_times = np.arange(start_frame, end_frame) / self.fps
+        return self.batch_detect_gen.gen_xyxy(frame_times)
+
+    def _write_frames(
+        self,
+        start_frame: int,
+        end_frame: int,
+        subset_path: Path,
+        image_extension: str,
+    ) -> int:
+        chunk_boxes = self._get_chunk_boxes(start_frame, end_frame)
+        for frame_index, xyxy in zip(
+            range(start_frame, end_frame), chunk_boxes
+        ):
+            image, labels = self.render_frame(frame_index, xyxy)
+            stem = f"frame_{frame_index:08d}"
+            cv2.imwrite(
+                str(subset_path / "images" / (stem + image_extension)), image
+            )
+            self._write_labels(
+                subset_path / "labels" / (stem + ".txt"), labels
+            )
+        return end_frame - start_frame
+
+    def _render_frames(
+        self, start_frame: int, end_frame: int, labels_path: Path
+    ) -> List[np.ndarray]:
+        chunk_boxes = self._get_chunk_boxes(start_frame, end_frame)
+        frames = list()
+        for frame_index, xyxy in zip(
+            range(start_frame, end_frame), chunk_boxes
+        ):
+            image, labels = self.render_frame(frame_index, xyxy)
+            self._write_labels(
+                labels_path / f"frame_{frame_index:08d}.txt", labels
+            )
+            frames.append(image)
+        return frames
+
+    @staticmethod
+    def _get_chunks(
+        start_frame: int, num_frames: int, chunk_size: int
+    ) -> List[Tuple[int, int]]:
+        end_frame = start_frame + num_frames
+        return [
+            (chunk_start, min(chunk_start + chunk_size, end_frame))
+            for chunk_start in range(start_frame, end_frame, chunk_size)
+        ]
+
+    def write_yolo_dataset(
+        self,
+        dataset_path: str,
+        num_frames: int,
+        start_frame: int = 0,
+        subset: str = "train",
+        num_workers: Optional[int] = None,
+        chunk_size: int = 64,
+        image_extension: str = ".jpg",
+    ) -> None:
+        """
+        Writes frames into a YOLO dataset readable by YoloDataset.
+
+        Call it once per subset with different `start_frame` to write
+        train/valid/test subsets from distinct frames.
+
+        Args:
+            dataset_path (str): Path to the dataset folder.
+            num_frames (int): Number of frames to write.
+            start_frame (int): Index of the first frame. Default is 0.
+            subset (str): Subset folder name: "train", "valid" or "test".
+            num_workers (int, optional): Number of processes. 0 renders in the current process.
+                Default is the number of CPUs.
+            chunk_size (int): Number of frames rendered per task.
+            image_extension (str): Extension of the image files, e.g. ".jpg" or ".png".
+        """
+        dataset_path = Path(dataset_path)
+        subset_path = dataset_path / subset
+        create_folder(subset_path / "images")
+        create_folder(subset_path / "labels")
+        YoloDataset._create_simple_yaml_file(str(dataset_path), self.classes)
+
+        tasks = [
+            (chunk_start, chunk_end, str(subset_path), image_extension)
+            for chunk_start, chunk_end in self._get_chunks(
+                start_frame, num_frames, chunk_size
+            )
+        ]
+        progress_bar = tqdm.tqdm(total=num_frames, desc="Frames writing")
+        if num_workers == 0:
+            _init_worker(self)
+            for task in tasks:
+                progress_bar.update(_write_chunk(task))
+        else:
+            with multiprocessing.Pool(
+                num_workers, initializer=_init_worker, initargs=(self,)
+            ) as pool:
+                # workers write the files themselves and only return counts
+                for count in pool.imap_unordered(_write_chunk, tasks):
+                    progress_bar.update(count)
+        progress_bar.close()
+
+    def write_video(
+        self,
+        video_path: str,
+        num_frames: int,
+        labels_path: Optional[str] = None,
+        start_frame: int = 0,
+        num_workers: Optional[int] = None,
+        chunk_size: int = 16,
+        max_pending_chunks: Optional[int] = None,
+    ) -> None:
+        """
+        Writes frames into an MP4 video with one YOLO label file per frame.
+
+        Frames are rendered in parallel and written in order. At most
+        `max_pending_chunks` chunks of frames are held in memory at once.
+
+        Args:
+            video_path (str): Path to the output video.
+            num_frames (int): Number of frames to write.
+            labels_path (str, optional): Folder of the label files "frame_<index>.txt".
+                Default is a "labels" folder next to the video.
+            start_frame (int): Index of the first frame. Default is 0.
+            num_workers (int, optional): Number of processes. 0 renders in the current process.
+                Default is the number of CPUs.
+            chunk_size (int): Number of frames rendered per task.
+            max_pending_chunks (int, optional): Maximum number of rendered chunks waiting to be
+                written. Default is twice the number of workers.
+        """
+        height, width = self.image_size
+        if labels_path is None:
+            labels_path = Path(video_path).parent / "labels"
+        create_folder(labels_path)
+
+        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+        video_writer = cv2.VideoWriter(
+            str(video_path), fourcc, self.fps, (width, height)
+        )
+        tasks = [
+            (chunk_start, chunk_end, str(labels_path))
+            for chunk_start, chunk_end in self._get_chunks(
+                start_frame, num_frames, chunk_size
+            )
+        ]
+        progress_bar = tqdm.tqdm(total=num_frames, desc="Frames writing")
+
+        if num_workers == 0:
+            _init_worker(self)
+            for task in tasks:
+                for frame in _render_chunk(task):
+                    video_writer.write(frame)
+                    progress_bar.update(1)
+        else:
+            if num_workers is None:
+                num_workers = multiprocessing.cpu_count()
+            if max_pending_chunks is None:
+                max_pending_chunks = 2 * num_workers
+
+            with multiprocessing.Pool(
+                num_workers, initializer=_init_worker, initargs=(self,)
+            ) as pool:
+                pending_results = deque()
+                tasks = iter(tasks)
+                for task in tasks:
+                    pending_results.append(
+                        pool.apply_async(_render_chunk, (task,))
+                    )
+                    if len(pending_results) >= max_pending_chunks:
+                        break
+                while pending_results:
+                    frames = pending_results.popleft().get()
+                    next_task = next(tasks, None)
+                    if next_task is not None:
+                        pending_results.append(
+                            pool.apply_async(_render_chunk, (next_task,))
+                        )
+                    for frame in frames:
+                        video_writer.write(frame)
+                    progress_bar.update(len(frames))
+
+        progress_bar.close()
+        video_writer.release()
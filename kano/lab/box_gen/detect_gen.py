@@ -66,6 +66,10 @@ class DetectGen:
             raise InvalidEnumValueError(LoopType, loop_type)
 
         self.loop_type = loop_type
+        self.boxes = boxes
+        self.durations = durations
+        self.start_after = start_after
+        self.from_bottom = from_bottom
         self.fake_detects = self.get_sequence_detect(
             boxes, durations, start_after, from_bottom
         )
@@ -94,7 +98,7 @@ class DetectGen:
             return
 
         if self.curr_i < len(self.fake_detects) - 1:
-            self.start_time += self.fake_detects[self.curr_i].duration
+            self.start_time += self._get_current_length()
             self.curr_i += 1
             self.fake_detects[self.curr_i].start(self.start_time)
             return
@@ -111,12 +115,22 @@ class DetectGen:
             self.replay_sequence()
             return
 
+    def _get_current_length(self) -> float:
+        """
+        Returns the time taken by the current detection, including its delay.
+
+        Returns:
+            float: The duration plus the `start_after` delay of the current detection.
+        """
+        current_detect = self.fake_detects[self.curr_i]
+        return current_detect.duration + current_detect.start_after
+
     def reverse_sequence(self) -> None:
         """
         Reverses the sequence of detections.
         """
+        self.start_time += self._get_current_length()
         self.fake_detects[0].start_after = 0
-        self.start_time += self.fake_detects[self.curr_i].duration
         for fake_det in self.fake_detects:
             fake_det.reverse()
         self.fake_detects = self.fake_detects[::-1]
@@ -127,8 +141,8 @@ class DetectGen:
         """
         Replays the detection sequence from the beginning.
         """
+        self.start_time += self._get_current_length()
         self.fake_detects[0].start_after = 0
-        self.start_time += self.fake_detects[self.curr_i].duration
         self.curr_i = 0
         self.fake_detects[self.curr_i].start(self.start_time)
 
@@ -185,7 +199,8 @@ class DetectGen:
                     begin_box=boxes[i],
                     end_box=boxes[i + 1],
                     duration=durations[i],
-                    start_after=start_after,
+                    # the delay only applies once, before the first box
+                    start_after=start_after if i == 0 else 0,
                     from_bottom=from_bottom,
                 )
             )
@@ -74,7 +74,7 @@ class FakeDetect:
         Computes the intermediate box based on the elapsed time.
 
         Args:
-            elapsed_time (float): The elapsed time since the transition started.
+            elapsed_time (float): The elapsed time since the transition started, excluding `start_after`.
 
         Returns:
             Box: The interpolated box at the current state of the transition.
@@ -128,7 +128,9 @@ class FakeDetect:
         ):
             return None
 
-        return self._get_current_box(elapsed_time).get_xyxy(self.from_bottom)
+        return self._get_current_box(elapsed_time - self.start_after).get_xyxy(
+            self.from_bottom
+        )
 
     def is_end(self, current_time: float) -> bool:
         """
@@ -1,10 +1,15 @@
 import os
+import sys
 import threading
 import time
+import tracemalloc
+from collections import Counter, deque
 
-import pandas as pd
+import numpy as np
 import psutil
 
+from kano.image.cache import get_image_cache
+
 
 class FPSCounter:
     def __init__(
@@ -87,9 +92,383 @@ class FPSCounter:
                 time.sleep(sleep_time)
 
 
+class SamplingProfiler:
+    def __init__(self, sample_rate=100, max_overhead=0.02):
+        """
+        Initializes the SamplingProfiler instance.
+
+        A background thread periodically snapshots the stacks of all the other
+        threads with `sys._current_frames` and counts identical stacks, which
+        can be saved in the collapsed format used by flamegraph tools.
+
+        Args:
+            sample_rate (float): The target number of samples per second.
+            max_overhead (float): The maximum fraction of wall time the sampling
+                thread may spend taking samples. The sampling rate is lowered
+                automatically to stay under this bound.
+        """
+        self.sample_rate = sample_rate
+        self.max_overhead = max_overhead
+        self.stack_counts = Counter()
+        self.total_samples = 0
+        self.sampling_seconds = 0.0
+        self.start_time = None
+        self.stop_time = None
+        self._frame_labels = dict()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        """
+        bool: Whether the sampling thread is running.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Start the sampling thread. Does nothing if it is already running.
+        """
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self.start_time = time.perf_counter()
+        self.stop_time = None
+        self._thread = threading.Thread(
+            target=self._sampling, name="kano-sampling-profiler"
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the sampling thread and wait for it to finish.
+        """
+        if not self.is_running:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self.stop_time = time.perf_counter()
+
+    def reset(self):
+        """
+        Clear the collected samples and overhead statistics.
+        """
+        with self._lock:
+            self.stack_counts.clear()
+            self.total_samples = 0
+            self.sampling_seconds = 0.0
+            self.start_time = time.perf_counter()
+            if not self.is_running:
+                self.stop_time = self.start_time
+
+    def _get_frame_label(self, frame):
+        """
+        Get the label of a frame, cached per code object.
+
+        Args:
+            frame (frame): A Python stack frame.
+
+        Returns:
+            str: The label "function (file:first_line)".
+        """
+        code = frame.f_code
+        label = self._frame_labels.get(code)
+        if label is None:
+            label = (
+                f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+            )
+            # ";" separates frames in the collapsed format
+            label = label.replace(";", ":")
+            self._frame_labels[code] = label
+        return label
+
+    def sample(self):
+        """
+        Take one snapshot of the stacks of all threads except the sampling one.
+        """
+        sampling_thread_id = threading.get_ident()
+        thread_names = {
+            thread.ident: thread.name for thread in threading.enumerate()
+        }
+        stacks = list()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == sampling_thread_id:
+                continue
+            stack = list()
+            while frame is not None:
+                stack.append(self._get_frame_label(frame))
+                frame = frame.f_back
+            thread_name = thread_names.get(thread_id, f"thread-{thread_id}")
+            stack.append(thread_name.replace(";", ":"))
+            stacks.append(tuple(reversed(stack)))
+
+        with self._lock:
+            self.stack_counts.update(stacks)
+            self.total_samples += 1
+
+    def _sampling(self):
+        """
+        Continuously samples the stacks at the target rate.
+
+        This method runs in a separate thread. After each sample it sleeps long
+        enough to keep the time spent sampling under `max_overhead`.
+        """
+        interval = 1 / self.sample_rate
+        while not self._stop_event.is_set():
+            begin = time.perf_counter()
+            self.sample()
+            cost = time.perf_counter() - begin
+            with self._lock:
+                self.sampling_seconds += cost
+            sleep_time = max(
+                interval - cost, cost * (1 / self.max_overhead - 1)
+            )
+            self._stop_event.wait(sleep_time)
+
+    def get_collapsed_stacks(self):
+        """
+        Get the collected stacks in collapsed format.
+
+        Returns:
+            list(str): One line per unique stack, "thread;outer;...;inner count",
+                sorted by decreasing count.
+        """
+        with self._lock:
+            stack_counts = self.stack_counts.most_common()
+        return [f"{';'.join(stack)} {count}" for stack, count in stack_counts]
+
+    def save_collapsed(self, output_path):
+        """
+        Save the collected stacks in collapsed format, readable by flamegraph.pl,
+        speedscope or inferno.
+
+        Args:
+            output_path (str): Path to the output text file.
+        """
+        with open(output_path, "w") as f:
+            for line in self.get_collapsed_stacks():
+                f.write(line + "\n")
+
+    def get_overhead(self):
+        """
+        Get the measured cost of sampling.
+
+        Returns:
+            dict: Dict with keys "samples", "sampling_seconds", "wall_seconds",
+                "overhead_percent" and "effective_rate" (samples per second).
+        """
+        with self._lock:
+            total_samples = self.total_samples
+            sampling_seconds = self.sampling_seconds
+
+        wall_seconds = 0.0
+        if self.start_time is not None:
+            end_time = self.stop_time
+            if end_time is None:
+                end_time = time.perf_counter()
+            wall_seconds = end_time - self.start_time
+
+        overhead_percent = 0.0
+        effective_rate = 0.0
+        if wall_seconds > 0:
+            overhead_percent = sampling_seconds / wall_seconds * 100
+            effective_rate = total_samples / wall_seconds
+
+        return {
+            "samples": total_samples,
+            "sampling_seconds": sampling_seconds,
+            "wall_seconds": wall_seconds,
+            "overhead_percent": overhead_percent,
+            "effective_rate": effective_rate,
+        }
+
+
+class MemoryTracker:
+    def __init__(
+        self,
+        top_k=10,
+        growth_window=10,
+        growth_threshold_mib=50,
+        traceback_frames=1,
+    ):
+        """
+        Initializes the MemoryTracker instance and starts `tracemalloc` if needed.
+
+        Args:
+            top_k (int): The number of file/line locations returned by `take_snapshot`.
+            growth_window (int): The number of memory samples used to detect sustained growth.
+            growth_threshold_mib (float): The minimum growth in MiB over the window to alert on.
+            traceback_frames (int): The number of frames stored by `tracemalloc` per allocation.
+        """
+        self.top_k = top_k
+        self.growth_threshold_mib = growth_threshold_mib
+        self.memory_history = deque(maxlen=growth_window)
+        self.pools = dict()
+        self.last_snapshot = None
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start(traceback_frames)
+
+    def stop(self):
+        """
+        Stop `tracemalloc` if it was started by this tracker.
+        """
+        if self._started_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.last_snapshot = None
+
+    def register_pool(self, name, pool):
+        """
+        Register NumPy buffers whose total size is reported under the given name.
+
+        Args:
+            name (str): Name of the pool, e.g. "frames" or "canvases".
+            pool (np.ndarray or iterable or callable): An array, an iterable of
+                arrays, or a function returning an iterable of arrays, e.g.
+                `lambda: list(streamer.frame_queue.queue)`.
+        """
+        self.pools[name] = pool
+
+    def unregister_pool(self, name):
+        """
+        Stop reporting a registered pool.
+
+        Args:
+            name (str): Name of the pool.
+        """
+        self.pools.pop(name, None)
+
+    @staticmethod
+    def _get_arrays_mib(arrays):
+        """
+        Get the total size of the buffers behind the given arrays.
+
+        Views sharing a buffer are counted once.
+
+        Args:
+            arrays (iterable(np.ndarray)): The arrays to measure.
+
+        Returns:
+            float: Total size in MiB.
+        """
+        buffers = dict()
+        for array in arrays:
+            if not isinstance(array, np.ndarray):
+                continue
+            while isinstance(array.base, np.ndarray):
+                array = array.base
+            buffers[id(array)] = array.nbytes
+        return sum(buffers.values()) / 1024**2
+
+    def get_pools_mib(self):
+        """
+        Get the size of every registered pool.
+
+        Returns:
+            dict: Mapping from pool name to its size in MiB.
+        """
+        pools_mib = dict()
+        for name, pool in self.pools.items():
+            arrays = pool() if callable(pool) else pool
+            if isinstance(arrays, np.ndarray):
+                arrays = [arrays]
+            pools_mib[name] = self._get_arrays_mib(arrays)
+        return pools_mib
+
+    def get_info(self):
+        """
+        Get the traced Python memory and the size of every registered pool.
+
+        Returns:
+            dict: Dict with keys "traced_mib", "traced_peak_mib" and
+                "<pool name>_pool_mib" for each registered pool.
+        """
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        info = {
+            "traced_mib": traced / 1024**2,
+            "traced_peak_mib": traced_peak / 1024**2,
+        }
+        for name, pool_mib in self.get_pools_mib().items():
+            info[f"{name}_pool_mib"] = pool_mib
+        return info
+
+    def take_snapshot(self):
+        """
+        Take a `tracemalloc` snapshot and compare it to the previous one.
+
+        Returns:
+            list(dict): The `top_k` file/line locations with the largest change,
+                each with keys "location", "size_diff_mib", "size_mib" and
+                "count_diff". Empty on the first call.
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ]
+        )
+        last_snapshot = self.last_snapshot
+        self.last_snapshot = snapshot
+        if last_snapshot is None:
+            return list()
+
+        diffs = list()
+        for stat in snapshot.compare_to(last_snapshot, "lineno")[: self.top_k]:
+            frame = stat.traceback[0]
+            diffs.append(
+                {
+                    "location": f"{frame.filename}:{frame.lineno}",
+                    "size_diff_mib": stat.size_diff / 1024**2,
+                    "size_mib": stat.size / 1024**2,
+                    "count_diff": stat.count_diff,
+                }
+            )
+        return diffs
+
+    def check_growth(self, memory_mib):
+        """
+        Record a memory sample and check whether memory grows steadily.
+
+        The growth is sustained when the window is full, the smallest value of
+        its second half is above the largest value of its first half, and the
+        total growth reaches `growth_threshold_mib`.
+
+        Args:
+            memory_mib (float): The current memory usage in MiB, e.g. RSS.
+
+        Returns:
+            float or None: The growth in MiB over the window if it is sustained,
+                otherwise None.
+        """
+        self.memory_history.append(memory_mib)
+        if len(self.memory_history) < self.memory_history.maxlen:
+            return None
+
+        history = list(self.memory_history)
+        half = len(history) // 2
+        growth = history[-1] - history[0]
+        if (
+            min(history[half:]) > max(history[:half])
+            and growth >= self.growth_threshold_mib
+        ):
+            return growth
+        return None
+
+
 class ResourceProfiler:
     def __init__(
-        self, interval_seconds, pid=None, csv_path=None, csv_minutes=5
+        self,
+        interval_seconds,
+        pid=None,
+        csv_path=None,
+        csv_minutes=5,
+        include_children=False,
+        track_threads=False,
+        track_io=False,
+        track_memory=False,
+        track_image_cache=False,
     ):
         """
         Initializes the ResourceProfiler instance.
@@ -99,6 +478,17 @@ class ResourceProfiler:
             pid (int or None): The process ID to monitor, or None to monitor the current process.
             csv_path (str or None): Path to a CSV file to save resource data, or None to skip saving.
             csv_minutes (int): The number of minutes of data to retain in the CSV file.
+            include_children (bool): Whether to aggregate CPU, RAM and I/O over all child processes too.
+            track_threads (bool): Whether to print a per-thread CPU breakdown of the monitored process.
+            track_io (bool): Whether to report I/O bytes and context switches.
+            track_memory (bool): Whether to track Python allocations and registered
+                NumPy pools with a `MemoryTracker`, and alert on sustained growth.
+            track_image_cache (bool): Whether to report the statistics of the shared
+                image cache, see `kano.image.enable_image_cache`.
+
+        Raises:
+            ValueError: If `track_memory` is True and the monitored process is not
+                the current process.
         """
         self.interval_seconds = interval_seconds
         self.last_update_time = time.time()
@@ -111,43 +501,341 @@ class ResourceProfiler:
         self.csv_path = csv_path
         self.csv_minutes = csv_minutes
         self.time_format = "%Y-%m-%d %H:%M:%S"
+        self.include_children = include_children
+        self.track_threads = track_threads
+        self.track_io = track_io
+        # psutil measures cpu_percent since the previous call on the same
+        # Process object, so children objects are kept between samples
+        self._children = dict()
+        self._last_thread_times = dict()
+        self._last_thread_sample_time = None
+        self._stop_event = threading.Event()
+        self.sampling_profiler = None
+        if track_memory and self.pid != os.getpid():
+            raise ValueError(
+                "Memory tracking is only available for the current process."
+            )
+        self.memory_tracker = MemoryTracker() if track_memory else None
+        self.track_image_cache = track_image_cache
+        if self.track_threads:
+            # take a first sample so the first print has a reference point
+            self.get_threads_info()
 
-    def update_csv(self, current_time, cpu_percent, ram_mib):
+    def _append_csv_row(self, new_line):
         """
-        Update the CSV file with the current resource usage.
+        Append a row to the CSV file, dropping rows older than `csv_minutes`.
 
         Args:
-            current_time (float): The current timestamp.
-            cpu_percent (float): The current CPU usage as a percentage.
-            ram_mib (float): The current RAM usage in MiB.
+            new_line (dict): Mapping from column name to value, must contain "time".
         """
+        import pandas as pd
+
         if os.path.isfile(self.csv_path):
             df = pd.read_csv(self.csv_path)
-            df = df[df["time"] > current_time - self.csv_minutes * 60]
+            df = df[df["time"] > new_line["time"] - self.csv_minutes * 60]
+            df = pd.concat([df, pd.DataFrame([new_line])], ignore_index=True)
         else:
-            df = pd.DataFrame(columns=["time", "cpu_percent", "ram_mib"])
+            df = pd.DataFrame([new_line])
+        df.to_csv(self.csv_path, index=False, header=True)
+
+    def update_csv(self, current_time, cpu_percent, ram_mib, **extra_info):
+        """
+        Update the CSV file with the current resource usage.
 
+        Args:
+            current_time (float): The current timestamp.
+            cpu_percent (float): The current CPU usage as a percentage.
+            ram_mib (float): The current RAM usage in MiB.
+            **extra_info: Additional columns to save, e.g. I/O counters.
+        """
         new_line = {
             "time": current_time,
             "cpu_percent": cpu_percent,
             "ram_mib": ram_mib,
         }
+        new_line.update(extra_info)
+        self._append_csv_row(new_line)
 
-        df.loc[len(df)] = new_line
-        df.to_csv(self.csv_path, index=False, header=True)
+    def get_processes(self):
+        """
+        Get the monitored processes.
+
+        Returns:
+            list(psutil.Process): The monitored process, followed by all of its
+                live descendants if `include_children` is True.
+        """
+        if not self.include_children:
+            return [self.current_process]
+
+        try:
+            children = self.current_process.children(recursive=True)
+        except psutil.NoSuchProcess:
+            children = list()
+
+        alive_children = dict()
+        for child in children:
+            alive_children[child.pid] = self._children.get(child.pid, child)
+        self._children = alive_children
+
+        return [self.current_process] + list(alive_children.values())
+
+    def get_process_tree_info(self):
+        """
+        Get the resource usage of every monitored process.
+
+        The CPU usage of each process is measured since the previous call.
+
+        Returns:
+            list(dict): One dict per process with keys "pid", "name",
+                "cpu_percent" and "ram_mib". The monitored process comes first.
+        """
+        processes_info = list()
+        for process in self.get_processes():
+            try:
+                with process.oneshot():
+                    processes_info.append(
+                        {
+                            "pid": process.pid,
+                            "name": process.name(),
+                            "cpu_percent": process.cpu_percent(),
+                            "ram_mib": process.memory_info().rss / 1024**2,
+                        }
+                    )
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                # a child may exit between listing and sampling
+                if process is self.current_process:
+                    raise
+        return processes_info
+
+    def get_threads_info(self):
+        """
+        Get the CPU usage of each thread of the monitored process.
+
+        The CPU usage is measured since the previous call, so the first call
+        reports 0 for every thread. Thread names are resolved from the
+        `threading` module when the monitored process is the current one.
+
+        Returns:
+            list(dict): One dict per thread with keys "thread_id", "name" and
+                "cpu_percent", sorted by decreasing CPU usage.
+        """
+        current_time = time.time()
+        threads = self.current_process.threads()
+
+        thread_names = dict()
+        if self.pid == os.getpid():
+            thread_names = {
+                thread.native_id: thread.name
+                for thread in threading.enumerate()
+            }
+
+        elapsed_time = None
+        if self._last_thread_sample_time is not None:
+            elapsed_time = current_time - self._last_thread_sample_time
+
+        threads_info = list()
+        thread_times = dict()
+        for thread in threads:
+            cpu_time = thread.user_time + thread.system_time
+            thread_times[thread.id] = cpu_time
+
+            cpu_percent = 0.0
+            last_cpu_time = self._last_thread_times.get(thread.id)
+            if last_cpu_time is not None and elapsed_time:
+                cpu_percent = (cpu_time - last_cpu_time) / elapsed_time * 100
+
+            threads_info.append(
+                {
+                    "thread_id": thread.id,
+                    "name": thread_names.get(thread.id, f"thread-{thread.id}"),
+                    "cpu_percent": cpu_percent,
+                }
+            )
+
+        self._last_thread_times = thread_times
+        self._last_thread_sample_time = current_time
+
+        threads_info.sort(key=lambda info: info["cpu_percent"], reverse=True)
+        return threads_info
+
+    def get_io_info(self):
+        """
+        Get the cumulative I/O counters of the monitored processes.
+
+        Read and write bytes are not available on macOS and are reported as 0.
+
+        Returns:
+            dict: Dict with keys "read_mib", "write_mib", "voluntary_ctx_switches"
+                and "involuntary_ctx_switches", summed over the monitored processes.
+        """
+        io_info = {
+            "read_mib": 0.0,
+            "write_mib": 0.0,
+            "voluntary_ctx_switches": 0,
+            "involuntary_ctx_switches": 0,
+        }
+        for process in self.get_processes():
+            try:
+                if hasattr(process, "io_counters"):
+                    io_counters = process.io_counters()
+                    io_info["read_mib"] += io_counters.read_bytes / 1024**2
+                    io_info["write_mib"] += io_counters.write_bytes / 1024**2
+                ctx_switches = process.num_ctx_switches()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                if process is self.current_process:
+                    raise
+                continue
+            io_info["voluntary_ctx_switches"] += ctx_switches.voluntary
+            io_info["involuntary_ctx_switches"] += ctx_switches.involuntary
+        return io_info
+
+    def get_extra_info(self):
+        """
+        Get the optional metrics enabled at initialization.
+
+        Returns:
+            dict: The I/O counters if `track_io` is True, the memory metrics
+                if `track_memory` is True and the image cache statistics, prefixed
+                by "image_cache_", if `track_image_cache` is True and the cache is
+                enabled, otherwise an empty dict.
+        """
+        extra_info = dict()
+        if self.track_io:
+            extra_info.update(self.get_io_info())
+        if self.memory_tracker is not None:
+            extra_info.update(self.memory_tracker.get_info())
+        image_cache = get_image_cache()
+        if self.track_image_cache and image_cache is not None:
+            for key, value in image_cache.get_stats().items():
+                extra_info[f"image_cache_{key}"] = value
+        return extra_info
 
     def get_current_info(self):
         """
         Get the current process resource usage (CPU and RAM).
 
+        If `include_children` is True, the usage is summed over the process tree.
+
         Returns:
             tuple: A tuple containing the current timestamp, CPU usage percentage, and RAM usage in MiB.
         """
         current_time = time.time()
-        cpu_percent = self.current_process.cpu_percent()
-        ram_mib = self.current_process.memory_info().rss / 1024**2
+        if self.include_children:
+            processes_info = self.get_process_tree_info()
+            cpu_percent = sum(info["cpu_percent"] for info in processes_info)
+            ram_mib = sum(info["ram_mib"] for info in processes_info)
+        else:
+            cpu_percent = self.current_process.cpu_percent()
+            ram_mib = self.current_process.memory_info().rss / 1024**2
         return current_time, cpu_percent, ram_mib
 
+    def _format_extra_info(self, extra_info):
+        """
+        Format the optional metrics to be appended to the printed usage line.
+
+        Args:
+            extra_info (dict): Metrics returned by `get_extra_info`.
+
+        Returns:
+            str: The formatted metrics, empty if there is nothing to print.
+        """
+        message = ""
+        if "read_mib" in extra_info:
+            message += (
+                f" - Read: {extra_info['read_mib']:.2f} MiB"
+                f" - Write: {extra_info['write_mib']:.2f} MiB"
+                f" - Context switches: {extra_info['voluntary_ctx_switches']}"
+                f"/{extra_info['involuntary_ctx_switches']}"
+            )
+        if "traced_mib" in extra_info:
+            message += f" - Traced: {extra_info['traced_mib']:.2f} MiB"
+            for key, value in extra_info.items():
+                if key.endswith("_pool_mib"):
+                    pool_name = key[: -len("_pool_mib")]
+                    message += f" - {pool_name}: {value:.2f} MiB"
+        if "image_cache_hits" in extra_info:
+            message += (
+                f" - Image cache: {extra_info['image_cache_hit_rate']:.0%} hits"
+                f" ({extra_info['image_cache_entries']} images,"
+                f" {extra_info['image_cache_mib']:.2f} MiB)"
+            )
+        return message
+
+    def _print_threads_info(self, top_k=5):
+        """
+        Print the threads consuming the most CPU.
+
+        Args:
+            top_k (int): Maximum number of threads to print.
+        """
+        threads_info = self.get_threads_info()[:top_k]
+        threads_message = ", ".join(
+            f"{info['name']}: {info['cpu_percent']:.1f}%"
+            for info in threads_info
+        )
+        print(f"  Threads - {threads_message}")
+
+    def _print_memory_info(self, ram_mib, top_k=3):
+        """
+        Print the allocation sites that grew the most and alert on sustained growth.
+
+        Args:
+            ram_mib (float): The current RAM usage in MiB.
+            top_k (int): Maximum number of allocation sites to print.
+
+        Returns:
+            dict: Dict with keys "memory_alert", whether the RAM grows steadily,
+                "ram_growth_mib", the growth over the window if it does, and
+                "top_growth_location" and "top_growth_mib", the allocation site
+                that grew the most since the previous report.
+        """
+        diffs = self.memory_tracker.take_snapshot()
+        for diff in diffs[:top_k]:
+            print(
+                f"  Allocations - {diff['location']}: "
+                f"{diff['size_diff_mib']:+.2f} MiB ({diff['count_diff']:+d} blocks)"
+            )
+        growth_mib = self.memory_tracker.check_growth(ram_mib)
+        if growth_mib is not None:
+            window = self.memory_tracker.memory_history.maxlen
+            print(
+                f"  WARNING: RAM grew by {growth_mib:.2f} MiB over the last {window} reports"
+            )
+
+        top_growth = max(
+            diffs, key=lambda diff: diff["size_diff_mib"], default=None
+        )
+        return {
+            "memory_alert": growth_mib is not None,
+            "ram_growth_mib": growth_mib,
+            "top_growth_location": (
+                None if top_growth is None else top_growth["location"]
+            ),
+            "top_growth_mib": (
+                None if top_growth is None else top_growth["size_diff_mib"]
+            ),
+        }
+
+    def _print_info(self, message, ram_mib, extra_info):
+        """
+        Print the usage line followed by the optional breakdowns.
+
+        The memory growth report is added to extra_info, so that it is saved
+        in the CSV row of the same update.
+
+        Args:
+            message (str): The base usage line.
+            ram_mib (float): The current RAM usage in MiB.
+            extra_info (dict): Metrics returned by `get_extra_info`.
+        """
+        if self.include_children:
+            message += f" - Processes: {len(self._children) + 1}"
+        print(message + self._format_extra_info(extra_info))
+        if self.track_threads:
+            self._print_threads_info()
+        if self.memory_tracker is not None:
+            extra_info.update(self._print_memory_info(ram_mib))
+
     def update(self):
         """
         Update the resource usage information and optionally print it.
@@ -156,13 +844,20 @@ class ResourceProfiler:
         If a CSV path is specified, the data will be written to the CSV file.
         """
         current_time, cpu_percent, ram_mib = self.get_current_info()
-        if current_time - self.last_update_time >= self.interval_seconds:
-            print(
-                f"PID: {self.pid} - CPU Usage: {cpu_percent}% - total RAM: {ram_mib:.2f} MiB"
+        is_due = current_time - self.last_update_time >= self.interval_seconds
+        # the optional metrics are gathered only to be printed or saved
+        extra_info = dict()
+        if is_due or self.csv_path:
+            extra_info = self.get_extra_info()
+        if is_due:
+            self._print_info(
+                f"PID: {self.pid} - CPU Usage: {cpu_percent}% - total RAM: {ram_mib:.2f} MiB",
+                ram_mib,
+                extra_info,
             )
             self.last_update_time = current_time
         if self.csv_path:
-            self.update_csv(current_time, cpu_percent, ram_mib)
+            self.update_csv(current_time, cpu_percent, ram_mib, **extra_info)
 
     def _profiling(self):
         """
@@ -170,16 +865,27 @@ class ResourceProfiler:
 
         This method runs in a separate thread and continuously updates the resource usage.
         """
-        while True:
+        while not self._stop_event.is_set():
             current_time, cpu_percent, ram_mib = self.get_current_info()
-            if current_time - self.last_update_time >= self.interval_seconds:
-                print(
-                    f"PID: {self.pid} - CPU Usage: {cpu_percent}% - total RAM: {ram_mib:.2f} MiB"
+            is_due = (
+                current_time - self.last_update_time >= self.interval_seconds
+            )
+            # the optional metrics are gathered only to be printed or saved
+            extra_info = dict()
+            if is_due or self.csv_path:
+                extra_info = self.get_extra_info()
+            if is_due:
+                self._print_info(
+                    f"PID: {self.pid} - CPU Usage: {cpu_percent}% - total RAM: {ram_mib:.2f} MiB",
+                    ram_mib,
+                    extra_info,
                 )
                 self.last_update_time = current_time
             if self.csv_path:
-                self.update_csv(current_time, cpu_percent, ram_mib)
-            time.sleep(self.interval_seconds)
+                self.update_csv(
+                    current_time, cpu_percent, ram_mib, **extra_info
+                )
+            self._stop_event.wait(self.interval_seconds)
 
     def start_profiling_thread(self):
         """
@@ -187,9 +893,68 @@ class ResourceProfiler:
 
         The thread runs the `_profiling` method to collect and display resource usage.
         """
+        self._stop_event.clear()
         thread = threading.Thread(target=self._profiling)
         thread.start()
 
+    def stop_profiling_thread(self):
+        """
+        Stop the resource profiling thread started by `start_profiling_thread`.
+        """
+        self._stop_event.set()
+
+    def start_sampling_profiler(self, sample_rate=100, max_overhead=0.02):
+        """
+        Start a background stack sampling profiler in the current process.
+
+        Args:
+            sample_rate (float): The target number of samples per second.
+            max_overhead (float): The maximum fraction of wall time spent sampling.
+
+        Returns:
+            SamplingProfiler: The running sampling profiler.
+
+        Raises:
+            ValueError: If the monitored process is not the current process.
+        """
+        if self.pid != os.getpid():
+            raise ValueError(
+                "Stack sampling is only available for the current process."
+            )
+        if self.sampling_profiler is None or (
+            not self.sampling_profiler.is_running
+        ):
+            self.sampling_profiler = SamplingProfiler(
+                sample_rate, max_overhead
+            )
+            self.sampling_profiler.start()
+        return self.sampling_profiler
+
+    def stop_sampling_profiler(self, collapsed_path=None):
+        """
+        Stop the stack sampling profiler and print its measured overhead.
+
+        Args:
+            collapsed_path (str or None): Path to save the collapsed stacks for
+                flamegraph tools, or None to skip saving.
+
+        Returns:
+            SamplingProfiler or None: The stopped sampling profiler, or None if
+                it was never started.
+        """
+        if self.sampling_profiler is None:
+            return None
+        self.sampling_profiler.stop()
+        overhead = self.sampling_profiler.get_overhead()
+        print(
+            f"PID: {self.pid} - Stack samples: {overhead['samples']}"
+            f" - Sampling rate: {overhead['effective_rate']:.1f} Hz"
+            f" - Overhead: {overhead['overhead_percent']:.2f}%"
+        )
+        if collapsed_path:
+            self.sampling_profiler.save_collapsed(collapsed_path)
+        return self.sampling_profiler
+
 
 class FPSProfiler(ResourceProfiler):
     def __init__(
@@ -199,6 +964,11 @@ class FPSProfiler(ResourceProfiler):
         csv_path=None,
         csv_minutes=5,
         target_fps=None,
+        include_children=False,
+        track_threads=False,
+        track_io=False,
+        track_memory=False,
+        track_image_cache=False,
     ):
         """
         Initializes the FPSProfiler instance, extending ResourceProfiler to track FPS.
@@ -209,12 +979,31 @@ class FPSProfiler(ResourceProfiler):
             csv_path (str or None): Path to a CSV file to save resource and FPS data.
             csv_minutes (int): The number of minutes of data to retain in the CSV file.
             target_fps (float or None): The target FPS to maintain.
+            include_children (bool): Whether to aggregate CPU, RAM and I/O over all child processes too.
+            track_threads (bool): Whether to print a per-thread CPU breakdown of the monitored process.
+            track_io (bool): Whether to report I/O bytes and context switches.
+            track_memory (bool): Whether to track Python allocations and registered
+                NumPy pools with a `MemoryTracker`, and alert on sustained growth.
+            track_image_cache (bool): Whether to report the statistics of the shared
+                image cache, see `kano.image.enable_image_cache`.
         """
-        super().__init__(interval_seconds, pid, csv_path, csv_minutes)
+        super().__init__(
+            interval_seconds,
+            pid,
+            csv_path,
+            csv_minutes,
+            include_children,
+            track_threads,
+            track_io,
+            track_memory,
+            track_image_cache,
+        )
         self.fps_counter = FPSCounter()
         self.target_fps = target_fps
 
-    def update_csv(self, current_time, cpu_percent, ram_mib, fps):
+    def update_csv(
+        self, current_time, cpu_percent, ram_mib, fps, **extra_info
+    ):
         """
         Update the CSV file with the current resource usage and FPS.
 
@@ -223,22 +1012,16 @@ class FPSProfiler(ResourceProfiler):
             cpu_percent (float): The current CPU usage as a percentage.
             ram_mib (float): The current RAM usage in MiB.
             fps (int): The current frames per second.
+            **extra_info: Additional columns to save, e.g. I/O counters.
         """
-        if os.path.isfile(self.csv_path):
-            df = pd.read_csv(self.csv_path)
-            df = df[df["time"] > current_time - self.csv_minutes * 60]
-        else:
-            df = pd.DataFrame(
-                columns=["time", "cpu_percent", "ram_mib", "fps"]
-            )
         new_line = {
             "time": current_time,
             "cpu_percent": cpu_percent,
             "ram_mib": ram_mib,
             "fps": fps,
         }
-        df.loc[len(df)] = new_line
-        df.to_csv(self.csv_path, index=False, header=True)
+        new_line.update(extra_info)
+        self._append_csv_row(new_line)
 
     def get_current_info(self):
         """
@@ -264,13 +1047,22 @@ class FPSProfiler(ResourceProfiler):
             tuple: A tuple containing CPU usage percentage, RAM usage in MiB, and FPS.
         """
         current_time, cpu_percent, ram_mib, fps = self.get_current_info()
-        if current_time - self.last_update_time >= self.interval_seconds:
-            print(
-                f"PID: {self.pid} - CPU Usage: {cpu_percent}% - total RAM: {ram_mib:.2f} MiB - FPS: {fps}"
+        is_due = current_time - self.last_update_time >= self.interval_seconds
+        # the optional metrics are gathered only to be printed or saved
+        extra_info = dict()
+        if is_due or self.csv_path:
+            extra_info = self.get_extra_info()
+        if is_due:
+            self._print_info(
+                f"PID: {self.pid} - CPU Usage: {cpu_percent}% - total RAM: {ram_mib:.2f} MiB - FPS: {fps}",
+                ram_mib,
+                extra_info,
             )
             self.last_update_time = current_time
         if self.csv_path:
-            self.update_csv(current_time, cpu_percent, ram_mib, fps)
+            self.update_csv(
+                current_time, cpu_percent, ram_mib, fps, **extra_info
+            )
         if self.target_fps:
             self.fps_counter.keep_target_fps(self.target_fps)
         return cpu_percent, ram_mib, fps
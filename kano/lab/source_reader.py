@@ -1,24 +1,254 @@
 import threading
 import time
+from abc import ABC, abstractmethod
 from queue import Queue
+from typing import List, Optional, Tuple, Union
 
 import cv2
+import numpy as np
 
+from kano.lab.box_gen import BatchDetectGen, DetectGen
 from kano.lab.profiler import FPSCounter
 
 
+class FrameSource(ABC):
+    """
+    Interface of the frame sources read by VideoStreamer.
+
+    A source is opened once, read until `read` fails, then released. When
+    reconnecting, VideoStreamer releases and opens the same source again.
+    """
+
+    @abstractmethod
+    def open(self) -> bool:
+        """
+        Opens (or reopens) the source.
+
+        Returns:
+            bool: True if the source is ready to be read.
+        """
+
+    @abstractmethod
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Reads the next frame.
+
+        Returns:
+            tuple: (True, frame) on success, (False, None) when the source is out of frames or disconnected.
+        """
+
+    @abstractmethod
+    def get_fps(self) -> float:
+        """
+        Gets the frame rate of the source.
+
+        Returns:
+            float: The frame rate of the source.
+        """
+
+    @abstractmethod
+    def release(self) -> None:
+        """
+        Releases the resources of the source.
+        """
+
+
+class CaptureSource(FrameSource):
+    """
+    Frame source reading a video file, a stream URL or a camera with `cv2.VideoCapture`.
+    """
+
+    def __init__(self, source: Union[str, int]) -> None:
+        """
+        Initializes the CaptureSource object.
+
+        Args:
+            source (str or int): Path or URL of the video, or camera index.
+        """
+        self.source = source
+        self.cap = None
+
+    def open(self) -> bool:
+        """
+        Opens the capture, replacing the previous one when reconnecting.
+
+        Returns:
+            bool: True if the capture is opened.
+        """
+        self.cap = cv2.VideoCapture(self.source)
+        return self.cap.isOpened()
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Reads the next frame of the capture.
+
+        Returns:
+            tuple: (True, frame) on success, (False, None) at the end of the video
+                or when the stream is disconnected.
+        """
+        return self.cap.read()
+
+    def get_fps(self) -> float:
+        """
+        Gets the frame rate reported by the capture.
+
+        Returns:
+            float: The frame rate, 0 if the capture does not report it.
+        """
+        return self.cap.get(cv2.CAP_PROP_FPS)
+
+    def release(self) -> None:
+        """
+        Releases the capture if it was opened.
+        """
+        if self.cap is not None:
+            self.cap.release()
+
+    def __str__(self) -> str:
+        """
+        Returns:
+            str: The path, URL or camera index of the source.
+        """
+        return str(self.source)
+
+
+class SyntheticSource(FrameSource):
+    """
+    In-process frame source generating frames with moving boxes, to load-test frame consumers.
+
+    Frames are drawn into a ring of preallocated buffers, so a returned frame
+    is overwritten after `num_buffers` further reads. Copy a frame to keep it
+    longer.
+    """
+
+    def __init__(
+        self,
+        width: int = 1920,
+        height: int = 1080,
+        fps: float = 30,
+        detect_gens: Optional[List[DetectGen]] = None,
+        num_buffers: int = 16,
+        stall_every: Optional[int] = None,
+        stall_seconds: float = 0.5,
+        disconnect_every: Optional[int] = None,
+        seed: int = 0,
+    ) -> None:
+        """
+        Initializes the SyntheticSource object.
+
+        Args:
+            width (int): Width of the frames.
+            height (int): Height of the frames.
+            fps (float): Frame rate reported to VideoStreamer. Box positions follow
+                this frame rate, frame i being drawn at time i / fps.
+            detect_gens (List[DetectGen], optional): Box sequences drawn on the frames.
+            num_buffers (int): Number of preallocated frames, must be larger than the
+                VideoStreamer queue size plus the frames held by the consumer.
+            stall_every (int, optional): Inject a stall every given number of frames.
+            stall_seconds (float): Duration of each stall.
+            disconnect_every (int, optional): Simulate a lost connection every given number
+                of frames, until the source is opened again.
+            seed (int): Seed of the background.
+        """
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.stall_every = stall_every
+        self.stall_seconds = stall_seconds
+        self.disconnect_every = disconnect_every
+        self.batch_detect_gen = None
+        if detect_gens:
+            self.batch_detect_gen = BatchDetectGen(detect_gens)
+            self.batch_detect_gen.start(0)
+
+        rng = np.random.default_rng(seed)
+        small = rng.integers(0, 128, (height // 32 + 1, width // 32 + 1, 3))
+        self.background = cv2.resize(
+            small.astype(np.uint8),
+            (width, height),
+            interpolation=cv2.INTER_LINEAR,
+        )
+        self.buffers = np.empty((num_buffers, height, width, 3), np.uint8)
+        self.frame_count = 0
+        self.is_opened = False
+
+    def open(self) -> bool:
+        """
+        Opens the source, or reconnects it after a simulated disconnection.
+
+        Returns:
+            bool: Always True.
+        """
+        self.is_opened = True
+        return True
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Draws the next frame, with the injected stalls and disconnections.
+
+        Returns:
+            tuple: (True, frame) on success, frame being a buffer overwritten after
+                `num_buffers` reads, (False, None) when the source is disconnected.
+        """
+        if not self.is_opened:
+            return False, None
+
+        self.frame_count += 1
+        if (
+            self.disconnect_every
+            and self.frame_count % self.disconnect_every == 0
+        ):
+            self.is_opened = False
+            return False, None
+        if self.stall_every and self.frame_count % self.stall_every == 0:
+            time.sleep(self.stall_seconds)
+
+        frame = self.buffers[self.frame_count % len(self.buffers)]
+        np.copyto(frame, self.background)
+        if self.batch_detect_gen is not None:
+            xyxy = self.batch_detect_gen.gen_xyxy(self.frame_count / self.fps)
+            xyxy = xyxy[~np.isnan(xyxy[:, 0])].astype(np.int64)
+            for x_min, y_min, x_max, y_max in xyxy:
+                cv2.rectangle(
+                    frame, (x_min, y_min), (x_max, y_max), (0, 255, 0), -1
+                )
+        return True, frame
+
+    def get_fps(self) -> float:
+        """
+        Gets the frame rate given at initialization.
+
+        Returns:
+            float: The frame rate of the source.
+        """
+        return self.fps
+
+    def release(self) -> None:
+        """
+        Closes the source, reads fail until it is opened again.
+        """
+        self.is_opened = False
+
+    def __str__(self) -> str:
+        """
+        Returns:
+            str: The size and frame rate of the source.
+        """
+        return f"SyntheticSource({self.width}x{self.height}@{self.fps})"
+
+
 class VideoStreamer:
     """
     A class to stream video from a source (file or camera), continuously read frames, and store them in a queue.
 
     Args:
-        source (str): Path to the video source or camera index.
+        source (str or int or FrameSource): Path to the video source, camera index, or a FrameSource.
         reconnect (bool): Whether to reconnect to the video source if the connection is lost. Default is True.
     """
 
     def __init__(
         self,
-        source: str,
+        source: Union[str, int, FrameSource],
         fps: int = None,
         reconnect: bool = True,
         reconnect_time: float = 2,
@@ -27,7 +257,8 @@ class VideoStreamer:
         Initializes the VideoStreamer class to stream video from the specified source.
 
         Args:
-            source (str): The path to the video source or camera index.
+            source (str or int or FrameSource): The path to the video source, camera index,
+                or a FrameSource such as SyntheticSource.
             reconnect (bool): Whether to reconnect to the video source if the connection is lost.
             reconnect_time (float): Time to play the source after out of frames or connection lost
         """
@@ -47,13 +278,15 @@ class VideoStreamer:
 
         If the video source is lost, it attempts to reconnect if `self.reconnect` is True.
         """
-        cap = cv2.VideoCapture(self.source)
+        cap = self.source
+        if not isinstance(cap, FrameSource):
+            cap = CaptureSource(self.source)
 
-        if not cap.isOpened():
-            raise ValueError(f"Error when playing {self.source}.")
+        if not cap.open():
+            raise ValueError(f"Error when playing {cap}.")
 
         if self.fps is None:
-            self.fps = cap.get(cv2.CAP_PROP_FPS)
+            self.fps = cap.get_fps()
 
         running = True
         fps_counter = FPSCounter()
@@ -61,11 +294,15 @@ class VideoStreamer:
         while running:
             ret, frame = cap.read()
 
-            if not ret or self._stop:
+            if self._stop:
+                break
+
+            if not ret:
                 if self.reconnect:
                     print("Reconnect...")
                     time.sleep(self.reconnect_time)
-                    cap = cv2.VideoCapture(self.source)
+                    cap.release()
+                    cap.open()
                     fps_counter = FPSCounter()
                     continue
                 break
@@ -0,0 +1,268 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from kano.dataset_utils import YoloDataset
+from kano.image import letterbox_image, read_image
+
+
+class YoloLoader:
+    """
+    Iterates over a subset of a YoloDataset in batches of images and labels.
+
+    The images of the next `prefetch` batches are read and decoded by a
+    pool of threads while the current batch is used, OpenCV releasing the
+    GIL while decoding and resizing. Labels come from the label store of
+    the subset, so no label file is parsed during the iteration.
+
+    Each batch is a dict with:
+        - images: (B, H, W, 3) uint8 contiguous images
+        - indices: (B,) indices of the images in the subset
+        - scales: (B, 2) (x, y) scale from the original images to the batch images
+        - pads: (B, 2) (left, top) padding of the batch images
+        - label_batch_ids: (M,) index in the batch of the image of every label
+        - classes: (M,) int32 class ids
+        - xyxy: (M, 4) float32 boxes in pixels of the batch images
+        - keypoints: (M, K, 3) float32 keypoints (x, y, state) in pixels, for pose tasks
+        - points, point_offsets: (P, 2) float32 polygon points in pixels and their
+          (M + 1,) offsets, for segmentation tasks
+
+    A point (x, y) of a batch image is the point
+    `((x - left) / scale_x, (y - top) / scale_y)` of the original image, and
+    `unletterbox_boxes(xyxy, np.hstack([scales, pads]), label_batch_ids)` maps
+    boxes back to the original images.
+
+    Attributes:
+        dataset (YoloDataset): The dataset.
+        subset (str): Subset folder name.
+        label_store (LabelStore): Labels of the subset.
+        epoch (int): Epoch of the next iteration.
+    """
+
+    def __init__(
+        self,
+        dataset: YoloDataset,
+        subset: str = "train",
+        batch_size: int = 16,
+        image_size: Optional[Tuple[int, int]] = None,
+        shuffle: bool = False,
+        seed: int = 0,
+        num_workers: Optional[int] = None,
+        prefetch: int = 2,
+        drop_last: bool = False,
+        pad_value: int = 114,
+    ) -> None:
+        """
+        Initialize a YoloLoader object.
+
+        Args:
+            dataset (YoloDataset): The dataset, packed or not.
+            subset (str): Subset folder name: "train", "valid" or "test".
+            batch_size (int): Number of images per batch.
+            image_size (tuple(int, int), optional): (height, width) of the batch images,
+                the images are letterboxed into it. Default keeps the original sizes,
+                which must then be the same for all the images.
+            shuffle (bool): Whether to shuffle the images, differently at every epoch.
+            seed (int): Seed of the shuffling, the order of an epoch only depends on
+                the seed and the epoch.
+            num_workers (int, optional): Number of decoding threads. Default is the
+                number of CPUs.
+            prefetch (int): Number of batches read ahead.
+            drop_last (bool): Whether to drop the last incomplete batch.
+            pad_value (int): Value of the padding pixels of the letterbox.
+        """
+        if batch_size < 1 or prefetch < 1:
+            raise ValueError("batch_size and prefetch must be positive.")
+        self.dataset = dataset
+        self.subset = subset
+        self.batch_size = batch_size
+        self.image_size = tuple(image_size) if image_size else None
+        self.shuffle = shuffle
+        self.seed = seed
+        self.num_workers = num_workers or os.cpu_count()
+        self.prefetch = prefetch
+        self.drop_last = drop_last
+        self.pad_value = pad_value
+        self.epoch = 0
+
+        self.images_paths = dataset.list_images(subset)
+        self.packed_subset = None
+        if dataset.packed:
+            self.packed_subset = dataset.get_packed_subset(subset)
+        self.label_store = dataset.get_label_store(subset)
+
+    def __len__(self) -> int:
+        num_images = len(self.images_paths)
+        if self.drop_last:
+            return num_images // self.batch_size
+        return -(-num_images // self.batch_size)
+
+    def set_epoch(self, epoch: int) -> None:
+        """
+        Set the epoch of the next iteration, e.g. to resume a training.
+
+        Args:
+            epoch (int): Epoch of the next iteration.
+        """
+        self.epoch = epoch
+
+    def get_order(self, epoch: int) -> np.ndarray:
+        """
+        Get the order of the images in an epoch.
+
+        Args:
+            epoch (int): The epoch.
+
+        Returns:
+            indices (np.ndarray): (N,) indices of the images.
+        """
+        if not self.shuffle:
+            return np.arange(len(self.images_paths))
+        rng = np.random.default_rng([self.seed, epoch])
+        return rng.permutation(len(self.images_paths))
+
+    def _read_image(self, index: int) -> np.ndarray:
+        if self.packed_subset is not None:
+            image = self.packed_subset.get_image(index)
+        else:
+            image = read_image(self.images_paths[index])
+        if image is None:
+            raise ValueError(f"Cannot read {self.images_paths[index]}.")
+        return image
+
+    def _load_image(
+        self, index: int, out: Optional[np.ndarray]
+    ) -> Tuple[Optional[np.ndarray], Tuple[int, ...]]:
+        image = self._read_image(index)
+        height, width = image.shape[:2]
+        if out is None:
+            return image, (width, height, 1.0, 1.0, 0.0, 0.0)
+        _, params = letterbox_image(image, out=out, pad_value=self.pad_value)
+        return None, (width, height, *params.tolist())
+
+    def _submit_batch(
+        self, executor: ThreadPoolExecutor, indices: np.ndarray
+    ) -> Tuple[Optional[np.ndarray], List]:
+        images = None
+        if self.image_size is not None:
+            images = np.empty(
+                (len(indices), *self.image_size, 3), dtype=np.uint8
+            )
+        futures = [
+            executor.submit(
+                self._load_image,
+                index,
+                None if images is None else images[slot],
+            )
+            for slot, index in enumerate(indices.tolist())
+        ]
+        return images, futures
+
+    def _collate(
+        self, indices: np.ndarray, images: Optional[np.ndarray], futures: List
+    ) -> dict:
+        results = [future.result() for future in futures]
+        if images is None:
+            shapes = {image.shape for image, _ in results}
+            if len(shapes) > 1:
+                raise ValueError(
+                    "Images of different sizes need an image_size to be batched."
+                )
+            images = np.stack([image for image, _ in results])
+        # (width, height, scale_x, scale_y, left, top) of every image
+        placements = np.array(
+            [placement for _, placement in results], dtype=np.float32
+        )
+        scales = placements[:, 2:4]
+        pads = placements[:, 4:]
+        new_sizes = placements[:, :2] * scales
+
+        label_store = self.label_store
+        starts = label_store.label_offsets[indices]
+        ends = label_store.label_offsets[indices + 1]
+        label_batch_ids = np.repeat(np.arange(len(indices)), ends - starts)
+        labels = [label_store.get_labels(index) for index in indices.tolist()]
+        # scaled coordinates are mapped to the resized images, then padded
+        label_scales = new_sizes[label_batch_ids]
+        label_pads = pads[label_batch_ids]
+
+        s_xywh = np.concatenate(
+            [np.zeros((0, 4), np.float32)] + [lab["s_xywh"] for lab in labels]
+        )
+        xyxy = np.empty((len(s_xywh), 4), dtype=np.float32)
+        xyxy[:, :2] = s_xywh[:, :2] - s_xywh[:, 2:] / 2
+        xyxy[:, 2:] = s_xywh[:, :2] + s_xywh[:, 2:] / 2
+        xyxy *= np.tile(label_scales, 2)
+        xyxy += np.tile(label_pads, 2)
+
+        batch = {
+            "images": images,
+            "indices": indices,
+            "scales": scales,
+            "pads": pads,
+            "label_batch_ids": label_batch_ids,
+            "classes": np.concatenate(
+                [np.zeros(0, np.int32)] + [lab["classes"] for lab in labels]
+            ),
+            "xyxy": xyxy,
+        }
+        if label_store.task == "pose":
+            num_keypoints = label_store.keypoints.shape[1]
+            keypoints = np.concatenate(
+                [np.zeros((0, num_keypoints, 3), np.float32)]
+                + [lab["keypoints"] for lab in labels]
+            )
+            keypoints[:, :, :2] *= label_scales[:, None]
+            keypoints[:, :, :2] += label_pads[:, None]
+            batch["keypoints"] = keypoints
+        elif label_store.task == "segment":
+            point_counts = [np.diff(lab["point_offsets"]) for lab in labels]
+            point_counts = np.concatenate(
+                [np.zeros(0, np.int64)] + point_counts
+            )
+            point_offsets = np.zeros(len(point_counts) + 1, dtype=np.int64)
+            np.cumsum(point_counts, out=point_offsets[1:])
+            points = np.concatenate(
+                [np.zeros((0, 2), np.float32)]
+                + [lab["points"] for lab in labels]
+            )
+            point_ids = np.repeat(label_batch_ids, point_counts)
+            points *= new_sizes[point_ids]
+            points += pads[point_ids]
+            batch["points"] = points
+            batch["point_offsets"] = point_offsets
+        return batch
+
+    def __iter__(self) -> Iterator[dict]:
+        order = self.get_order(self.epoch)
+        self.epoch += 1
+        batches = [
+            order[start : start + self.batch_size]
+            for start in range(0, len(order), self.batch_size)
+        ]
+        if self.drop_last and batches and len(batches[-1]) < self.batch_size:
+            batches.pop()
+
+        with ThreadPoolExecutor(self.num_workers) as executor:
+            pending = deque()
+            batches = iter(batches)
+            for indices in batches:
+                pending.append(
+                    (indices, *self._submit_batch(executor, indices))
+                )
+                if len(pending) >= self.prefetch:
+                    break
+            while pending:
+                indices, images, futures = pending.popleft()
+                next_indices = next(batches, None)
+                if next_indices is not None:
+                    pending.append(
+                        (
+                            next_indices,
+                            *self._submit_batch(executor, next_indices),
+                        )
+                    )
+                yield self._collate(indices, images, futures)
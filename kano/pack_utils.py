@@ -0,0 +1,636 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+import yaml
+
+from kano.file_utils import create_folder, list_files
+
+SUBSETS = ["train", "valid", "test"]
+INDEX_ARRAYS = [
+    "file_names",
+    "shard_ids",
+    "byte_offsets",
+    "byte_sizes",
+    "label_offsets",
+    "row_offsets",
+    "label_values",
+]
+
+
+def read_label_rows(label_path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read the rows of a YOLO label file of any task into one flat array.
+
+    Args:
+        label_path (str): Path to the label file.
+
+    Returns:
+        values (np.ndarray): (V,) float32 values of all the rows, class ids included.
+        row_offsets (np.ndarray): (R + 1,) offsets of the values of each row.
+    """
+    values = np.zeros(0, dtype=np.float32)
+    row_offsets = np.zeros(1, dtype=np.int64)
+    if not Path(label_path).exists():
+        return values, row_offsets
+    with open(label_path, "r") as file:
+        lines = [line for line in file.read().splitlines() if line.strip()]
+    if not lines:
+        return values, row_offsets
+
+    lengths = [len(line.split()) for line in lines]
+    values = np.array(" ".join(lines).split(), dtype=np.float32)
+    row_offsets = np.zeros(len(lines) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=row_offsets[1:])
+    return values, row_offsets
+
+
+def split_polygon_rows(
+    values: np.ndarray, row_offsets: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Split the rows of segmentation labels into classes and flat polygon points.
+
+    Args:
+        values (np.ndarray): (V,) values of all the rows, see `read_label_rows`.
+        row_offsets (np.ndarray): (R + 1,) offsets of the values of each row.
+
+    Returns:
+        classes (np.ndarray): (R,) class ids.
+        points (np.ndarray): (P, 2) points (x, y) of all the polygons.
+        offsets (np.ndarray): (R + 1,) offsets of the points of each polygon.
+    """
+    lengths = np.diff(row_offsets)
+    if np.any(lengths < 3) or np.any(lengths % 2 == 0):
+        raise ValueError("Polygon labels must be a class and (x, y) points.")
+    row_starts = row_offsets[:-1]
+    classes = values[row_starts].astype(np.int64)
+    is_point = np.ones(len(values), dtype=bool)
+    is_point[row_starts] = False
+    points = values[is_point].reshape(-1, 2)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum((lengths - 1) // 2, out=offsets[1:])
+    return classes, points, offsets
+
+
+def is_packed_dataset(dataset_path: str) -> bool:
+    """
+    Check whether a dataset folder was written by `pack_dataset`.
+
+    Args:
+        dataset_path (str): Path to the dataset folder.
+
+    Returns:
+        bool: True for a packed dataset.
+    """
+    yaml_path = Path(dataset_path) / "data.yaml"
+    if not yaml_path.exists():
+        return False
+    with open(yaml_path, "r") as file:
+        data = yaml.safe_load(file)
+    return bool(data.get("packed", False))
+
+
+def _get_label_path(image_path: Path) -> Path:
+    return image_path.parent.parent / "labels" / (image_path.stem + ".txt")
+
+
+def _read_sample(image_path: Path) -> Tuple[bytes, np.ndarray, np.ndarray]:
+    with open(image_path, "rb") as file:
+        image_bytes = file.read()
+    return (image_bytes, *read_label_rows(_get_label_path(image_path)))
+
+
+def _pack_subset(
+    subset_path: Path,
+    packed_subset_path: Path,
+    shard_size: int,
+    num_workers: int,
+    chunk_size: int = 1024,
+) -> int:
+    """
+    Pack the images and labels of one subset folder.
+
+    Returns:
+        int: Number of packed images.
+    """
+    create_folder(packed_subset_path / "index")
+    images_paths = [Path(p) for p in list_files(str(subset_path / "images"))]
+    num_images = len(images_paths)
+    shard_ids = np.zeros(num_images, dtype=np.int32)
+    byte_offsets = np.zeros(num_images, dtype=np.int64)
+    byte_sizes = np.zeros(num_images, dtype=np.int64)
+    label_offsets = np.zeros(num_images + 1, dtype=np.int64)
+    all_values, all_row_lengths = list(), list()
+
+    shard_id, shard_bytes = 0, 0
+    shard_file = open(packed_subset_path / "shard_00000.bin", "wb")
+    with ThreadPoolExecutor(num_workers) as executor:
+        # bounded chunks, the reads of one chunk overlap each other
+        for chunk_start in range(0, num_images, chunk_size):
+            chunk_paths = images_paths[chunk_start : chunk_start + chunk_size]
+            samples = executor.map(_read_sample, chunk_paths)
+            for index, (image_bytes, values, row_offsets) in enumerate(
+                samples, chunk_start
+            ):
+                if shard_bytes and shard_bytes + len(image_bytes) > shard_size:
+                    shard_file.close()
+                    shard_id, shard_bytes = shard_id + 1, 0
+                    shard_file = open(
+                        packed_subset_path / f"shard_{shard_id:05d}.bin", "wb"
+                    )
+                shard_file.write(image_bytes)
+                shard_ids[index] = shard_id
+                byte_offsets[index] = shard_bytes
+                byte_sizes[index] = len(image_bytes)
+                shard_bytes += len(image_bytes)
+
+                label_offsets[index + 1] = label_offsets[index] + (
+                    len(row_offsets) - 1
+                )
+                all_values.append(values)
+                all_row_lengths.append(np.diff(row_offsets))
+    shard_file.close()
+
+    row_lengths = np.concatenate(
+        [np.zeros(0, dtype=np.int64)] + all_row_lengths
+    )
+    row_offsets = np.zeros(len(row_lengths) + 1, dtype=np.int64)
+    np.cumsum(row_lengths, out=row_offsets[1:])
+    arrays = {
+        "file_names": np.array(
+            [path.name for path in images_paths], dtype=str
+        ),
+        "shard_ids": shard_ids,
+        "byte_offsets": byte_offsets,
+        "byte_sizes": byte_sizes,
+        "label_offsets": label_offsets,
+        "row_offsets": row_offsets,
+        "label_values": np.concatenate(
+            [np.zeros(0, dtype=np.float32)] + all_values
+        ),
+    }
+    for name, array in arrays.items():
+        np.save(packed_subset_path / "index" / f"{name}.npy", array)
+    return num_images
+
+
+def pack_dataset(
+    dataset_path: str,
+    packed_dataset_path: str,
+    shard_size: int = 64 * 2**20,
+    num_workers: int = 8,
+) -> None:
+    """
+    Pack a YOLO dataset folder into a few large shard files per subset.
+
+    The encoded images are appended as they are to shard files of about
+    `shard_size` bytes. The labels of all the images are stored as one
+    float32 array. An index of offsets, loaded memory-mapped, locates the
+    image bytes and labels of every image. Open the packed dataset with
+    `YoloDataset` or `PackedSubset`.
+
+    Args:
+        dataset_path (str): Path to the dataset folder.
+        packed_dataset_path (str): Path to the packed dataset folder.
+        shard_size (int): Maximum number of image bytes per shard, exceeded only
+            by single images larger than it.
+        num_workers (int): Number of threads reading the files.
+    """
+    dataset_path = Path(dataset_path)
+    packed_dataset_path = Path(packed_dataset_path)
+    with open(dataset_path / "data.yaml", "r") as file:
+        data = yaml.safe_load(file)
+
+    for subset in SUBSETS:
+        if (dataset_path / subset / "images").exists():
+            num_images = _pack_subset(
+                dataset_path / subset,
+                packed_dataset_path / subset,
+                shard_size,
+                num_workers,
+            )
+            print(f"Packed {subset}: {num_images} images")
+
+    data["packed"] = True
+    with open(packed_dataset_path / "data.yaml", "w") as file:
+        yaml.dump(data, file)
+
+
+def unpack_dataset(packed_dataset_path: str, dataset_path: str) -> None:
+    """
+    Write a packed dataset back into a YOLO dataset folder.
+
+    Label values are written with 6 decimals from their float32 values.
+
+    Args:
+        packed_dataset_path (str): Path to the packed dataset folder.
+        dataset_path (str): Path to the dataset folder.
+    """
+    packed_dataset_path = Path(packed_dataset_path)
+    dataset_path = Path(dataset_path)
+    for subset in SUBSETS:
+        if not (packed_dataset_path / subset / "index").exists():
+            continue
+        packed_subset = PackedSubset(packed_dataset_path / subset)
+        images_folder = dataset_path / subset / "images"
+        labels_folder = dataset_path / subset / "labels"
+        create_folder(images_folder)
+        create_folder(labels_folder)
+        for index, image_bytes in packed_subset.iter_samples():
+            file_name = packed_subset.file_names[index]
+            with open(images_folder / file_name, "wb") as file:
+                file.write(image_bytes)
+            values, row_offsets = packed_subset.get_label_rows(index)
+            with open(
+                labels_folder / Path(file_name).with_suffix(".txt"), "w"
+            ) as file:
+                for start, end in zip(row_offsets[:-1], row_offsets[1:]):
+                    row = values[start:end]
+                    row_values = " ".join(f"{x:.6f}" for x in row[1:])
+                    file.write(f"{int(row[0])} {row_values}\n")
+
+    with open(packed_dataset_path / "data.yaml", "r") as file:
+        data = yaml.safe_load(file)
+    data.pop("packed", None)
+    with open(dataset_path / "data.yaml", "w") as file:
+        yaml.dump(data, file)
+
+
+class PackedSubset:
+    """
+    Read access to one subset of a packed dataset.
+
+    The index arrays and the shards are memory-mapped, so opening a subset
+    reads almost nothing and random access only reads the requested bytes.
+
+    Attributes:
+        subset_path (Path): Path to the subset folder.
+        file_names (np.ndarray): (N,) file names of the images.
+        shard_ids (np.ndarray): (N,) shard of every image.
+        byte_offsets (np.ndarray): (N,) offset of every image in its shard.
+        byte_sizes (np.ndarray): (N,) size in bytes of every encoded image.
+        label_offsets (np.ndarray): (N + 1,) offsets of the label rows of each image.
+        row_offsets (np.ndarray): (R + 1,) offsets of the values of each label row.
+        label_values (np.ndarray): (V,) float32 values of all the label rows.
+    """
+
+    def __init__(self, subset_path: str) -> None:
+        """
+        Initialize a PackedSubset object.
+
+        Args:
+            subset_path (str): Path to the subset folder of a packed dataset.
+        """
+        self.subset_path = Path(subset_path)
+        for name in INDEX_ARRAYS:
+            array = np.load(
+                self.subset_path / "index" / f"{name}.npy", mmap_mode="r"
+            )
+            setattr(self, name, array)
+        self.num_shards = (
+            int(self.shard_ids[-1]) + 1 if len(self.shard_ids) else 0
+        )
+        # images are written shard after shard
+        self.shard_starts = np.searchsorted(
+            self.shard_ids, np.arange(self.num_shards + 1)
+        )
+        self._shards: Dict[int, np.memmap] = dict()
+
+    def __getstate__(self) -> dict:
+        # memory maps are reopened by each process instead of copied
+        return {"subset_path": self.subset_path}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["subset_path"])
+
+    def __len__(self) -> int:
+        return len(self.file_names)
+
+    def _get_shard_path(self, shard_id: int) -> Path:
+        return self.subset_path / f"shard_{shard_id:05d}.bin"
+
+    def _get_shard(self, shard_id: int) -> np.memmap:
+        if shard_id not in self._shards:
+            self._shards[shard_id] = np.memmap(
+                self._get_shard_path(shard_id), dtype=np.uint8, mode="r"
+            )
+        return self._shards[shard_id]
+
+    def get_image_bytes(self, index: int) -> np.ndarray:
+        """
+        Get the encoded bytes of an image, without copy.
+
+        Args:
+            index (int): Index of the image.
+
+        Returns:
+            image_bytes (np.ndarray): uint8 bytes of the image file.
+        """
+        start = int(self.byte_offsets[index])
+        shard = self._get_shard(int(self.shard_ids[index]))
+        return shard[start : start + int(self.byte_sizes[index])]
+
+    def get_image(
+        self, index: int, flags: int = cv2.IMREAD_COLOR
+    ) -> np.ndarray:
+        """
+        Decode an image.
+
+        Args:
+            index (int): Index of the image.
+            flags (int): Flags of `cv2.imdecode`.
+
+        Returns:
+            image (np.ndarray): The decoded image.
+        """
+        return cv2.imdecode(np.asarray(self.get_image_bytes(index)), flags)
+
+    def get_label_rows(self, index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the label rows of an image, as `read_label_rows` does.
+
+        Args:
+            index (int): Index of the image.
+
+        Returns:
+            values (np.ndarray): (V,) float32 values of all the rows, class ids included.
+            row_offsets (np.ndarray): (R + 1,) offsets of the values of each row.
+        """
+        first_row = int(self.label_offsets[index])
+        row_offsets = np.array(
+            self.row_offsets[
+                first_row : int(self.label_offsets[index + 1]) + 1
+            ]
+        )
+        values = self.label_values[row_offsets[0] : row_offsets[-1]]
+        return values, row_offsets - row_offsets[0]
+
+    def get_label_array(self, index: int) -> np.ndarray:
+        """
+        Get the labels of an image as one array, as `read_label_array` does.
+
+        Args:
+            index (int): Index of the image.
+
+        Returns:
+            labels (np.ndarray): (N, C) float array with one row per label, (0, 0) without
+                labels.
+        """
+        values, row_offsets = self.get_label_rows(index)
+        num_rows = len(row_offsets) - 1
+        if not num_rows:
+            return np.zeros((0, 0))
+        if len(values) % num_rows or np.any(
+            np.diff(row_offsets) != len(values) // num_rows
+        ):
+            raise ValueError(
+                f"Labels of {self.file_names[index]} have different lengths."
+            )
+        return values.astype(np.float64).reshape(num_rows, -1)
+
+    def iter_samples(
+        self, shuffle: bool = False, seed: Optional[int] = None
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Iterate over the encoded images, reading each shard sequentially once.
+
+        Shuffling permutes the order of the shards and the order of the images
+        inside each shard. A shuffled shard is first read at once, so that the
+        reads stay sequential, and only one shard is held in memory at a time.
+
+        Args:
+            shuffle (bool): Whether to shuffle the images.
+            seed (int, optional): Seed of the shuffling.
+
+        Yields:
+            index (int): Index of the image.
+            image_bytes (np.ndarray): uint8 bytes of the image file.
+        """
+        rng = np.random.default_rng(seed)
+        shard_order = np.arange(self.num_shards)
+        if shuffle:
+            shard_order = rng.permutation(self.num_shards)
+        for shard_id in shard_order:
+            if shuffle:
+                shard = np.fromfile(
+                    self._get_shard_path(shard_id), dtype=np.uint8
+                )
+            else:
+                shard = self._get_shard(shard_id)
+            indices = np.arange(
+                self.shard_starts[shard_id], self.shard_starts[shard_id + 1]
+            )
+            if shuffle:
+                indices = rng.permutation(indices)
+            for index in indices.tolist():
+                start = int(self.byte_offsets[index])
+                yield index, shard[start : start + int(self.byte_sizes[index])]
+
+    def __repr__(self) -> str:
+        return (
+            f"PackedSubset(num_images={len(self)}, "
+            f"num_shards={self.num_shards})"
+        )
+
+
+class LabelStore:
+    """
+    Labels of all the images of a subset compiled into memory-mapped arrays.
+
+    The labels of image i are the rows `label_offsets[i]:label_offsets[i + 1]`
+    of the label arrays, so they are fetched without reading any label file.
+    Worker processes opening the same store share its pages, and a pickled
+    store is reopened from its path instead of copied.
+
+    Compile the store again after editing the label files.
+
+    Attributes:
+        store_path (Path): Folder of the arrays.
+        task (str): Task of the labels: "detect", "pose" or "segment".
+        file_names (np.ndarray): (N,) file names of the images.
+        label_offsets (np.ndarray): (N + 1,) offsets of the labels of each image.
+        classes (np.ndarray): (L,) int32 class ids.
+        boxes (np.ndarray): (L, 4) float32 scaled xywh boxes, the bounds of the
+            polygons for segmentation tasks.
+        keypoints (np.ndarray): (L, K, 3) float32 scaled keypoints (x, y, state)
+            for pose tasks, None otherwise.
+        points (np.ndarray): (P, 2) float32 scaled points of all the polygons
+            for segmentation tasks, None otherwise.
+        point_offsets (np.ndarray): (L + 1,) offsets of the points of each polygon
+            for segmentation tasks, None otherwise.
+    """
+
+    ARRAYS = {
+        "detect": ["file_names", "label_offsets", "classes", "boxes"],
+        "pose": [
+            "file_names",
+            "label_offsets",
+            "classes",
+            "boxes",
+            "keypoints",
+        ],
+        "segment": [
+            "file_names",
+            "label_offsets",
+            "classes",
+            "boxes",
+            "points",
+            "point_offsets",
+        ],
+    }
+
+    def __init__(self, store_path: str) -> None:
+        """
+        Open a compiled store, see `YoloDataset.get_label_store` to compile one.
+
+        Args:
+            store_path (str): Folder of the arrays.
+        """
+        self.store_path = Path(store_path)
+        with open(self.store_path / "store.yaml", "r") as file:
+            self.task = yaml.safe_load(file)["task"]
+        self.keypoints = self.points = self.point_offsets = None
+        for name in self.ARRAYS[self.task]:
+            array = np.load(self.store_path / f"{name}.npy", mmap_mode="r")
+            setattr(self, name, array)
+
+    @classmethod
+    def compile(
+        cls,
+        store_path: str,
+        task: str,
+        file_names: np.ndarray,
+        label_offsets: np.ndarray,
+        values: np.ndarray,
+        row_offsets: np.ndarray,
+    ) -> "LabelStore":
+        """
+        Compile label rows into a store.
+
+        Args:
+            store_path (str): Folder of the arrays.
+            task (str): Task of the labels: "detect", "pose" or "segment".
+            file_names (np.ndarray): (N,) file names of the images.
+            label_offsets (np.ndarray): (N + 1,) offsets of the rows of each image.
+            values (np.ndarray): (V,) values of all the rows, see `read_label_rows`.
+            row_offsets (np.ndarray): (R + 1,) offsets of the values of each row.
+
+        Returns:
+            label_store (LabelStore): The opened store.
+        """
+        if task not in cls.ARRAYS:
+            raise ValueError(
+                "Unexpected task. Please provide one of:", list(cls.ARRAYS)
+            )
+        values = np.asarray(values, dtype=np.float32)
+        row_starts = np.asarray(row_offsets[:-1])
+        lengths = np.diff(row_offsets)
+        arrays = {
+            "file_names": np.asarray(file_names, dtype=str),
+            "label_offsets": np.asarray(label_offsets, dtype=np.int64),
+        }
+
+        if task == "segment":
+            classes, points, point_offsets = split_polygon_rows(
+                values, row_offsets
+            )
+            boxes = np.zeros((len(classes), 4), dtype=np.float32)
+            if len(classes):
+                # xyxy bounds of the polygons, then xywh
+                boxes[:, :2] = np.minimum.reduceat(points, point_offsets[:-1])
+                boxes[:, 2:] = np.maximum.reduceat(points, point_offsets[:-1])
+                boxes[:, 2:] -= boxes[:, :2]
+                boxes[:, :2] += boxes[:, 2:] / 2
+            arrays["points"] = points
+            arrays["point_offsets"] = point_offsets
+        else:
+            if np.any(lengths < 5):
+                raise ValueError("Labels must have a class and a box.")
+            classes = values[row_starts]
+            boxes = values[row_starts[:, None] + np.arange(1, 5)]
+        if task == "pose":
+            num_values = lengths[0] if len(lengths) else 5
+            if np.any(lengths != num_values) or (num_values - 5) % 3:
+                raise ValueError(
+                    "Pose labels must all have a box and (x, y, state) keypoints."
+                )
+            num_keypoints = (num_values - 5) // 3
+            columns = row_starts[:, None] + np.arange(5, num_values)
+            arrays["keypoints"] = values[columns].reshape(
+                len(row_starts), num_keypoints, 3
+            )
+        arrays["classes"] = classes.astype(np.int32)
+        arrays["boxes"] = boxes
+
+        create_folder(store_path)
+        store_path = Path(store_path)
+        for name, array in arrays.items():
+            np.save(store_path / f"{name}.npy", array)
+        with open(store_path / "store.yaml", "w") as file:
+            yaml.dump({"task": task}, file)
+        return cls(store_path)
+
+    def __getstate__(self) -> dict:
+        return {"store_path": self.store_path}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["store_path"])
+
+    def __len__(self) -> int:
+        return len(self.file_names)
+
+    @property
+    def image_indices(self) -> np.ndarray:
+        """
+        np.ndarray: (L,) index of the image of every label.
+        """
+        return np.repeat(np.arange(len(self)), np.diff(self.label_offsets))
+
+    def get_labels(self, index: int) -> dict:
+        """
+        Get the labels of an image as views of the store, without parsing.
+
+        Args:
+            index (int): Index of the image.
+
+        Returns:
+            labels (dict): "classes" (N,) and "s_xywh" (N, 4) arrays, with "keypoints"
+                (N, K, 3) for pose tasks, "points" (P, 2) and "point_offsets" (N + 1,)
+                for segmentation tasks.
+        """
+        start = int(self.label_offsets[index])
+        end = int(self.label_offsets[index + 1])
+        labels = {
+            "classes": self.classes[start:end],
+            "s_xywh": self.boxes[start:end],
+        }
+        if self.task == "pose":
+            labels["keypoints"] = self.keypoints[start:end]
+        elif self.task == "segment":
+            point_offsets = np.array(self.point_offsets[start : end + 1])
+            labels["points"] = self.points[
+                point_offsets[0] : point_offsets[-1]
+            ]
+            labels["point_offsets"] = point_offsets - point_offsets[0]
+        return labels
+
+    def count_classes(self, num_classes: Optional[int] = None) -> np.ndarray:
+        """
+        Count the labels of every class.
+
+        Args:
+            num_classes (int, optional): Minimum length of the counts.
+
+        Returns:
+            counts (np.ndarray): (C,) number of labels of every class.
+        """
+        return np.bincount(self.classes, minlength=num_classes or 0)
+
+    def __repr__(self) -> str:
+        return (
+            f"LabelStore(task={self.task}, num_images={len(self)}, "
+            f"num_labels={len(self.classes)})"
+        )
@@ -1,90 +1,514 @@
+from typing import List, Optional, Sequence, Tuple, Union
+
 import cv2
+import numpy as np
+
+from kano.image.cache import read_image
+
+HEAD_COLOR = (255, 0, 0)
+BODY_COLOR = (0, 0, 255)
+LEG_COLOR = (0, 255, 0)
+
+
+class Skeleton:
+    """
+    Definition of the keypoints and edges of a skeleton, with their colors.
+
+    Attributes:
+        num_keypoints (int): Number of keypoints of a person.
+        edges (np.ndarray): (E, 2) keypoint indices of the edges.
+        keypoint_colors (list(tuple)): BGR color of each keypoint.
+        edge_colors (list(tuple)): BGR color of each edge.
+    """
+
+    def __init__(
+        self,
+        num_keypoints: int,
+        edges: Sequence[Tuple[int, int]],
+        keypoint_colors: Optional[Sequence[Tuple[int, int, int]]] = None,
+        edge_colors: Optional[Sequence[Tuple[int, int, int]]] = None,
+        default_color: Tuple[int, int, int] = LEG_COLOR,
+    ) -> None:
+        """
+        Initialize a Skeleton object.
+
+        Args:
+            num_keypoints (int): Number of keypoints of a person.
+            edges (list(tuple(int, int))): Keypoint indices of the edges.
+            keypoint_colors (list(tuple), optional): BGR color of each keypoint.
+            edge_colors (list(tuple), optional): BGR color of each edge.
+            default_color (tuple(int, int, int)): Color of the keypoints and edges
+                when their colors are not given.
+        """
+        self.num_keypoints = num_keypoints
+        self.edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        if len(self.edges) and not (
+            0 <= self.edges.min() and self.edges.max() < num_keypoints
+        ):
+            raise ValueError("Edges must join keypoints of the skeleton.")
+
+        if keypoint_colors is None:
+            keypoint_colors = [default_color] * num_keypoints
+        if edge_colors is None:
+            edge_colors = [default_color] * len(self.edges)
+        if len(keypoint_colors) != num_keypoints:
+            raise ValueError("Need exactly one color per keypoint.")
+        if len(edge_colors) != len(self.edges):
+            raise ValueError("Need exactly one color per edge.")
+        self.keypoint_colors = [tuple(color) for color in keypoint_colors]
+        self.edge_colors = [tuple(color) for color in edge_colors]
+
+    @staticmethod
+    def chain_edges(chain: Sequence[int]) -> List[Tuple[int, int]]:
+        """
+        Get the edges joining consecutive keypoints of a chain.
+
+        Args:
+            chain (list(int)): Keypoint indices, e.g. [16, 14, 12] for ankle, knee, hip.
+
+        Returns:
+            edges (list(tuple(int, int))): The len(chain) - 1 edges.
+        """
+        return list(zip(chain[:-1], chain[1:]))
+
+    def __repr__(self) -> str:
+        return (
+            f"Skeleton(num_keypoints={self.num_keypoints}, "
+            f"num_edges={len(self.edges)})"
+        )
+
+
+def _get_coco_skeleton() -> Skeleton:
+    head_edges = Skeleton.chain_edges([6, 4, 2, 0, 1, 3, 5])
+    body_edges = Skeleton.chain_edges([10, 8, 6, 5, 7, 9])
+    body_edges += [(12, 6), (11, 5)]
+    leg_edges = Skeleton.chain_edges([16, 14, 12, 11, 13, 15])
+    return Skeleton(
+        17,
+        head_edges + body_edges + leg_edges,
+        keypoint_colors=[HEAD_COLOR] * 5 + [BODY_COLOR] * 6 + [LEG_COLOR] * 6,
+        edge_colors=[HEAD_COLOR] * len(head_edges)
+        + [BODY_COLOR] * len(body_edges)
+        + [LEG_COLOR] * len(leg_edges),
+    )
+
+
+# 17 keypoints of COCO and YOLO pose datasets: head 0-4, body 5-10, legs 11-16
+COCO_SKELETON = _get_coco_skeleton()
+
+
+def draw_skeletons(
+    image: Union[str, np.ndarray],
+    keypoints: np.ndarray,
+    skeleton: Skeleton = COCO_SKELETON,
+    radius: int = 10,
+    line_thickness: int = 2,
+    copy: bool = True,
+) -> np.ndarray:
+    """
+    Draw the skeletons of several persons on one copy of the image.
 
+    Visible keypoints (state 2) are drawn as filled circles and occluded ones
+    (state 1) as outlines. Keypoints with state 0 are skipped, and so are the
+    edges touching them. Like the original `draw_skeleton`, keypoints at (0, 0)
+    are drawn when their state is not 0.
 
-def draw_skeleton(image, keypoints):
+    Args:
+        image (str or np.ndarray): Image or path to the image.
+        keypoints (np.ndarray): (P, K, 3) keypoints (x, y, state) in pixels of P persons.
+        skeleton (Skeleton): Edges and colors of the skeletons. Default is the
+            17 keypoints skeleton of COCO.
+        radius (int): Radius of the keypoint circles.
+        line_thickness (int): Thickness of the edges.
+        copy (bool): Whether to draw on a copy of the image array, otherwise on
+            the image itself.
+
+    Returns:
+        image (np.ndarray): The image with the skeletons drawn.
+    """
     if isinstance(image, str):
-        full_image = cv2.imread(image)
-    else:
+        full_image = read_image(image, copy=True)
+    elif copy:
         full_image = image.copy()
+    else:
+        full_image = image
 
-    # draw points
-    head_indices = [0, 1, 2, 3, 4]
-    body_indices = [5, 6, 7, 8, 9, 10]
-    # leg_indices = [11, 12, 13, 14, 15, 16]
+    keypoints = np.asarray(keypoints)
+    if keypoints.shape[-2:] != (skeleton.num_keypoints, 3):
+        raise ValueError(
+            f"Expected keypoints of shape (P, {skeleton.num_keypoints}, 3), "
+            f"got {keypoints.shape}."
+        )
+    keypoints = keypoints.reshape(-1, skeleton.num_keypoints, 3)
+    points = keypoints[..., :2].astype(np.int64)
+    states = keypoints[..., 2].astype(np.int64)
 
-    for i, keypoint in enumerate(keypoints):
-        if i in head_indices:
-            color = (255, 0, 0)
-        elif i in body_indices:
-            color = (0, 0, 255)
-        else:
-            color = (0, 255, 0)
+    # visibility of every keypoint and edge of every person at once
+    drawn_points = states != 0
+    drawn_edges = (states[:, skeleton.edges[:, 0]] != 0) & (
+        states[:, skeleton.edges[:, 1]] != 0
+    )
+    thicknesses = np.where(states == 1, 2, -1)
 
-        xy = keypoint["xy"]
-        state = keypoint["state"]
+    edges = skeleton.edges.tolist()
+    for person_points, point_indices, edge_indices, person_thicknesses in zip(
+        points.tolist(),
+        drawn_points.tolist(),
+        drawn_edges.tolist(),
+        thicknesses.tolist(),
+    ):
+        for i, is_drawn in enumerate(point_indices):
+            if is_drawn:
+                cv2.circle(
+                    full_image,
+                    person_points[i],
+                    radius=radius,
+                    color=skeleton.keypoint_colors[i],
+                    thickness=person_thicknesses[i],
+                )
+        for (id1, id2), is_drawn, color in zip(
+            edges, edge_indices, skeleton.edge_colors
+        ):
+            if is_drawn:
+                cv2.line(
+                    full_image,
+                    person_points[id1],
+                    person_points[id2],
+                    color,
+                    line_thickness,
+                )
 
-        if state == 1:
-            thickness = 2
-        else:
-            thickness = -1
+    return full_image
 
-        if xy != [0, 0] and state != 0:
-            cv2.circle(
-                full_image, xy, radius=10, color=color, thickness=thickness
-            )
 
-    # draw lines
-    head_lines = [6, 4, 2, 0, 1, 3, 5]
-    body_lines = [10, 8, 6, 5, 7, 9]
-    leg_lines = [16, 14, 12, 11, 13, 15]
-
-    line_thickness = 2
-
-    for id1, id2 in zip(head_lines[:-1], head_lines[1:]):
-        if keypoints[id1]["state"] != 0 and keypoints[id2]["state"] != 0:
-            cv2.line(
-                full_image,
-                keypoints[id1]["xy"],
-                keypoints[id2]["xy"],
-                (255, 0, 0),
-                line_thickness,
-            )
+def keypoints_to_array(keypoints: List[dict]) -> np.ndarray:
+    """
+    Convert the keypoints of one person from dicts to an array.
 
-    for id1, id2 in zip(body_lines[:-1], body_lines[1:]):
-        if keypoints[id1]["state"] != 0 and keypoints[id2]["state"] != 0:
-            cv2.line(
-                full_image,
-                keypoints[id1]["xy"],
-                keypoints[id2]["xy"],
-                (0, 0, 255),
-                line_thickness,
-            )
+    Args:
+        keypoints (list(dict)): Keypoints as dict(xy, state), see `YoloImage.get_labels`.
 
-    if keypoints[12]["state"] != 0 and keypoints[6]["state"] != 0:
-        cv2.line(
-            full_image,
-            keypoints[12]["xy"],
-            keypoints[6]["xy"],
-            (0, 0, 255),
-            line_thickness,
-        )
-    if keypoints[11]["state"] != 0 and keypoints[5]["state"] != 0:
-        cv2.line(
-            full_image,
-            keypoints[11]["xy"],
-            keypoints[5]["xy"],
-            (0, 0, 255),
-            line_thickness,
+    Returns:
+        keypoints (np.ndarray): (K, 3) keypoints (x, y, state).
+    """
+    return np.array(
+        [[*keypoint["xy"], keypoint["state"]] for keypoint in keypoints],
+        dtype=np.int64,
+    ).reshape(-1, 3)
+
+
+def draw_skeleton(
+    image: Union[str, np.ndarray],
+    keypoints: Union[List[dict], np.ndarray],
+    skeleton: Skeleton = COCO_SKELETON,
+) -> np.ndarray:
+    """
+    Draw the skeleton of one person on a copy of the image.
+
+    Args:
+        image (str or np.ndarray): Image or path to the image.
+        keypoints (list(dict) or np.ndarray): Keypoints as dict(xy, state),
+            or (K, 3) array of (x, y, state).
+        skeleton (Skeleton): Edges and colors of the skeleton.
+
+    Returns:
+        image (np.ndarray): The image with the skeleton drawn.
+    """
+    if not isinstance(keypoints, np.ndarray):
+        keypoints = keypoints_to_array(keypoints)
+    return draw_skeletons(image, keypoints[None], skeleton)
+
+
+# per-keypoint standard deviations of the 17 COCO keypoints
+COCO_KEYPOINT_SIGMAS = (
+    np.array(
+        [26, 25, 25, 35, 35, 79, 79, 72, 72, 62, 62, 107, 107, 87, 87, 89, 89]
+    )
+    / 1000
+)
+
+# index of the mirrored keypoint of each of the 17 COCO keypoints, e.g. the
+# left eye for the right eye, to keep the keypoints in order after a flip
+COCO_FLIP_INDICES = np.array(
+    [0, 2, 1, 4, 3, 6, 5, 8, 7, 10, 9, 12, 11, 14, 13, 16, 15]
+)
+
+# share of its box covered by a person, the OKS area of labels without mask
+BOX_AREA_RATIO = 0.53
+
+# COCO thresholds of the keypoint AP: 0.50, 0.55, ..., 0.95
+OKS_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+
+def get_keypoint_sigmas(num_keypoints: int) -> np.ndarray:
+    """
+    Get the default per-keypoint standard deviations of OKS.
+
+    Args:
+        num_keypoints (int): Number of keypoints of a person.
+
+    Returns:
+        sigmas (np.ndarray): The COCO sigmas for 17 keypoints, uniform ones otherwise.
+    """
+    if num_keypoints == len(COCO_KEYPOINT_SIGMAS):
+        return COCO_KEYPOINT_SIGMAS
+    return np.full(num_keypoints, 1 / num_keypoints)
+
+
+def calculate_oks_matrix(
+    gt_keypoints: np.ndarray,
+    pred_keypoints: np.ndarray,
+    areas: np.ndarray,
+    sigmas: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Calculates the object keypoint similarity (OKS) of every pair of ground truth and predicted persons.
+
+    Only the labeled keypoints of the ground truth (state > 0) are compared.
+    A ground truth without labeled keypoints has an OKS of 0 with every
+    prediction.
+
+    Args:
+        gt_keypoints (np.ndarray): (G, K, 3) ground truth keypoints (x, y, state).
+        pred_keypoints (np.ndarray): (P, K, 2) or (P, K, 3) predicted keypoints,
+            in the same units as the ground truth.
+        areas (np.ndarray): (G,) areas of the ground truth persons, the scale of OKS.
+        sigmas (np.ndarray, optional): (K,) per-keypoint standard deviations.
+            Default is `get_keypoint_sigmas(K)`.
+
+    Returns:
+        oks (np.ndarray): (G, P) OKS matrix.
+    """
+    gt_keypoints = np.asarray(gt_keypoints, dtype=np.float64)
+    pred_keypoints = np.asarray(pred_keypoints, dtype=np.float64)
+    num_keypoints = gt_keypoints.shape[-2]
+    gt_keypoints = gt_keypoints.reshape(-1, num_keypoints, 3)
+    pred_keypoints = pred_keypoints.reshape(
+        -1, num_keypoints, pred_keypoints.shape[-1]
+    )
+    if sigmas is None:
+        sigmas = get_keypoint_sigmas(num_keypoints)
+    areas = np.asarray(areas, dtype=np.float64).reshape(-1)
+
+    # (G, P, K) distances from contiguous x and y planes
+    gt_x, gt_y = np.ascontiguousarray(
+        np.moveaxis(gt_keypoints[..., :2], -1, 0)
+    )
+    pred_x, pred_y = np.ascontiguousarray(
+        np.moveaxis(pred_keypoints[..., :2], -1, 0)
+    )
+    exponents = (gt_x[:, None] - pred_x[None]) ** 2
+    exponents += (gt_y[:, None] - pred_y[None]) ** 2
+    scales = (
+        2 * (2 * np.asarray(sigmas)) ** 2 * (areas[:, None] + np.spacing(1))
+    )
+    exponents /= scales[:, None, :]
+    # far keypoints add less than exp(-50) and their underflow is slow
+    np.minimum(exponents, 50, out=exponents)
+    similarities = np.exp(-exponents, out=exponents)
+
+    labeled = gt_keypoints[:, :, 2] > 0
+    num_labeled = labeled.sum(axis=1)
+    oks = np.einsum("gpk,gk->gp", similarities, labeled.astype(np.float64))
+    return oks / np.maximum(num_labeled, 1)[:, None]
+
+
+def match_predictions(
+    similarities: np.ndarray,
+    scores: np.ndarray,
+    thresholds: np.ndarray = OKS_THRESHOLDS,
+) -> np.ndarray:
+    """
+    Match the predictions of an image to its ground truths, as in COCO evaluation.
+
+    Predictions are visited by decreasing score, and each one is matched with
+    the unmatched ground truth it is the most similar to, if the similarity
+    reaches the threshold. All the thresholds are matched at once.
+
+    Args:
+        similarities (np.ndarray): (G, P) similarity matrix, e.g. OKS or IoU.
+        scores (np.ndarray): (P,) confidence scores of the predictions.
+        thresholds (np.ndarray): (T,) minimum similarities of a match.
+
+    Returns:
+        true_positives (np.ndarray): (T, P) whether each prediction is matched at each threshold.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64).reshape(-1)
+    num_gts, num_preds = similarities.shape
+    true_positives = np.zeros((len(thresholds), num_preds), dtype=bool)
+    if not num_gts:
+        return true_positives
+
+    threshold_indices = np.arange(len(thresholds))
+    matched = np.zeros((len(thresholds), num_gts), dtype=bool)
+    min_threshold = thresholds.min()
+    best_similarities = similarities.max(axis=0)
+    for pred_index in np.argsort(-scores, kind="stable"):
+        if best_similarities[pred_index] < min_threshold:
+            continue
+        candidates = np.where(matched, -1, similarities[:, pred_index])
+        best_gts = candidates.argmax(axis=1)
+        is_matched = candidates[threshold_indices, best_gts] >= thresholds
+        true_positives[:, pred_index] = is_matched
+        matched[threshold_indices[is_matched], best_gts[is_matched]] = True
+    return true_positives
+
+
+def calculate_average_precision(
+    true_positives: np.ndarray,
+    scores: np.ndarray,
+    num_gts: int,
+    num_recall_points: int = 101,
+) -> np.ndarray:
+    """
+    Calculates the interpolated average precision of matched predictions, as in COCO evaluation.
+
+    Args:
+        true_positives (np.ndarray): (T, P) whether each prediction is matched at each threshold.
+        scores (np.ndarray): (P,) confidence scores of the predictions.
+        num_gts (int): Number of ground truths.
+        num_recall_points (int): Number of recall values the precision is averaged over.
+
+    Returns:
+        average_precisions (np.ndarray): (T,) AP at each threshold, NaN without ground truths.
+    """
+    num_thresholds = len(true_positives)
+    if num_gts == 0:
+        return np.full(num_thresholds, np.nan)
+    if true_positives.shape[1] == 0:
+        return np.zeros(num_thresholds)
+
+    order = np.argsort(-scores, kind="stable")
+    true_positives = true_positives[:, order]
+    tp_counts = np.cumsum(true_positives, axis=1)
+    fp_counts = np.cumsum(~true_positives, axis=1)
+    recalls = tp_counts / num_gts
+    precisions = tp_counts / (tp_counts + fp_counts)
+    # precision at a recall is the best precision at any higher recall
+    precisions = np.maximum.accumulate(precisions[:, ::-1], axis=1)[:, ::-1]
+
+    recall_points = np.linspace(0, 1, num_recall_points)
+    average_precisions = np.zeros(num_thresholds)
+    for i in range(num_thresholds):
+        indices = np.searchsorted(recalls[i], recall_points, side="left")
+        reached = indices < len(order)
+        average_precisions[i] = (
+            precisions[i, indices[reached]].sum() / num_recall_points
         )
+    return average_precisions
+
+
+class PoseEvaluator:
+    """
+    Streaming keypoint AP of a pose estimation model, as in COCO evaluation.
+
+    Feed the ground truths and predictions of one image at a time with
+    `update`; only the scores and matches of the predictions are kept, so
+    any number of images can be evaluated.
+
+    Attributes:
+        thresholds (np.ndarray): (T,) OKS thresholds of the AP.
+        sigmas (np.ndarray or None): (K,) per-keypoint standard deviations of OKS.
+        max_detections (int or None): Number of best scored predictions kept per image.
+        num_gts (int): Number of ground truths seen so far.
+    """
+
+    def __init__(
+        self,
+        thresholds: np.ndarray = OKS_THRESHOLDS,
+        sigmas: Optional[np.ndarray] = None,
+        max_detections: Optional[int] = 20,
+    ) -> None:
+        """
+        Initialize a PoseEvaluator object.
+
+        Args:
+            thresholds (np.ndarray): OKS thresholds of the AP. Default is 0.50:0.95.
+            sigmas (np.ndarray, optional): Per-keypoint standard deviations of OKS.
+                Default is `get_keypoint_sigmas(K)`.
+            max_detections (int, optional): Number of best scored predictions kept
+                per image, 20 as in COCO. None keeps all of them.
+        """
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.sigmas = sigmas
+        self.max_detections = max_detections
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forget all the images seen so far.
+        """
+        self.num_gts = 0
+        self._scores = list()
+        self._true_positives = list()
 
-    for id1, id2 in zip(leg_lines[:-1], leg_lines[1:]):
-        if keypoints[id1]["state"] != 0 and keypoints[id2]["state"] != 0:
-            cv2.line(
-                full_image,
-                keypoints[id1]["xy"],
-                keypoints[id2]["xy"],
-                (0, 255, 0),
-                line_thickness,
+    def update(
+        self,
+        gt_keypoints: np.ndarray,
+        areas: np.ndarray,
+        pred_keypoints: np.ndarray,
+        scores: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Match the predictions of one image to its ground truths.
+
+        Ground truths without labeled keypoints are left out.
+
+        Args:
+            gt_keypoints (np.ndarray): (G, K, 3) ground truth keypoints (x, y, state).
+            areas (np.ndarray): (G,) areas of the ground truth persons.
+            pred_keypoints (np.ndarray): (P, K, 2) or (P, K, 3) predicted keypoints.
+            scores (np.ndarray): (P,) confidence scores of the predictions.
+
+        Returns:
+            true_positives (np.ndarray): (T, P') whether each kept prediction,
+                by decreasing score, is matched at each threshold.
+        """
+        gt_keypoints = np.asarray(gt_keypoints, dtype=np.float64)
+        areas = np.asarray(areas, dtype=np.float64).reshape(-1)
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        order = np.argsort(-scores, kind="stable")[: self.max_detections]
+        pred_keypoints = np.asarray(pred_keypoints)[order]
+        scores = scores[order]
+        if len(gt_keypoints):
+            labeled = (gt_keypoints[:, :, 2] > 0).any(axis=1)
+            gt_keypoints = gt_keypoints[labeled]
+            areas = areas[labeled]
+
+        if len(gt_keypoints) and len(scores):
+            oks = calculate_oks_matrix(
+                gt_keypoints, pred_keypoints, areas, self.sigmas
             )
+        else:
+            oks = np.zeros((len(gt_keypoints), len(scores)))
+        true_positives = match_predictions(oks, scores, self.thresholds)
 
-    return full_image
+        self.num_gts += len(gt_keypoints)
+        self._scores.append(scores)
+        self._true_positives.append(true_positives)
+        return true_positives
+
+    def compute(self) -> dict:
+        """
+        Calculate the keypoint AP of all the images seen so far.
+
+        Returns:
+            results (dict): "AP" averaged over the thresholds, "AP50" and "AP75"
+                when 0.5 and 0.75 are thresholds, and "APs" at every threshold.
+        """
+        scores = np.concatenate(self._scores) if self._scores else np.zeros(0)
+        true_positives = (
+            np.concatenate(self._true_positives, axis=1)
+            if self._true_positives
+            else np.zeros((len(self.thresholds), 0), dtype=bool)
+        )
+        average_precisions = calculate_average_precision(
+            true_positives, scores, self.num_gts
+        )
+        results = {"AP": float(np.mean(average_precisions))}
+        for threshold, name in [(0.5, "AP50"), (0.75, "AP75")]:
+            indices = np.flatnonzero(np.isclose(self.thresholds, threshold))
+            if len(indices):
+                results[name] = float(average_precisions[indices[0]])
+        results["APs"] = average_precisions
+        return results
@@ -1,5 +1,6 @@
+from typing import List, Optional, Sequence, Tuple
+
 import cv2
-import matplotlib.pyplot as plt
 import numpy as np
 
 
@@ -19,7 +20,515 @@ def get_bounding_box_of_mask(mask):
 
 
 def show_mask(mask, figsize=None):
+    import matplotlib.pyplot as plt
+
     if figsize:
         plt.figure(figsize=figsize)
     plt.imshow(mask, cmap="gray")
     plt.show()
+
+
+def draw_polygons(
+    image: np.ndarray,
+    polygons: Sequence[np.ndarray],
+    color: Tuple[int, int, int] = (0, 255, 0),
+    alpha: float = 0.4,
+    thickness: int = 2,
+) -> np.ndarray:
+    """
+    Draws filled and outlined polygons, e.g. of segmentation labels, on a copy of the image.
+
+    Args:
+        image (np.ndarray): The image on which the polygons will be drawn.
+        polygons (list(np.ndarray)): (P, 2) points (x, y) in pixels of each polygon.
+        color (tuple): Color of the polygons in BGR format.
+        alpha (float): Opacity of the filling.
+        thickness (int): Thickness of the outlines.
+
+    Returns:
+        np.ndarray: Image with the polygons drawn.
+    """
+    points = [np.round(polygon).astype(np.int32) for polygon in polygons]
+    overlay = image.copy()
+    for polygon in points:
+        # one call per polygon, so overlapping polygons do not cancel out
+        cv2.fillPoly(overlay, [polygon], color)
+    annotated_image = cv2.addWeighted(overlay, alpha, image, 1 - alpha, 0)
+    cv2.polylines(annotated_image, points, True, color, thickness)
+    return annotated_image
+
+
+def _gather_segments(
+    offsets: np.ndarray, indices: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get the positions of the selected segments of a flat buffer.
+
+    Args:
+        offsets (np.ndarray): (N + 1,) start of every segment, then the buffer length.
+        indices (np.ndarray): (M,) selected segments.
+
+    Returns:
+        positions (np.ndarray): Positions in the buffer of the selected segments, in order.
+        new_offsets (np.ndarray): (M + 1,) offsets of the selected segments once gathered.
+    """
+    lengths = offsets[indices + 1] - offsets[indices]
+    new_offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    positions = np.arange(new_offsets[-1])
+    positions += np.repeat(offsets[indices] - new_offsets[:-1], lengths)
+    return positions, new_offsets
+
+
+def _get_column_intervals(
+    masks: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the runs of ones of masks flattened in column-major order.
+
+    Args:
+        masks (np.ndarray): (N, H, W) masks.
+
+    Returns:
+        mask_ids (np.ndarray): Mask of every run, sorted.
+        starts (np.ndarray): First flat index of every run.
+        ends (np.ndarray): Flat index after every run.
+    """
+    num_masks, height, width = masks.shape
+    num_pixels = height * width
+    padded = np.zeros((num_masks, num_pixels + 2), dtype=bool)
+    np.not_equal(
+        masks.transpose(0, 2, 1),
+        0,
+        out=padded[:, 1:-1].reshape(num_masks, width, height),
+    )
+    # zeros on both sides, so the changes alternate between starts and ends
+    changes = np.flatnonzero(padded[:, 1:] != padded[:, :-1])
+    mask_ids, positions = np.divmod(changes, num_pixels + 1)
+    return mask_ids[0::2], positions[0::2], positions[1::2]
+
+
+def _intervals_to_counts(
+    mask_ids: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    num_masks: int,
+    num_pixels: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build run-length counts from runs of ones sorted by mask and start.
+
+    Touching runs are merged, so the counts are the canonical COCO ones.
+
+    Returns:
+        counts (np.ndarray): Flat counts of all masks.
+        offsets (np.ndarray): (N + 1,) offsets of the counts of each mask.
+    """
+    if len(starts):
+        # merge the runs starting where the previous one of the mask ends
+        is_new = np.ones(len(starts), dtype=bool)
+        is_new[1:] = (mask_ids[1:] != mask_ids[:-1]) | (
+            starts[1:] != ends[:-1]
+        )
+        group_ends = np.append(np.flatnonzero(is_new)[1:], len(starts)) - 1
+        mask_ids, starts, ends = (
+            mask_ids[is_new],
+            starts[is_new],
+            ends[group_ends],
+        )
+
+    num_runs = np.bincount(mask_ids, minlength=num_masks)
+    last_ends = np.zeros(num_masks, dtype=np.int64)
+    last_ends[mask_ids] = ends
+    # as in COCO, no count of trailing zeros when a mask ends with ones
+    has_tail = (last_ends < num_pixels) | (num_runs == 0)
+    offsets = np.zeros(num_masks + 1, dtype=np.int64)
+    np.cumsum(2 * num_runs + has_tail, out=offsets[1:])
+
+    # each run adds the zeros before it and its ones, each mask its last zeros
+    run_indices = np.arange(len(starts)) - np.repeat(
+        np.cumsum(num_runs) - num_runs, num_runs
+    )
+    positions = offsets[mask_ids] + 2 * run_indices
+    is_first = run_indices == 0
+    previous_ends = np.zeros(len(starts), dtype=np.int64)
+    previous_ends[~is_first] = ends[np.flatnonzero(~is_first) - 1]
+
+    counts = np.empty(offsets[-1], dtype=np.int64)
+    counts[positions] = starts - previous_ends
+    counts[positions + 1] = ends - starts
+    counts[offsets[1:][has_tail] - 1] = num_pixels - last_ends[has_tail]
+    return counts, offsets
+
+
+class RLEMasks:
+    """
+    Binary masks of one image, run-length encoded in a single flat buffer.
+
+    The counts follow the uncompressed COCO RLE format: pixels are read in
+    column-major order and the counts alternate between runs of zeros and
+    runs of ones, starting with zeros.
+
+    Attributes:
+        image_size (tuple(int, int)): (height, width) of the masks.
+        counts (np.ndarray): Flat counts of all the masks.
+        offsets (np.ndarray): (N + 1,) offsets of the counts of each mask.
+    """
+
+    def __init__(
+        self,
+        image_size: Tuple[int, int],
+        counts: Optional[np.ndarray] = None,
+        offsets: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Initialize an RLEMasks object, use `encode` to build it from dense masks.
+
+        Args:
+            image_size (tuple(int, int)): (height, width) of the masks.
+            counts (np.ndarray, optional): Flat counts of all the masks.
+            offsets (np.ndarray, optional): (N + 1,) offsets of the counts of each mask.
+        """
+        self.image_size = tuple(image_size)
+        if counts is None:
+            counts = np.zeros(0, dtype=np.int64)
+        if offsets is None:
+            offsets = np.zeros(1, dtype=np.int64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    @classmethod
+    def encode(cls, masks: np.ndarray) -> "RLEMasks":
+        """
+        Encode dense masks.
+
+        Args:
+            masks (np.ndarray): (N, H, W) or (H, W) masks, non-zero pixels are in the mask.
+
+        Returns:
+            rle_masks (RLEMasks): The encoded masks.
+        """
+        masks = np.asarray(masks)
+        if masks.ndim == 2:
+            masks = masks[None]
+        num_masks, height, width = masks.shape
+        mask_ids, starts, ends = _get_column_intervals(masks)
+        counts, offsets = _intervals_to_counts(
+            mask_ids, starts, ends, num_masks, height * width
+        )
+        return cls((height, width), counts, offsets)
+
+    @classmethod
+    def from_coco(cls, rles: List[dict]) -> "RLEMasks":
+        """
+        Build masks from uncompressed COCO RLEs.
+
+        Args:
+            rles (list(dict)): Dicts with "size" (height, width) and "counts" (list(int)).
+
+        Returns:
+            rle_masks (RLEMasks): The masks.
+        """
+        if not rles:
+            raise ValueError("Need at least one RLE to know the image size.")
+        counts = [np.asarray(rle["counts"], dtype=np.int64) for rle in rles]
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum([len(c) for c in counts], out=offsets[1:])
+        return cls(tuple(rles[0]["size"]), np.concatenate(counts), offsets)
+
+    def to_coco(self) -> List[dict]:
+        """
+        Get the masks as uncompressed COCO RLEs.
+
+        Returns:
+            rles (list(dict)): Dicts with "size" (height, width) and "counts" (list(int)).
+        """
+        return [
+            {
+                "size": list(self.image_size),
+                "counts": self.counts[start:end].tolist(),
+            }
+            for start, end in zip(self.offsets[:-1], self.offsets[1:])
+        ]
+
+    def _get_intervals(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the runs of ones of all the masks.
+
+        Returns:
+            mask_ids (np.ndarray): Mask of every run, sorted.
+            starts (np.ndarray): First column-major flat index of every run.
+            ends (np.ndarray): Flat index after every run.
+        """
+        lengths = np.diff(self.offsets)
+        mask_ids = np.repeat(np.arange(len(self)), lengths)
+        cumulative_counts = np.zeros(len(self.counts) + 1, dtype=np.int64)
+        np.cumsum(self.counts, out=cumulative_counts[1:])
+        mask_starts = np.repeat(cumulative_counts[self.offsets[:-1]], lengths)
+        ends = cumulative_counts[1:] - mask_starts
+        run_indices = np.arange(len(self.counts)) - np.repeat(
+            self.offsets[:-1], lengths
+        )
+        is_ones = (run_indices % 2 == 1) & (self.counts > 0)
+        ends = ends[is_ones]
+        return mask_ids[is_ones], ends - self.counts[is_ones], ends
+
+    def decode(self) -> np.ndarray:
+        """
+        Decode the masks.
+
+        Returns:
+            masks (np.ndarray): (N, H, W) uint8 masks of 0 and 1.
+        """
+        height, width = self.image_size
+        run_indices = np.arange(len(self.counts)) - np.repeat(
+            self.offsets[:-1], np.diff(self.offsets)
+        )
+        values = (run_indices % 2).astype(np.uint8)
+        flat = np.repeat(values, self.counts)
+        return flat.reshape(len(self), width, height).transpose(0, 2, 1)
+
+    def area(self) -> np.ndarray:
+        """
+        Get the number of pixels of every mask.
+
+        Returns:
+            areas (np.ndarray): (N,) areas.
+        """
+        mask_ids, starts, ends = self._get_intervals()
+        return np.bincount(
+            mask_ids, weights=ends - starts, minlength=len(self)
+        ).astype(np.int64)
+
+    def get_bounding_boxes(self) -> np.ndarray:
+        """
+        Get the bounding box of every mask, as `get_bounding_box_of_mask` does.
+
+        Returns:
+            xyxy (np.ndarray): (N, 4) boxes, (x_min, y_min) in the mask and
+                (x_max, y_max) one pixel past it. Zeros for empty masks.
+        """
+        height = self.image_size[0]
+        mask_ids, starts, ends = self._get_intervals()
+        boxes = np.zeros((len(self), 4), dtype=np.int64)
+        if not len(starts):
+            return boxes
+
+        first_columns, first_rows = np.divmod(starts, height)
+        last_columns, last_rows = np.divmod(ends - 1, height)
+        # a run over several columns covers the full height of its middle
+        one_column = first_columns == last_columns
+        first_rows[~one_column] = 0
+        last_rows[~one_column] = height - 1
+
+        present = np.unique(mask_ids)
+        group_starts = np.searchsorted(mask_ids, present)
+        boxes[present, 0] = first_columns[group_starts]
+        boxes[present, 1] = np.minimum.reduceat(first_rows, group_starts)
+        boxes[present, 2] = np.maximum.reduceat(last_columns, group_starts) + 1
+        boxes[present, 3] = np.maximum.reduceat(last_rows, group_starts) + 1
+        return boxes
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index) -> "RLEMasks":
+        indices = np.arange(len(self))[index]
+        indices = np.atleast_1d(indices)
+        positions, offsets = _gather_segments(self.offsets, indices)
+        return RLEMasks(self.image_size, self.counts[positions], offsets)
+
+    @classmethod
+    def concatenate(cls, rle_masks: List["RLEMasks"]) -> "RLEMasks":
+        """
+        Concatenate masks of the same image.
+
+        Args:
+            rle_masks (list(RLEMasks)): Masks to concatenate.
+
+        Returns:
+            rle_masks (RLEMasks): The concatenated masks.
+        """
+        if not rle_masks:
+            raise ValueError("Need at least one RLEMasks to concatenate.")
+        lengths = np.concatenate([np.diff(m.offsets) for m in rle_masks])
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(
+            rle_masks[0].image_size,
+            np.concatenate([m.counts for m in rle_masks]),
+            offsets,
+        )
+
+    @classmethod
+    def from_polygons(
+        cls,
+        polygons: Sequence[np.ndarray],
+        image_size: Tuple[int, int],
+        scaled: bool = False,
+    ) -> "RLEMasks":
+        """
+        Encode polygons, e.g. of YOLO segmentation labels, without drawing full-size masks.
+
+        Each polygon is filled in a buffer of the size of its bounding box only.
+
+        Args:
+            polygons (list(np.ndarray)): (P, 2) points (x, y) of each polygon.
+            image_size (tuple(int, int)): (height, width) of the image.
+            scaled (bool): Whether the points are scaled to [0, 1] as in YOLO labels.
+
+        Returns:
+            rle_masks (RLEMasks): One mask per polygon.
+        """
+        height, width = image_size
+        all_ids, all_starts, all_ends = list(), list(), list()
+        for mask_id, polygon in enumerate(polygons):
+            points = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+            if scaled:
+                points = points * [width, height]
+            points = np.round(points).astype(np.int32)
+            if not len(points):
+                continue
+            points[:, 0] = np.clip(points[:, 0], 0, width - 1)
+            points[:, 1] = np.clip(points[:, 1], 0, height - 1)
+            x_min, y_min = points.min(axis=0)
+            x_max, y_max = points.max(axis=0)
+            # one more zero row so that runs never go on to the next column
+            crop = np.zeros((y_max - y_min + 2, x_max - x_min + 1), np.uint8)
+            cv2.fillPoly(crop, [points - [x_min, y_min]], 1)
+
+            # runs of the crop columns, moved to the flat indices of the image
+            _, starts, ends = _get_column_intervals(crop[None])
+            columns, rows = np.divmod(starts, len(crop))
+            image_starts = (x_min + columns) * height + y_min + rows
+            all_ids.append(np.full(len(starts), mask_id))
+            all_starts.append(image_starts)
+            all_ends.append(image_starts + ends - starts)
+
+        if all_ids:
+            mask_ids = np.concatenate(all_ids)
+            starts = np.concatenate(all_starts)
+            ends = np.concatenate(all_ends)
+        else:
+            mask_ids = starts = ends = np.zeros(0, dtype=np.int64)
+        counts, offsets = _intervals_to_counts(
+            mask_ids, starts, ends, len(polygons), height * width
+        )
+        return cls(image_size, counts, offsets)
+
+    def to_polygons(self, scaled: bool = False) -> List[np.ndarray]:
+        """
+        Get the outer contour of the largest part of every mask, e.g. for YOLO segmentation labels.
+
+        Only the bounding box of each mask is decoded.
+
+        Args:
+            scaled (bool): Whether to scale the points to [0, 1] as in YOLO labels.
+
+        Returns:
+            polygons (list(np.ndarray)): (P, 2) points (x, y) of each mask, empty for empty masks.
+        """
+        height, width = self.image_size
+        boxes = self.get_bounding_boxes()
+        mask_ids, starts, ends = self._get_intervals()
+        run_offsets = np.searchsorted(mask_ids, np.arange(len(self) + 1))
+        polygons = list()
+        for index, (x_min, y_min, x_max, y_max) in enumerate(boxes.tolist()):
+            if x_max == 0:
+                polygons.append(np.zeros((0, 2)))
+                continue
+            # decode the columns of the box only
+            runs = slice(run_offsets[index], run_offsets[index + 1])
+            changes = np.zeros((x_max - x_min) * height + 1, dtype=np.int64)
+            np.add.at(changes, starts[runs] - x_min * height, 1)
+            np.add.at(changes, ends[runs] - x_min * height, -1)
+            columns = np.cumsum(changes[:-1]).astype(np.uint8)
+            crop = columns.reshape(x_max - x_min, height)[:, y_min:y_max].T
+            contours, _ = cv2.findContours(
+                np.ascontiguousarray(crop),
+                cv2.RETR_EXTERNAL,
+                cv2.CHAIN_APPROX_SIMPLE,
+            )
+            contour = max(contours, key=cv2.contourArea).reshape(-1, 2)
+            polygon = (contour + [x_min, y_min]).astype(np.float64)
+            if scaled:
+                polygon /= [width, height]
+            polygons.append(polygon)
+        return polygons
+
+    def __repr__(self) -> str:
+        return (
+            f"RLEMasks(num_masks={len(self)}, image_size={self.image_size}, "
+            f"num_counts={len(self.counts)})"
+        )
+
+
+def calculate_mask_iou_matrix(
+    masks1: RLEMasks, masks2: RLEMasks
+) -> np.ndarray:
+    """
+    Calculates the IoU between every pair of masks of two sets, directly on their runs.
+
+    Only the pairs with overlapping bounding boxes are compared. For those,
+    the intersection of all the pairs is computed at once: the runs of each
+    mask of the first set are shifted to their own range of indices, so
+    that one `np.searchsorted` counts the ones of any of them before any
+    index.
+
+    Args:
+        masks1 (RLEMasks): N masks.
+        masks2 (RLEMasks): M masks of the same image size.
+
+    Returns:
+        iou (np.ndarray): (N, M) IoU matrix, 0 when a mask is empty.
+    """
+    if masks1.image_size != masks2.image_size:
+        raise ValueError("Masks must have the same image size.")
+    height, width = masks1.image_size
+    num_pixels = height * width
+    ious = np.zeros((len(masks1), len(masks2)))
+    boxes1 = masks1.get_bounding_boxes()
+    boxes2 = masks2.get_bounding_boxes()
+    overlapping = (
+        (boxes1[:, None, 0] < boxes2[None, :, 2])
+        & (boxes2[None, :, 0] < boxes1[:, None, 2])
+        & (boxes1[:, None, 1] < boxes2[None, :, 3])
+        & (boxes2[None, :, 1] < boxes1[:, None, 3])
+    )
+    indices1, indices2 = np.nonzero(overlapping)
+    if not len(indices1):
+        return ious
+
+    # cumulative ones of the first set, each mask in its own index range
+    ids1, starts1, ends1 = masks1._get_intervals()
+    starts1 = starts1 + ids1 * num_pixels
+    ends1 = ends1 + ids1 * num_pixels
+    ones_before = np.zeros(len(starts1) + 1, dtype=np.int64)
+    np.cumsum(ends1 - starts1, out=ones_before[1:])
+
+    def count_ones(positions):
+        runs = np.searchsorted(starts1, positions, side="right") - 1
+        runs = np.maximum(runs, 0)
+        partial = np.clip(positions - starts1[runs], 0, None)
+        partial = np.minimum(partial, ends1[runs] - starts1[runs])
+        return ones_before[runs] + partial
+
+    # runs of the second set repeated for every compared pair
+    ids2, starts2, ends2 = masks2._get_intervals()
+    run_offsets = np.searchsorted(ids2, np.arange(len(masks2) + 1))
+    positions, pair_offsets = _gather_segments(run_offsets, indices2)
+    pair_ids = np.repeat(np.arange(len(indices1)), np.diff(pair_offsets))
+    shifts = indices1[pair_ids] * num_pixels
+    intersections = count_ones(ends2[positions] + shifts) - count_ones(
+        starts2[positions] + shifts
+    )
+    intersections = np.bincount(
+        pair_ids, weights=intersections, minlength=len(indices1)
+    )
+
+    areas1 = masks1.area()[indices1]
+    areas2 = masks2.area()[indices2]
+    ious[indices1, indices2] = intersections / (
+        areas1 + areas2 - intersections
+    )
+    return ious
@@ -0,0 +1,383 @@
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from kano.box import BoxArray, convert_boxes
+from kano.detect_utils import calculate_iou_matrix
+
+
+def get_iou_pairs(
+    xyxy1: np.ndarray, xyxy2: np.ndarray, iou_threshold: float = 0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the pairs of boxes of two sets with an IoU above a threshold.
+
+    Boxes of the second set are sorted by x_center once, so the candidates of
+    each box of the first set are a contiguous range found with
+    `np.searchsorted`, then filtered by vertical overlap before computing any
+    IoU. Small crowded sets where most boxes overlap horizontally fall back to
+    the full IoU matrix. Uses the inclusive pixel convention of `calculate_iou`.
+
+    Args:
+        xyxy1 (np.ndarray): (N, 4) xyxy boxes.
+        xyxy2 (np.ndarray): (M, 4) xyxy boxes.
+        iou_threshold (float): Minimum IoU of the returned pairs, exclusive.
+
+    Returns:
+        indices1 (np.ndarray): Indices of the pairs in the first set.
+        indices2 (np.ndarray): Indices of the pairs in the second set.
+        ious (np.ndarray): IoU of each pair.
+    """
+    if not len(xyxy1) or not len(xyxy2):
+        return (
+            np.zeros(0, dtype=np.int64),
+            np.zeros(0, dtype=np.int64),
+            np.zeros(0),
+        )
+
+    # one pixel of margin on the widths for the inclusive pixel convention
+    half_widths1 = (xyxy1[:, 2] - xyxy1[:, 0] + 1) / 2
+    half_widths2 = (xyxy2[:, 2] - xyxy2[:, 0] + 1) / 2
+    x_centers1 = (xyxy1[:, 0] + xyxy1[:, 2]) / 2
+    x_centers2 = (xyxy2[:, 0] + xyxy2[:, 2]) / 2
+    order = np.argsort(x_centers2, kind="stable")
+    sorted_x_centers = x_centers2[order]
+    max_distances = half_widths1 + half_widths2.max()
+    starts = np.searchsorted(sorted_x_centers, x_centers1 - max_distances)
+    ends = np.searchsorted(
+        sorted_x_centers, x_centers1 + max_distances, side="right"
+    )
+    counts = ends - starts
+    num_pairs = counts.sum()
+
+    # the full matrix is faster for few boxes which mostly overlap, while its
+    # large temporary arrays make it slower than the pairs for many boxes
+    num_ious = len(xyxy1) * len(xyxy2)
+    if 4 * num_pairs > num_ious and num_ious <= 2**14:
+        ious = calculate_iou_matrix(xyxy1, xyxy2)
+        indices1, indices2 = np.nonzero(ious > iou_threshold)
+        return indices1, indices2, ious[indices1, indices2]
+
+    # candidates are gathered from contiguous coordinates sorted by x_center
+    coords1 = np.ascontiguousarray(xyxy1.T, dtype=np.float64)
+    coords2 = np.ascontiguousarray(xyxy2[order].T, dtype=np.float64)
+    indices1 = np.repeat(np.arange(len(xyxy1)), counts)
+    positions = np.arange(num_pairs)
+    positions += np.repeat(starts - np.cumsum(counts) + counts, counts)
+    heights = np.minimum(coords1[3, indices1], coords2[3, positions])
+    heights -= np.maximum(coords1[1, indices1], coords2[1, positions]) - 1
+    overlapping = np.flatnonzero(heights > 0)
+    indices1 = indices1[overlapping]
+    positions = positions[overlapping]
+    heights = heights[overlapping]
+
+    widths = np.minimum(coords1[2, indices1], coords2[2, positions])
+    widths -= np.maximum(coords1[0, indices1], coords2[0, positions]) - 1
+    intersection_area = np.clip(widths, 0, None) * heights
+    areas1 = (coords1[2] - coords1[0] + 1) * (coords1[3] - coords1[1] + 1)
+    areas2 = (coords2[2] - coords2[0] + 1) * (coords2[3] - coords2[1] + 1)
+    ious = intersection_area / (
+        areas1[indices1] + areas2[positions] - intersection_area
+    )
+    indices2 = order[positions]
+
+    above = ious > iou_threshold
+    return indices1[above], indices2[above], ious[above]
+
+
+def greedy_match(
+    indices1: np.ndarray,
+    indices2: np.ndarray,
+    costs: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Greedily match candidate pairs by increasing cost, each index being used at most once.
+
+    Each round accepts the pairs which are the best candidate of both of their
+    members, which gives the same matches as visiting the pairs one by one by
+    increasing cost, in a few vectorized rounds.
+
+    Args:
+        indices1 (np.ndarray): (P,) first member of each candidate pair.
+        indices2 (np.ndarray): (P,) second member of each candidate pair.
+        costs (np.ndarray): (P,) cost of each pair, e.g. 1 - IoU.
+
+    Returns:
+        matches1 (np.ndarray): First members of the matched pairs.
+        matches2 (np.ndarray): Second members of the matched pairs.
+    """
+    order = np.argsort(costs, kind="stable")
+    indices1 = indices1[order]
+    indices2 = indices2[order]
+    size1 = indices1.max() + 1 if len(indices1) else 0
+    size2 = indices2.max() + 1 if len(indices2) else 0
+    used1 = np.zeros(size1, dtype=bool)
+    used2 = np.zeros(size2, dtype=bool)
+    matches1, matches2 = list(), list()
+
+    while len(indices1):
+        # the first pair of an index in the sorted order is its best pair
+        positions = np.arange(len(indices1))
+        first1 = np.full(size1, len(indices1))
+        np.minimum.at(first1, indices1, positions)
+        first2 = np.full(size2, len(indices1))
+        np.minimum.at(first2, indices2, positions)
+        best_for_both = (first1[indices1] == positions) & (
+            first2[indices2] == positions
+        )
+
+        matched1 = indices1[best_for_both]
+        matched2 = indices2[best_for_both]
+        matches1.append(matched1)
+        matches2.append(matched2)
+
+        used1[matched1] = True
+        used2[matched2] = True
+        remaining = ~used1[indices1] & ~used2[indices2]
+        indices1 = indices1[remaining]
+        indices2 = indices2[remaining]
+
+    if not matches1:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    return np.concatenate(matches1), np.concatenate(matches2)
+
+
+class IoUTracker:
+    """
+    SORT-like multi-object tracker: a constant-velocity Kalman filter per track and greedy IoU association.
+
+    The state of every track is stored in preallocated arrays indexed by slot
+    instead of per-track objects. The Kalman filter runs on the (x_center,
+    y_center, width, height) coordinates, each with its own velocity. With
+    diagonal noises the four coordinates are independent, so the covariance
+    of a track is kept as three (4,) arrays instead of an (8, 8) matrix and
+    every step is a few elementwise operations over all tracks.
+
+    Attributes:
+        frame_count (int): Number of frames given to `update`.
+        next_id (int): Id of the next created track.
+    """
+
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        max_age: int = 3,
+        min_hits: int = 3,
+        class_aware: bool = True,
+        capacity: int = 256,
+        std_weight_position: float = 1 / 20,
+        std_weight_velocity: float = 1 / 160,
+    ) -> None:
+        """
+        Initialize an IoUTracker object.
+
+        Args:
+            iou_threshold (float): Minimum IoU between a predicted track box and a detection to match them.
+            max_age (int): Number of frames a track is kept without matched detection.
+            min_hits (int): Number of matched detections before a track gets reported.
+            class_aware (bool): Whether detections only match tracks of the same class.
+            capacity (int): Number of preallocated track slots, doubled when full.
+            std_weight_position (float): Position noise, relative to the box size.
+            std_weight_velocity (float): Velocity noise, relative to the box size.
+        """
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.class_aware = class_aware
+        self.std_weight_position = std_weight_position
+        self.std_weight_velocity = std_weight_velocity
+        self._allocate(capacity)
+        self.frame_count = 0
+        self.next_id = 0
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Allocate the track arrays, keeping the current tracks.
+        """
+        old_capacity = len(getattr(self, "alive", []))
+        arrays = {
+            "alive": np.zeros(capacity, dtype=bool),
+            "ids": np.full(capacity, -1, dtype=np.int64),
+            "classes": np.zeros(capacity, dtype=np.int64),
+            "hits": np.zeros(capacity, dtype=np.int64),
+            "misses": np.zeros(capacity, dtype=np.int64),
+            # Kalman mean and covariance blocks of (x_center, y_center, width, height)
+            "states": np.zeros((capacity, 5, 4)),
+        }
+        for name, array in arrays.items():
+            if old_capacity:
+                array[:old_capacity] = getattr(self, name)
+            setattr(self, name, array)
+
+        # views of the states rows, gathered and scattered at once by slot
+        self.positions = self.states[:, 0]
+        self.velocities = self.states[:, 1]
+        self.position_variances = self.states[:, 2]
+        self.covariances = self.states[:, 3]
+        self.velocity_variances = self.states[:, 4]
+
+    def reset(self) -> None:
+        """
+        Remove all tracks and restart the ids from 0.
+        """
+        self._allocate(len(self.alive))
+        self.frame_count = 0
+        self.next_id = 0
+
+    @property
+    def num_tracks(self) -> int:
+        return int(self.alive.sum())
+
+    @staticmethod
+    def _get_scales(xywh: np.ndarray) -> np.ndarray:
+        sizes = xywh[:, 2:]
+        return np.concatenate([sizes, sizes], axis=1)
+
+    def _predict(self) -> None:
+        """
+        Move every track one frame forward. Dead slots are all zeros and stay so.
+        """
+        scales = self._get_scales(self.positions)
+        self.positions += self.velocities
+        self.position_variances += (
+            2 * self.covariances
+            + self.velocity_variances
+            + (self.std_weight_position * scales) ** 2
+        )
+        self.covariances += self.velocity_variances
+        self.velocity_variances += (self.std_weight_velocity * scales) ** 2
+
+    def _correct(self, slots: np.ndarray, xywh: np.ndarray) -> None:
+        """
+        Update the tracks of the given slots with their matched detections.
+        """
+        states = self.states[slots]
+        positions, velocities = states[:, 0], states[:, 1]
+        position_variances, covariances = states[:, 2], states[:, 3]
+        measurement_variances = (
+            self.std_weight_position * self._get_scales(positions)
+        ) ** 2
+        innovation_variances = position_variances + measurement_variances
+        position_gains = position_variances / innovation_variances
+        velocity_gains = covariances / innovation_variances
+
+        residuals = xywh - positions
+        states[:, 4] -= velocity_gains * covariances
+        states[:, 3] *= 1 - position_gains
+        states[:, 2] *= 1 - position_gains
+        velocities += velocity_gains * residuals
+        positions += position_gains * residuals
+        self.states[slots] = states
+
+    def _create_tracks(
+        self, xywh: np.ndarray, classes: np.ndarray
+    ) -> np.ndarray:
+        """
+        Start new tracks from unmatched detections.
+
+        Returns:
+            slots (np.ndarray): Slots of the new tracks.
+        """
+        free_slots = np.flatnonzero(~self.alive)
+        if len(free_slots) < len(xywh):
+            capacity = len(self.alive)
+            while capacity - self.num_tracks < len(xywh):
+                capacity *= 2
+            self._allocate(capacity)
+            free_slots = np.flatnonzero(~self.alive)
+        slots = free_slots[: len(xywh)]
+
+        self.alive[slots] = True
+        self.ids[slots] = np.arange(self.next_id, self.next_id + len(slots))
+        self.next_id += len(slots)
+        self.classes[slots] = classes
+        self.hits[slots] = 1
+        self.misses[slots] = 0
+
+        states = np.zeros((len(slots), 5, 4))
+        states[:, 0] = xywh
+        scales = self._get_scales(xywh)
+        states[:, 2] = (2 * self.std_weight_position * scales) ** 2
+        states[:, 4] = (10 * self.std_weight_velocity * scales) ** 2
+        self.states[slots] = states
+        return slots
+
+    def _remove_tracks(self, slots: np.ndarray) -> None:
+        self.alive[slots] = False
+        self.ids[slots] = -1
+        self.states[slots] = 0
+
+    def get_tracks(self) -> Tuple[np.ndarray, BoxArray]:
+        """
+        Get the current boxes of all the live tracks, confirmed or not.
+
+        Returns:
+            ids (np.ndarray): (T,) ids of the tracks.
+            boxes (BoxArray): (T,) filtered boxes of the tracks with their classes.
+        """
+        slots = np.flatnonzero(self.alive)
+        xyxy = convert_boxes(self.positions[slots], "xywh", "xyxy")
+        return self.ids[slots], BoxArray(xyxy, classes=self.classes[slots])
+
+    def update(
+        self,
+        boxes: Union[np.ndarray, BoxArray],
+        classes: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Track the detections of a new frame.
+
+        Args:
+            boxes (np.ndarray or BoxArray): (D, 4) xyxy detections of the frame.
+                The classes of a BoxArray are used when not given.
+            classes (np.ndarray, optional): (D,) class ids of the detections.
+
+        Returns:
+            ids (np.ndarray): (D,) track id of each detection, -1 if its track
+                does not have `min_hits` matched detections yet.
+        """
+        if isinstance(boxes, BoxArray):
+            if classes is None:
+                classes = boxes.classes
+            boxes = boxes.xyxy
+        detections = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        if classes is None or not self.class_aware:
+            classes = np.zeros(len(detections), dtype=np.int64)
+        classes = np.asarray(classes, dtype=np.int64)
+
+        self.frame_count += 1
+        self._predict()
+
+        slots = np.flatnonzero(self.alive)
+        tracks = convert_boxes(self.positions[slots], "xywh", "xyxy")
+        track_indices, detection_indices, ious = get_iou_pairs(
+            tracks, detections, self.iou_threshold
+        )
+        candidates = (
+            self.classes[slots[track_indices]] == classes[detection_indices]
+        )
+        track_indices, detection_indices = greedy_match(
+            track_indices[candidates],
+            detection_indices[candidates],
+            1 - ious[candidates],
+        )
+
+        xywh = convert_boxes(detections, "xyxy", "xywh")
+        matched_slots = slots[track_indices]
+        self._correct(matched_slots, xywh[detection_indices])
+        self.hits[matched_slots] += 1
+        self.misses[slots] += 1
+        self.misses[matched_slots] = 0
+        self._remove_tracks(slots[self.misses[slots] > self.max_age])
+
+        detection_slots = np.full(len(detections), -1, dtype=np.int64)
+        detection_slots[detection_indices] = matched_slots
+        unmatched = np.flatnonzero(detection_slots < 0)
+        detection_slots[unmatched] = self._create_tracks(
+            xywh[unmatched], classes[unmatched]
+        )
+
+        ids = self.ids[detection_slots]
+        ids[self.hits[detection_slots] < self.min_hits] = -1
+        return ids